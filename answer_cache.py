@@ -0,0 +1,124 @@
+"""
+Answer Cache - Reusable Chatbot Answers for Frequently Asked Questions
+"""
+
+import re
+import threading
+from config import ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL, ANSWER_CACHE_SIMILARITY, ANSWER_CACHE_MAX_WORDS
+from cache import LRUCache, MISSING
+
+# Words that carry no meaning for matching two phrasings of a question
+STOPWORDS = frozenset("""
+    a an the and or of to in on at for with is are be do does can could would will
+    you your yours we our us i me please hi hello hey there any some what whats
+""".split())
+
+# Questions whose answer depends on when or who is asking are never shared
+PERSONAL_WORDS = frozenset("""
+    now today tonight tomorrow yesterday my mine booking reservation reserved cancel
+""".split())
+
+def normalize_question(text):
+    """Lowercase words with punctuation and apostrophes removed, space separated"""
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower().replace("'", "").replace("’", "")))
+
+def _keywords(normalized):
+    return frozenset(word for word in normalized.split() if word not in STOPWORDS)
+
+def is_cacheable(question):
+    """True for short, self-contained questions whose answer is the same for every guest"""
+    words = normalize_question(question).split()
+    return 0 < len(words) <= ANSWER_CACHE_MAX_WORDS and not PERSONAL_WORDS.intersection(words)
+
+class AnswerCache:
+    """
+    Process-wide cache of chatbot answers keyed by normalized question.
+
+    Entries are stored against the fingerprint of the restaurant data the
+    answer was generated from; a lookup or store with a different
+    fingerprint empties the cache, so a menu change never serves stale
+    answers. When no question matches exactly, the cached question with the
+    highest keyword overlap (Jaccard) is used if it reaches `similarity`.
+    """
+
+    def __init__(self, maxsize=ANSWER_CACHE_SIZE, ttl=ANSWER_CACHE_TTL, similarity=ANSWER_CACHE_SIMILARITY):
+        self.similarity = similarity
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self._answers = LRUCache(maxsize, ttl)
+        self._keywords = {}
+        self._fingerprint = None
+        self._lock = threading.Lock()
+
+    def _check_fingerprint(self, fingerprint):
+        if fingerprint != self._fingerprint:
+            self._answers.clear()
+            self._keywords.clear()
+            self._fingerprint = fingerprint
+
+    def _most_similar(self, keywords):
+        best, best_score = None, 0.0
+        for question, candidate in list(self._keywords.items()):
+            if question not in self._answers:
+                # Evicted or expired
+                del self._keywords[question]
+                continue
+            union = len(keywords | candidate)
+            score = len(keywords & candidate) / union if union else 0.0
+            if score > best_score:
+                best, best_score = question, score
+        return best if best_score >= self.similarity else None
+
+    def get(self, question, fingerprint):
+        """
+        Cached answer for a question
+
+        Returns:
+            The answer, or None on a miss
+        """
+        normalized = normalize_question(question)
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+            answer = self._answers.get(normalized)
+            if answer is not MISSING:
+                self.hits += 1
+                return answer
+
+            if self.similarity:
+                keywords = _keywords(normalized)
+                match = self._most_similar(keywords) if keywords else None
+                if match is not None:
+                    answer = self._answers.get(match)
+                    if answer is not MISSING:
+                        self.similar_hits += 1
+                        return answer
+
+            self.misses += 1
+            return None
+
+    def set(self, question, answer, fingerprint):
+        """Remember the answer generated for a question"""
+        normalized = normalize_question(question)
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+            self._answers.set(normalized, answer)
+            self._keywords[normalized] = _keywords(normalized)
+
+    def clear(self):
+        with self._lock:
+            self._answers.clear()
+            self._keywords.clear()
+
+    def stats(self):
+        """Exact and similar hit counters, hit ratio and size"""
+        with self._lock:
+            lookups = self.hits + self.similar_hits + self.misses
+            return {
+                "hits": self.hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.similar_hits) / lookups if lookups else 0.0,
+                "size": len(self._answers),
+                "maxsize": self._answers.maxsize
+            }
@@ -5,17 +5,20 @@ Premium Streamlit Interface with Voice Capabilities
 
 import streamlit as st
 import pandas as pd
+import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import base64
 from pathlib import Path
 import os
+import uuid
+import hmac
 
 # Import custom modules
-from chatbot_engine import RestaurantChatbot
-from booking_system import BookingSystem
+from chatbot_engine import RestaurantChatbot, answer_cache, intent_router, response_metrics
+from booking_system import create_booking_store, make_idempotency_key
 from voice_handler import VoiceHandler
 from restaurant_data import MENU_DATA, SPECIAL_OFFERS, get_popular_items
-from config import APP_TITLE, APP_SUBTITLE, RESTAURANT_INFO, BOOKING_SLOTS
+from config import APP_TITLE, APP_SUBTITLE, RESTAURANT_INFO, BOOKING_SLOTS, NOTIFICATIONS_ENABLED, ADMIN_PASSWORD
 
 # Page configuration
 st.set_page_config(
@@ -505,13 +508,21 @@ def init_session_state():
     if 'chatbot' not in st.session_state:
         st.session_state.chatbot = RestaurantChatbot()
     if 'booking_system' not in st.session_state:
-        st.session_state.booking_system = BookingSystem()
+        st.session_state.booking_system = create_booking_store()
+        # Confirmation emails go out from background workers, never from the request
+        job_queue = getattr(st.session_state.booking_system, "job_queue", None)
+        if job_queue is not None and NOTIFICATIONS_ENABLED:
+            job_queue.start()
     if 'voice_handler' not in st.session_state:
         st.session_state.voice_handler = VoiceHandler()
     if 'messages' not in st.session_state:
         st.session_state.messages = []
     if 'voice_enabled' not in st.session_state:
         st.session_state.voice_enabled = False
+    if 'booking_form_id' not in st.session_state:
+        st.session_state.booking_form_id = uuid.uuid4().hex
+    if 'admin_authenticated' not in st.session_state:
+        st.session_state.admin_authenticated = False
 
 # Display chat messages
 def display_chat():
@@ -541,7 +552,11 @@ def main():
     # Sidebar
     with st.sidebar:
         st.markdown("### 🎯 Navigation")
-        page = st.radio("", ["💬 Chat Assistant", "📅 Make Reservation", "🍽️ View Menu", "ℹ️ Restaurant Info"])
+        pages = ["💬 Chat Assistant", "📅 Make Reservation", "🍽️ View Menu", "ℹ️ Restaurant Info"]
+        # Booking analytics are for staff only, so the page exists only when ADMIN_PASSWORD is set
+        if ADMIN_PASSWORD:
+            pages.append("📈 Admin Analytics")
+        page = st.radio("", pages)
         
         st.markdown("---")
         
@@ -577,6 +592,8 @@ def main():
         show_booking_page()
     elif page == "🍽️ View Menu":
         show_menu_page()
+    elif page == "📈 Admin Analytics" and ADMIN_PASSWORD:
+        show_admin_page()
     else:
         show_info_page()
 
@@ -617,9 +634,16 @@ def show_chat_page():
         # Add user message
         st.session_state.messages.append({"role": "user", "content": user_input})
         
-        # Get bot response
-        with st.spinner("🤔 Thinking..."):
-            response = st.session_state.chatbot.get_response(user_input)
+        st.markdown(f'<div class="user-message">👤 {user_input}</div>', unsafe_allow_html=True)
+        
+        # Stream the bot response into a placeholder as tokens arrive
+        placeholder = st.empty()
+        placeholder.markdown('<div class="bot-message">🤖 🤔 Thinking...</div>', unsafe_allow_html=True)
+        response = ""
+        for chunk in st.session_state.chatbot.get_response_stream(user_input):
+            response += chunk
+            placeholder.markdown(f'<div class="bot-message">🤖 {response}▌</div>', unsafe_allow_html=True)
+        placeholder.markdown(f'<div class="bot-message">🤖 {response}</div>', unsafe_allow_html=True)
         
         # Add bot response
         st.session_state.messages.append({"role": "assistant", "content": response})
@@ -652,9 +676,16 @@ def show_booking_page():
         party_size = st.number_input("Party Size *", min_value=1, max_value=12, value=2)
     
     special_requests = st.text_area("Special Requests (Optional)", placeholder="Dietary restrictions, celebrations, etc.")
+    join_waitlist = st.checkbox("Put me on the waitlist if this time is fully booked", value=True)
     
     if st.button("🎉 Confirm Reservation", use_container_width=True):
         if name and email and phone:
+            # Same form values in the same session -> same key, so reruns and
+            # double-clicks return the original booking instead of a duplicate
+            idempotency_key = make_idempotency_key(
+                st.session_state.booking_form_id,
+                name, email, phone, date, time, party_size, special_requests
+            )
             result = st.session_state.booking_system.create_booking(
                 customer_name=name,
                 email=email,
@@ -662,12 +693,29 @@ def show_booking_page():
                 date=str(date),
                 time=time,
                 party_size=party_size,
-                special_requests=special_requests
+                special_requests=special_requests,
+                idempotency_key=idempotency_key
             )
             
             if result["success"]:
                 st.success(f"✅ {result['message']}")
+                if result.get("tables"):
+                    st.info(f"🪑 Your table: {' + '.join(result['tables'])}")
                 st.balloons()
+            elif result.get("can_waitlist") and join_waitlist:
+                waitlist = st.session_state.booking_system.join_waitlist(
+                    customer_name=name,
+                    email=email,
+                    phone=phone,
+                    date=str(date),
+                    time=time,
+                    party_size=party_size,
+                    special_requests=special_requests
+                )
+                if waitlist["success"]:
+                    st.info(f"⏳ {waitlist['message']}")
+                else:
+                    st.error(f"❌ {waitlist['message']}")
             else:
                 st.error(f"❌ {result['message']}")
         else:
@@ -675,14 +723,158 @@ def show_booking_page():
     
     # Show available slots
     st.markdown("---")
-    st.markdown("### 📊 Available Time Slots")
+    st.markdown(f"### 📊 Available Time Slots (party of {party_size})")
     if st.button("Check Availability"):
-        slots = st.session_state.booking_system.get_available_slots(str(date))
+        slots = st.session_state.booking_system.get_available_slots(str(date), party_size)
         if slots:
-            df = pd.DataFrame(slots)
+            df = pd.DataFrame(slots)[["time", "available_seats"]]
             st.dataframe(df, use_container_width=True)
         else:
             st.info("All slots are fully booked for this date.")
+    
+    # Month heatmap
+    st.markdown("### 🗓️ Month at a Glance")
+    month_start = date.replace(day=1)
+    month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    availability = st.session_state.booking_system.get_availability_range(month_start, month_end)
+    booked_percent = 100 * (1 - availability / RESTAURANT_INFO['capacity'])
+    
+    fig = go.Figure(go.Heatmap(
+        z=booked_percent.T.values,
+        x=booked_percent.index,
+        y=booked_percent.columns,
+        zmin=0,
+        zmax=100,
+        colorscale=[[0, "#D4F1F4"], [0.5, "#C4B5FD"], [1, "#EC4899"]],
+        colorbar=dict(title="% booked"),
+        hovertemplate="%{x} %{y}<br>%{z:.0f}% booked<extra></extra>"
+    ))
+    fig.update_layout(
+        title=f"Bookings for {month_start.strftime('%B %Y')}",
+        yaxis=dict(autorange="reversed"),
+        height=550
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+def show_admin_login():
+    password = st.text_input("Admin password", type="password")
+    if st.button("Sign in"):
+        if hmac.compare_digest(password.encode(), ADMIN_PASSWORD.encode()):
+            st.session_state.admin_authenticated = True
+            st.rerun()
+        st.error("❌ Incorrect password.")
+
+def show_admin_page():
+    st.markdown("## 📈 Admin Analytics")
+    if not st.session_state.admin_authenticated:
+        show_admin_login()
+        return
+    st.caption("Read from the daily rollup tables, so it stays fast however long the booking history grows.")
+    
+    today = datetime.now().date()
+    col1, col2 = st.columns(2)
+    with col1:
+        start_date = st.date_input("From", value=today - timedelta(days=30))
+    with col2:
+        end_date = st.date_input("To", value=today + timedelta(days=30))
+    if start_date > end_date:
+        st.warning("⚠️ The start date must be on or before the end date.")
+        return
+    
+    system = st.session_state.booking_system
+    trends = system.get_daily_trends(start_date, end_date)
+    
+    total_bookings = trends['bookings'].sum()
+    total_cancellations = trends['cancellations'].sum()
+    requested = total_bookings + total_cancellations
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Covers", f"{trends['covers'].sum():,}")
+    col2.metric("Bookings", f"{total_bookings:,}")
+    col3.metric("Cancellation Rate", f"{total_cancellations / requested:.1%}" if requested else "—")
+    
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=trends.index, y=trends['covers'], name="Covers",
+        mode="lines+markers", line=dict(color="#8B5CF6")
+    ))
+    fig.add_trace(go.Bar(
+        x=trends.index, y=trends['cancellations'], name="Cancellations",
+        marker_color="#EC4899", yaxis="y2", opacity=0.6
+    ))
+    fig.update_layout(
+        title="Daily Occupancy",
+        yaxis=dict(title="Covers"),
+        yaxis2=dict(title="Cancellations", overlaying="y", side="right", showgrid=False),
+        legend=dict(orientation="h"),
+        height=400
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        covers = system.get_slot_covers(start_date, end_date)
+        fig = go.Figure(go.Heatmap(
+            z=covers.T.values,
+            x=covers.index,
+            y=covers.columns,
+            colorscale=[[0, "#D4F1F4"], [0.5, "#C4B5FD"], [1, "#EC4899"]],
+            colorbar=dict(title="Covers"),
+            hovertemplate="%{x} %{y}<br>%{z} covers<extra></extra>"
+        ))
+        fig.update_layout(title="Covers by Time Slot", yaxis=dict(autorange="reversed"), height=550)
+        st.plotly_chart(fig, use_container_width=True)
+    
+    with col2:
+        histogram = system.get_party_size_histogram(start_date, end_date)
+        fig = go.Figure(go.Bar(x=histogram.index, y=histogram.values, marker_color="#8B5CF6"))
+        fig.update_layout(
+            title="Party Sizes",
+            xaxis=dict(title="Guests", dtick=1),
+            yaxis=dict(title="Bookings"),
+            height=550
+        )
+        st.plotly_chart(fig, use_container_width=True)
+    
+    job_queue = getattr(system, "job_queue", None)
+    if job_queue is not None:
+        st.markdown("### ✉️ Notification Queue")
+        stats = job_queue.stats()
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Pending", stats["pending"])
+        col2.metric("Oldest Due", f"{stats['oldest_pending_age']:.1f}s")
+        col3.metric("Dead", stats["dead"])
+        col4.metric("p95 Latency", f"{stats['latency_p95']:.2f}s" if stats["latency_p95"] is not None else "—")
+    
+    st.markdown("### 💬 Chat Response Times")
+    chat_stats = response_metrics.stats()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Model Responses", chat_stats["responses"])
+    col2.metric("First Token p50", f"{chat_stats['ttft_p50']:.2f}s" if chat_stats["ttft_p50"] is not None else "—")
+    col3.metric("First Token p95", f"{chat_stats['ttft_p95']:.2f}s" if chat_stats["ttft_p95"] is not None else "—")
+    col4.metric("Full Answer p95", f"{chat_stats['total_p95']:.2f}s" if chat_stats["total_p95"] is not None else "—")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Prompt Tokens p50", chat_stats["prompt_tokens_p50"] if chat_stats["prompt_tokens_p50"] is not None else "—")
+    col2.metric("Prompt Tokens p95", chat_stats["prompt_tokens_p95"] if chat_stats["prompt_tokens_p95"] is not None else "—")
+    col3.metric("Largest Prompt", chat_stats["prompt_tokens_max"] if chat_stats["prompt_tokens_max"] is not None else "—")
+    col4.metric("History Compactions", chat_stats["compactions"])
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Answered Without Model", chat_stats["local_answers"] + chat_stats["cached_answers"])
+    col2.metric("Instant Answer p50", f"{chat_stats['instant_p50'] * 1000:.1f}ms" if chat_stats["instant_p50"] is not None else "—")
+    col3.metric("Instant Answer p95", f"{chat_stats['instant_p95'] * 1000:.1f}ms" if chat_stats["instant_p95"] is not None else "—")
+    col4.metric("Model Errors", chat_stats["errors"])
+    cache_stats = answer_cache.stats()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Answer Cache Hit Ratio", f"{cache_stats['hit_ratio']:.0%}")
+    col2.metric("Exact Hits", cache_stats["hits"])
+    col3.metric("Similar Hits", cache_stats["similar_hits"])
+    col4.metric("Cached Answers", f"{cache_stats['size']}/{cache_stats['maxsize']}")
+    router_stats = intent_router.stats()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Answered Locally", f"{router_stats['local_ratio']:.0%}")
+    col2.metric("Local Answers", router_stats["routed"])
+    col3.metric("Sent to Model", router_stats["fallbacks"])
+    top_intent = max(router_stats["by_intent"].items(), key=lambda entry: entry[1], default=("—", 0))[0]
+    col4.metric("Top Local Intent", top_intent.title())
 
 def show_menu_page():
     st.markdown("## 🍽️ Our Menu")
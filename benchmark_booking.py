@@ -0,0 +1,165 @@
+"""
+Booking Benchmark - Micro-benchmarks for the reservation database
+
+Usage:
+    python benchmark_booking.py [iterations]
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from booking_system import BookingSystem
+from storage import InMemoryBookingStore
+from config import BOOKING_SLOTS, RESTAURANT_INFO
+
+class LegacyBookingSystem:
+    """
+    Connect-per-call access pattern used before the connection pool
+
+    Runs against its own database with the original schema (no indexes,
+    display-string times), so the "before" numbers measure the original
+    workload rather than legacy queries against the migrated tables.
+    """
+
+    def __init__(self, db_name):
+        self.db_name = db_name
+        self.init_database()
+
+    def init_database(self):
+        conn = sqlite3.connect(self.db_name)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS bookings (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                customer_name TEXT NOT NULL,
+                email TEXT NOT NULL,
+                phone TEXT NOT NULL,
+                date TEXT NOT NULL,
+                time TEXT NOT NULL,
+                party_size INTEGER NOT NULL,
+                special_requests TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                status TEXT DEFAULT 'confirmed'
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    def check_availability(self, date, time, party_size):
+        conn = sqlite3.connect(self.db_name)
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT SUM(party_size) FROM bookings
+            WHERE date = ? AND time = ? AND status = 'confirmed'
+        ''', (date, time))
+        result = cursor.fetchone()
+        conn.close()
+        current_bookings = result[0] if result[0] else 0
+        return (current_bookings + party_size) <= RESTAURANT_INFO.get('capacity', 100)
+
+    def get_booking(self, booking_id):
+        conn = sqlite3.connect(self.db_name)
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM bookings WHERE id = ?', (booking_id,))
+        result = cursor.fetchone()
+        conn.close()
+        return result
+
+    def create_booking(self, customer_name, email, phone, date, time, party_size, special_requests=""):
+        if not self.check_availability(date, time, party_size):
+            return {"success": False}
+        conn = sqlite3.connect(self.db_name)
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO bookings (customer_name, email, phone, date, time, party_size, special_requests)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (customer_name, email, phone, date, time, party_size, special_requests))
+        conn.commit()
+        conn.close()
+        return {"success": True}
+
+def _booking_args(i):
+    day = 1 + (i // len(BOOKING_SLOTS)) % 28
+    return (
+        f"Guest {i}", f"guest{i}@example.com", "+1 555 0100",
+        f"2030-01-{day:02d}", BOOKING_SLOTS[i % len(BOOKING_SLOTS)], 2
+    )
+
+def _ops_per_sec(fn, iterations):
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(i)
+    elapsed = time.perf_counter() - start
+    return iterations / elapsed if elapsed else float("inf")
+
+def run_benchmarks(iterations=2000):
+    """Run each operation against the legacy and pooled paths"""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        system = BookingSystem(os.path.join(tmp, "bench.db"))
+        legacy = LegacyBookingSystem(os.path.join(tmp, "legacy.db"))
+
+        cases = [
+            ("create_booking", lambda s: lambda i: s.create_booking(*_booking_args(i))),
+            ("check_availability", lambda s: lambda i: s.check_availability(*_booking_args(i)[3:])),
+            ("get_booking", lambda s: lambda i: s.get_booking(1 + i % iterations)),
+        ]
+
+        for name, make in cases:
+            before = _ops_per_sec(make(legacy), iterations)
+            after = _ops_per_sec(make(system), iterations)
+            results.append((name, before, after))
+
+        system.pool.close_all()
+    return results
+
+def run_engine_benchmark(iterations=2000):
+    """Same booking workload against the SQLite and in-memory engines"""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        engines = [("sqlite", BookingSystem(os.path.join(tmp, "bench.db"))), ("memory", InMemoryBookingStore())]
+        for label, store in engines:
+            create = _ops_per_sec(lambda i: store.create_booking(*_booking_args(i)), iterations)
+            check = _ops_per_sec(lambda i: store.check_availability(*_booking_args(i)[3:]), iterations)
+            get = _ops_per_sec(lambda i: store.get_booking(1 + i % iterations), iterations)
+            results.append((label, create, check, get))
+        engines[0][1].pool.close_all()
+    return results
+
+def run_group_commit_benchmark(total=4000, threads=32):
+    """Concurrent create_booking throughput: per-call commit vs group commit"""
+    results = []
+    for label, write_behind in (("per-call commit", False), ("group commit", True)):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_name = os.path.join(tmp, "bench.db")
+            system = BookingSystem(db_name, write_behind=write_behind)
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                start = time.perf_counter()
+                list(executor.map(lambda i: system.create_booking(*_booking_args(i)), range(total)))
+                elapsed = time.perf_counter() - start
+            if write_behind:
+                system.write_queue.close()
+            system.pool.close_all()
+        results.append((label, total / elapsed))
+    return results
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print(f"{'operation':<22}{'before ops/s':>15}{'after ops/s':>15}{'speedup':>10}")
+    for name, before, after in run_benchmarks(iterations):
+        print(f"{name:<22}{before:>15,.0f}{after:>15,.0f}{after / before:>9.1f}x")
+    
+    print()
+    print(f"{'engine':<10}{'create ops/s':>15}{'check ops/s':>15}{'get ops/s':>15}")
+    for label, create, check, get in run_engine_benchmark(iterations):
+        print(f"{label:<10}{create:>15,.0f}{check:>15,.0f}{get:>15,.0f}")
+    
+    print()
+    print(f"{'concurrent create_booking':<30}{'ops/s':>12}")
+    for label, ops in run_group_commit_benchmark(total=iterations * 2):
+        print(f"{label:<30}{ops:>12,.0f}")
+
+if __name__ == "__main__":
+    main()
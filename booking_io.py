@@ -0,0 +1,102 @@
+"""
+Booking Import/Export - Streaming CSV and JSONL Transfer
+"""
+
+import csv
+import json
+from itertools import islice
+from config import BULK_BATCH_SIZE
+from booking_system import BOOKING_COLUMNS
+
+EXPORT_COLUMNS = BOOKING_COLUMNS
+
+def _detect_format(path, fmt):
+    if fmt:
+        return fmt.lower()
+    return "jsonl" if str(path).lower().endswith((".jsonl", ".ndjson")) else "csv"
+
+def _read_rows(handle, fmt):
+    if fmt == "csv":
+        yield from csv.DictReader(handle)
+    else:
+        for line in handle:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+def import_bookings(booking_system, path, fmt=None, batch_size=BULK_BATCH_SIZE, on_result=None):
+    """
+    Stream bookings from a CSV or JSONL file into the database
+
+    Rows are read lazily and committed in batches through
+    create_bookings_bulk, so memory use does not depend on file size.
+    Rows whose status is not 'confirmed' (cancelled bookings in an
+    export) are skipped rather than re-booked.
+
+    Args:
+        booking_system: BookingSystem to import into
+        path: Source file path
+        fmt: 'csv' or 'jsonl' (detected from the extension if omitted)
+        batch_size: Rows per transaction
+        on_result: Optional callback(line_number, row, result) for each row
+
+    Returns:
+        dict with 'accepted', 'rejected' and 'skipped' counts
+    """
+    fmt = _detect_format(path, fmt)
+    accepted = rejected = skipped = 0
+    line_number = 0
+
+    with open(path, newline="", encoding="utf-8") as handle:
+        rows = _read_rows(handle, fmt)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+
+            results = booking_system.create_bookings_bulk(batch)
+            for row, result in zip(batch, results):
+                line_number += 1
+                if result["success"]:
+                    accepted += 1
+                elif result.get("skipped"):
+                    skipped += 1
+                else:
+                    rejected += 1
+                if on_result:
+                    on_result(line_number, row, result)
+
+    return {"accepted": accepted, "rejected": rejected, "skipped": skipped}
+
+def export_bookings(booking_system, path, fmt=None, date=None, batch_size=BULK_BATCH_SIZE):
+    """
+    Stream bookings from the database to a CSV or JSONL file
+
+    Args:
+        booking_system: BookingSystem to export from
+        path: Destination file path
+        fmt: 'csv' or 'jsonl' (detected from the extension if omitted)
+        date: Only export bookings on this date
+        batch_size: Rows fetched per keyset page
+
+    Returns:
+        Number of rows written
+    """
+    fmt = _detect_format(path, fmt)
+    records = booking_system.iter_bookings(date=date, columns=EXPORT_COLUMNS, batch_size=batch_size)
+
+    written = 0
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle) if fmt == "csv" else None
+        if writer:
+            writer.writerow(EXPORT_COLUMNS)
+
+        for record in records:
+            row = record.to_dict()
+            if writer:
+                writer.writerow(row.values())
+            else:
+                handle.write(json.dumps(row) + "\n")
+            written += 1
+
+    return written
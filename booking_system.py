@@ -2,202 +2,989 @@
 Booking System - Database and Reservation Management
 """
 
-import sqlite3
-from datetime import datetime, timedelta
+from concurrent.futures import Future
+from datetime import date as date_type, datetime, timedelta
+import hashlib
+import json
 import pandas as pd
-from config import DB_NAME, MAX_PARTY_SIZE, MIN_PARTY_SIZE
+import threading
+from config import DB_NAME, BOOKING_BACKEND
+from config import AVAILABILITY_CACHE_SIZE, AVAILABILITY_CACHE_TTL, AVAILABILITY_SNAPSHOT
+from config import NOTIFICATIONS_ENABLED
+from config import ARCHIVE_HORIZON_DAYS, ARCHIVE_BATCH_SIZE, WRITE_BEHIND, IDEMPOTENCY_CACHE_SIZE
+from cache import LRUCache
+from database import get_pool
+from migrations import migrate, rebuild_slot_occupancy, rebuild_rollups, CONFIRMED_BY_DATE
+from capacity import covered_slots, remaining_seats, occupancy_by_date, overlapping_starts
+from tables import TableSchedule, repack
+from events import BOOKING_CREATED, BOOKING_CANCELLED, EVENT_COLUMNS, encode_payload, decode_event
+from write_queue import get_write_queue
+from snapshot import get_snapshot
+from jobs import enqueue_job, get_job_queue
+from notifications import NOTIFICATION_JOB, send_booking_notification
+from time_slots import slot_to_minutes, minutes_to_slot
+from storage import (
+    BookingStore, InMemoryBookingStore, Booking, WaitlistEntry, BOOKING_FIELDS, BOOKING_COLUMNS,
+    KEYSET_COLUMNS, WAITLIST_COLUMNS, booking_confirmed, booking_rejected, booking_skipped,
+    booking_unavailable, waitlist_joined, whole_party_size, booking_record_type, check_booking_columns,
+    SLOT_OPEN_MESSAGE, INVALID_DATE_MESSAGE
+)
 
-class BookingSystem:
-    def __init__(self):
-        self.db_name = DB_NAME
+BOOKING_SELECT = ", ".join(BOOKING_COLUMNS)
+WAITLIST_SELECT = ", ".join(WAITLIST_COLUMNS)
+
+def booking_row_factory(cursor, row):
+    """sqlite3 row factory for queries selecting BOOKING_SELECT"""
+    return Booking._make(row)
+
+def waitlist_row_factory(cursor, row):
+    """sqlite3 row factory for queries selecting WAITLIST_SELECT"""
+    return WaitlistEntry._make(row)
+
+_shared_caches = {}
+_shared_caches_lock = threading.Lock()
+
+def _shared_cache(kind, db_name, maxsize, ttl=None):
+    with _shared_caches_lock:
+        cache = _shared_caches.get((kind, db_name))
+        if cache is None:
+            cache = LRUCache(maxsize=maxsize, ttl=ttl)
+            _shared_caches[(kind, db_name)] = cache
+        return cache
+
+def get_availability_cache(db_name):
+    """Get the process-wide per-date availability cache for a database file"""
+    return _shared_cache("availability", db_name, AVAILABILITY_CACHE_SIZE, AVAILABILITY_CACHE_TTL)
+
+def get_table_cache(db_name):
+    """Get the process-wide per-date table schedule cache for a database file"""
+    return _shared_cache("tables", db_name, AVAILABILITY_CACHE_SIZE, AVAILABILITY_CACHE_TTL)
+
+def get_idempotency_cache(db_name):
+    """Get the process-wide cache of recently completed idempotency keys"""
+    return _shared_cache("idempotency", db_name, IDEMPOTENCY_CACHE_SIZE)
+
+def make_idempotency_key(session_id, *fields):
+    """
+    Derive an idempotency key from a form session and its submitted values
+    
+    Resubmitting the same form in the same session yields the same key;
+    changing any field yields a new one.
+    """
+    payload = json.dumps([session_id, *[str(field) for field in fields]])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class BookingSystem(BookingStore):
+    """SQLite storage engine and the app's reservation service"""
+    
+    def __init__(self, db_name=None, write_behind=WRITE_BEHIND):
+        self.db_name = db_name or DB_NAME
+        self.pool = get_pool(self.db_name)
+        self.table_cache = get_table_cache(self.db_name)
+        self.snapshot = get_snapshot(self.db_name) if AVAILABILITY_SNAPSHOT else None
+        # Seat counts live in the shared snapshot; the per-process cache only stands in without one
+        self.availability_cache = None if self.snapshot is not None else get_availability_cache(self.db_name)
+        self.job_queue = get_job_queue(self.db_name, {NOTIFICATION_JOB: send_booking_notification})
+        self.idempotency_cache = get_idempotency_cache(self.db_name)
         self.init_database()
+        self.write_queue = get_write_queue(self) if write_behind else None
     
     def init_database(self):
-        """Initialize the bookings database"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
+        """Initialize the bookings database and apply pending migrations"""
+        with self.pool.transaction() as conn:
+            migrate(conn)
+    
+    def create_booking(self, customer_name, email, phone, date, time, party_size, special_requests="",
+                       idempotency_key=None):
+        """
+        Create a new booking
         
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS bookings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                customer_name TEXT NOT NULL,
-                email TEXT NOT NULL,
-                phone TEXT NOT NULL,
-                date TEXT NOT NULL,
-                time TEXT NOT NULL,
-                party_size INTEGER NOT NULL,
-                special_requests TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                status TEXT DEFAULT 'confirmed'
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
-    
-    def create_booking(self, customer_name, email, phone, date, time, party_size, special_requests=""):
-        """Create a new booking"""
-        # Validate party size
-        if party_size < MIN_PARTY_SIZE or party_size > MAX_PARTY_SIZE:
-            return {
-                "success": False,
-                "message": f"Party size must be between {MIN_PARTY_SIZE} and {MAX_PARTY_SIZE} guests."
-            }
+        Args:
+            idempotency_key: Optional key identifying this submission; a retry
+                             with the same key returns the original result
+                             without inserting again
+        """
+        booking = {
+            "customer_name": customer_name, "email": email, "phone": phone, "date": date,
+            "time": time, "party_size": party_size, "special_requests": special_requests,
+            "idempotency_key": idempotency_key
+        }
+        if idempotency_key:
+            recorded = self.idempotency_cache.get(idempotency_key, None)
+            if recorded is not None:
+                return dict(recorded)
+        if self.write_queue is not None:
+            return self.write_queue.submit(booking).result()
+        return self._create_booking(**booking)
+    
+    def submit_booking(self, **booking):
+        """
+        Queue a booking for group commit
         
-        # Check availability
-        if not self.check_availability(date, time, party_size):
-            return {
-                "success": False,
-                "message": "Sorry, this time slot is not available. Please choose another time."
-            }
+        Takes the create_booking keyword arguments and returns a Future with
+        its result. Without write-behind mode the booking is created
+        immediately and an already-resolved Future is returned.
+        """
+        if self.write_queue is not None:
+            return self.write_queue.submit(booking)
+        future = Future()
+        future.set_result(self._create_booking(**booking))
+        return future
+    
+    def _create_booking(self, customer_name, email, phone, date, time, party_size, special_requests="",
+                        idempotency_key=None):
+        """Validate, reserve seats and insert a booking in one transaction"""
+        if idempotency_key:
+            recorded = self._recorded_result(idempotency_key)
+            if recorded is not None:
+                return recorded
         
-        # Create booking
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
+        time, rejection = self._validate_request(time, party_size)
+        if rejection:
+            return rejection
         
-        cursor.execute('''
+        with self.pool.transaction() as conn:
+            # Re-check under the write lock in case a concurrent retry just won
+            if idempotency_key:
+                recorded = self._recorded_result(idempotency_key, conn)
+                if recorded is not None:
+                    return recorded
+            
+            # Pick tables, then reserve seats; fails atomically if the slot
+            # would exceed capacity
+            schedule = self._load_table_schedule(conn, date)
+            tables = schedule.find(party_size, time)
+            if tables is None or not self._reserve_seats(conn, date, time, party_size):
+                return booking_unavailable()
+            
+            booking_id = self._insert_booking(
+                conn, schedule, tables, customer_name, email, phone, date, time, party_size, special_requests
+            )
+            result = booking_confirmed(booking_id, tables)
+            
+            if idempotency_key:
+                conn.execute('''
+                    INSERT INTO booking_requests (idempotency_key, booking_id, response)
+                    VALUES (?, ?, ?)
+                ''', (idempotency_key, booking_id, json.dumps(result)))
+        
+        self.invalidate_date(date)
+        self.job_queue.wake()
+        # Only cache once durable; inside a group commit the batch may still roll back
+        if idempotency_key and not self.pool.in_transaction():
+            self.idempotency_cache.set(idempotency_key, dict(result))
+        
+        return result
+    
+    def _insert_booking(self, conn, schedule, tables, customer_name, email, phone, date, time, party_size,
+                        special_requests, waitlist_id=None):
+        """Insert a booking whose seats are already reserved and record its tables"""
+        cursor = conn.execute('''
             INSERT INTO bookings (customer_name, email, phone, date, time, party_size, special_requests)
             VALUES (?, ?, ?, ?, ?, ?, ?)
         ''', (customer_name, email, phone, date, time, party_size, special_requests))
         
         booking_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        self._save_table_assignments(conn, [
+            (booking_id, table_id, date, start, end)
+            for table_id, start, end in schedule.assign(booking_id, party_size, time, tables)
+        ])
+        self._update_rollups(conn, [(date, time, party_size, 1)])
+        self._append_events(conn, [(booking_id, BOOKING_CREATED, date, time, party_size, {
+            "customer_name": customer_name, "email": email, "phone": phone,
+            "special_requests": special_requests, "tables": list(tables), "waitlist_id": waitlist_id
+        })])
+        return booking_id
+    
+    def _append_events(self, conn, events, notify=True):
+        """
+        Append to booking_events in the caller's transaction
         
-        return {
-            "success": True,
-            "booking_id": booking_id,
-            "message": f"Booking confirmed! Your reservation ID is {booking_id}."
-        }
+        Args:
+            events: Iterable of (booking_id, event_type, date, time, party_size, payload dict)
+            notify: Also enqueue a customer notification job for each event
+        """
+        events = list(events)
+        conn.executemany('''
+            INSERT INTO booking_events (booking_id, event_type, date, time, party_size, payload)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(*event[:5], encode_payload(event[5])) for event in events])
+        
+        if notify and NOTIFICATIONS_ENABLED:
+            for booking_id, event_type, date, time, party_size, payload in events:
+                enqueue_job(conn, NOTIFICATION_JOB, {
+                    "booking_id": booking_id, "event_type": event_type, "date": date,
+                    "time": time, "party_size": party_size, **payload
+                })
     
-    def check_availability(self, date, time, party_size):
-        """Check if a time slot is available"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
+    def _recorded_result(self, idempotency_key, conn=None):
+        """Result previously stored for an idempotency key, or None"""
+        if conn is None:
+            with self.pool.connection() as conn:
+                return self._recorded_result(idempotency_key, conn)
+        
+        row = conn.execute(
+            'SELECT response FROM booking_requests WHERE idempotency_key = ?', (idempotency_key,)
+        ).fetchone()
+        if row is None:
+            return None
         
-        cursor.execute('''
-            SELECT SUM(party_size) FROM bookings
-            WHERE date = ? AND time = ? AND status = 'confirmed'
-        ''', (date, time))
+        result = json.loads(row[0])
+        if not conn.in_transaction:
+            self.idempotency_cache.set(idempotency_key, dict(result))
+        return result
+    
+    def create_bookings_bulk(self, bookings):
+        """
+        Create many bookings in a single transaction
         
-        result = cursor.fetchone()
-        conn.close()
+        Capacity and tables are checked for the whole batch against the
+        aggregated slot occupancy and table schedules, in input order, and
+        accepted rows are inserted with one executemany call.
         
-        current_bookings = result[0] if result[0] else 0
+        Args:
+            bookings: Iterable of dicts with the create_booking fields
         
-        # Assuming restaurant capacity of 100 (from config)
-        from config import RESTAURANT_INFO
-        capacity = RESTAURANT_INFO.get('capacity', 100)
+        Returns:
+            List with one result dict per input row, in input order
+        """
+        bookings = list(bookings)
+        results = [None] * len(bookings)
+        candidates = []
         
-        return (current_bookings + party_size) <= capacity
+        for index, booking in enumerate(bookings):
+            # Exported files carry cancelled rows too; they must not take seats again
+            status = booking.get("status") or "confirmed"
+            if status != "confirmed":
+                results[index] = booking_skipped(status)
+                continue
+            
+            missing = [field for field in BOOKING_FIELDS if not booking.get(field)]
+            if missing:
+                results[index] = booking_rejected(f"Missing required field(s): {', '.join(missing)}.")
+                continue
+            
+            try:
+                date = date_type.fromisoformat(str(booking["date"])).isoformat()
+            except ValueError:
+                results[index] = booking_rejected(INVALID_DATE_MESSAGE)
+                continue
+            
+            party_size = whole_party_size(booking["party_size"])
+            time, rejection = self._validate_request(booking["time"], party_size)
+            if rejection:
+                results[index] = rejection
+                continue
+            
+            candidates.append((index, (
+                booking["customer_name"], booking["email"], booking["phone"],
+                date, time, party_size,
+                booking.get("special_requests") or ""
+            )))
+        
+        capacity = self._capacity()
+        dates = sorted({row[3] for _, row in candidates})
+        
+        with self.pool.transaction() as conn:
+            occupancy = {date: {} for date in dates}
+            assigned = {date: [] for date in dates}
+            for start in range(0, len(dates), 500):
+                chunk = dates[start:start + 500]
+                placeholders = ", ".join("?" * len(chunk))
+                for date, time, seats_taken in conn.execute(
+                    f'SELECT date, time, seats_taken FROM slot_occupancy WHERE date IN ({placeholders})', chunk
+                ):
+                    occupancy[date][time] = seats_taken
+                for date, *row in conn.execute(f'''
+                    SELECT date, booking_id, table_id, start_time, end_time FROM table_assignments
+                    WHERE date IN ({placeholders})
+                ''', chunk):
+                    assigned[date].append(row)
+            schedules = {date: TableSchedule(rows) for date, rows in assigned.items()}
+            
+            # AUTOINCREMENT ids are assigned sequentially while we hold the write lock
+            last_id = conn.execute('''
+                SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'bookings'), 0),
+                           COALESCE((SELECT MAX(id) FROM bookings), 0))
+            ''').fetchone()[0]
+            
+            accepted = []
+            deltas = {}
+            assignments = []
+            for index, row in candidates:
+                date, time, party_size = row[3], row[4], row[5]
+                slots = occupancy[date]
+                tables = schedules[date].find(party_size, time)
+                if tables is None or remaining_seats(slots, time, party_size, capacity) < party_size:
+                    results[index] = booking_unavailable()
+                    continue
+                for minutes in covered_slots(time, party_size):
+                    slots[minutes] = slots.get(minutes, 0) + party_size
+                    deltas[(date, minutes)] = deltas.get((date, minutes), 0) + party_size
+                booking_id = last_id + len(accepted) + 1
+                assignments.extend(
+                    (booking_id, table_id, date, start, end)
+                    for table_id, start, end in schedules[date].assign(booking_id, party_size, time, tables)
+                )
+                accepted.append((index, row, tables))
+            
+            if accepted:
+                conn.executemany('''
+                    INSERT INTO bookings (customer_name, email, phone, date, time, party_size, special_requests)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', [row for _, row, _ in accepted])
+                
+                conn.executemany('''
+                    INSERT INTO slot_occupancy (date, time, seats_taken)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT (date, time) DO UPDATE
+                    SET seats_taken = seats_taken + excluded.seats_taken
+                ''', [(date, time, seats) for (date, time), seats in deltas.items()])
+                
+                self._save_table_assignments(conn, assignments)
+                self._update_rollups(conn, [(row[3], row[4], row[5], 1) for _, row, _ in accepted])
+                self._append_events(conn, [
+                    (last_id + offset, BOOKING_CREATED, row[3], row[4], row[5], {
+                        "customer_name": row[0], "email": row[1], "phone": row[2],
+                        "special_requests": row[6], "tables": list(tables), "waitlist_id": None
+                    })
+                    for offset, (_, row, tables) in enumerate(accepted, start=1)
+                ], notify=False)
+                
+                for offset, (index, _, tables) in enumerate(accepted, start=1):
+                    results[index] = booking_confirmed(last_id + offset, tables)
+        
+        for date in {date for date, _ in deltas}:
+            self.invalidate_date(date)
+        
+        return results
     
-    def get_booking(self, booking_id):
-        """Retrieve a booking by ID"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
+    def _reserve_seats(self, conn, date, time, party_size):
+        """
+        Add a party to every slot it will occupy if it fits in all of them
         
-        cursor.execute('SELECT * FROM bookings WHERE id = ?', (booking_id,))
-        result = cursor.fetchone()
-        conn.close()
-        
-        if result:
-            return {
-                "id": result[0],
-                "customer_name": result[1],
-                "email": result[2],
-                "phone": result[3],
-                "date": result[4],
-                "time": result[5],
-                "party_size": result[6],
-                "special_requests": result[7],
-                "created_at": result[8],
-                "status": result[9]
-            }
-        return None
+        Must run inside a write transaction: BEGIN IMMEDIATE holds the write
+        lock across the check and the increments, so two concurrent
+        reservations can never both pass the check.
+        
+        Returns:
+            True if the seats were reserved
+        """
+        slots = covered_slots(time, party_size)
+        placeholders = ", ".join("?" * len(slots))
+        occupancy = dict(conn.execute(
+            f'SELECT time, seats_taken FROM slot_occupancy WHERE date = ? AND time IN ({placeholders})',
+            (date, *slots)
+        ).fetchall())
+        
+        if remaining_seats(occupancy, time, party_size, self._capacity()) < party_size:
+            return False
+        
+        self._add_seats(conn, date, time, party_size)
+        return True
     
-    def get_bookings_by_email(self, email):
-        """Get all bookings for an email"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
+    def _add_seats(self, conn, date, time, party_size):
+        """Add a party to every slot it will occupy, without a capacity check"""
+        conn.executemany('''
+            INSERT INTO slot_occupancy (date, time, seats_taken)
+            VALUES (?, ?, ?)
+            ON CONFLICT (date, time) DO UPDATE
+            SET seats_taken = seats_taken + excluded.seats_taken
+        ''', [(date, minutes, party_size) for minutes in covered_slots(time, party_size)])
+    
+    def _release_seats(self, conn, date, time, party_size):
+        """Remove a party from every slot it occupied"""
+        conn.executemany('''
+            UPDATE slot_occupancy SET seats_taken = MAX(seats_taken - ?, 0)
+            WHERE date = ? AND time = ?
+        ''', [(party_size, date, minutes) for minutes in covered_slots(time, party_size)])
+    
+    def _update_rollups(self, conn, changes):
+        """
+        Apply booking changes to the reporting rollups in the caller's transaction
         
-        cursor.execute('SELECT * FROM bookings WHERE email = ? ORDER BY date DESC, time DESC', (email,))
-        results = cursor.fetchall()
-        conn.close()
-        
-        bookings = []
-        for result in results:
-            bookings.append({
-                "id": result[0],
-                "customer_name": result[1],
-                "email": result[2],
-                "phone": result[3],
-                "date": result[4],
-                "time": result[5],
-                "party_size": result[6],
-                "special_requests": result[7],
-                "created_at": result[8],
-                "status": result[9]
-            })
-        
-        return bookings
+        Args:
+            changes: Iterable of (date, time, party_size, sign) where sign is
+                     +1 for a confirmation and -1 for a cancellation
+        """
+        slots = {}
+        party_sizes = {}
+        for date, time, party_size, sign in changes:
+            counters = slots.setdefault((date, time), [0, 0, 0])
+            counters[0] += sign * party_size
+            counters[1] += sign
+            counters[2] += sign < 0
+            party_sizes[(date, party_size)] = party_sizes.get((date, party_size), 0) + sign
+        
+        conn.executemany('''
+            INSERT INTO daily_slot_rollup (date, time, covers, bookings, cancellations)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (date, time) DO UPDATE SET
+                covers = covers + excluded.covers,
+                bookings = bookings + excluded.bookings,
+                cancellations = cancellations + excluded.cancellations
+        ''', [(date, time, *counters) for (date, time), counters in slots.items()])
+        conn.executemany('''
+            INSERT INTO daily_party_size_rollup (date, party_size, bookings)
+            VALUES (?, ?, ?)
+            ON CONFLICT (date, party_size) DO UPDATE SET bookings = bookings + excluded.bookings
+        ''', [(date, party_size, count) for (date, party_size), count in party_sizes.items()])
     
-    def cancel_booking(self, booking_id):
-        """Cancel a booking"""
-        conn = sqlite3.connect(self.db_name)
+    def _save_table_assignments(self, conn, rows):
+        """Persist (booking_id, table_id, date, start_time, end_time) rows"""
+        conn.executemany('''
+            INSERT OR REPLACE INTO table_assignments (booking_id, table_id, date, start_time, end_time)
+            VALUES (?, ?, ?, ?, ?)
+        ''', rows)
+    
+    def _load_table_schedule(self, conn, date):
+        """Fresh TableSchedule for a date read through the given connection"""
+        return TableSchedule(conn.execute('''
+            SELECT booking_id, table_id, start_time, end_time FROM table_assignments
+            WHERE date = ?
+        ''', (str(date),)))
+    
+    def _table_schedule(self, date):
+        """Table schedule for a date, served from the table cache"""
+        def load():
+            with self.pool.connection() as conn:
+                return self._load_table_schedule(conn, date)
+        
+        return self.table_cache.get_or_load(str(date), load)
+    
+    def invalidate_date(self, date):
+        """Drop the cached table schedule for a date and republish its availability"""
+        self.table_cache.invalidate(str(date))
+        if self.snapshot is not None:
+            self._refresh_snapshot(str(date))
+        else:
+            self.availability_cache.invalidate(str(date))
+    
+    def _refresh_snapshot(self, date):
+        """
+        Publish a date's committed seat counts to the shared snapshot
+        
+        Inside a transaction the row is only marked stale, since other
+        processes must never see uncommitted counts. Each attempt loads after
+        our commit and only writes if nobody published in between, so an
+        older load can never overwrite a newer one.
+        """
+        try:
+            if self.pool.in_transaction():
+                self.snapshot.invalidate(date)
+                return
+            for _ in range(3):
+                generation = self.snapshot.row_generation(date)
+                if self.snapshot.store(date, self._load_slot_occupancy(date), expected_generation=generation):
+                    return
+            self.snapshot.invalidate(date)
+        except ValueError:
+            pass
+    
+    def _load_slot_occupancy(self, date):
+        """Seats taken per time slot for a date, read from SQLite"""
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                'SELECT time, seats_taken FROM slot_occupancy WHERE date = ?', (date,)
+            ).fetchall()
+        return {time: seats_taken for time, seats_taken in rows}
+    
+    def _slot_occupancy(self, date):
+        """
+        Seats taken per time slot for a date
+        
+        Served from the shared mmap snapshot when its row is fresh, so
+        other server processes answer without touching SQLite. A stale or
+        missing row is reloaded from SQLite and republished. Without a
+        snapshot the per-process availability cache is used.
+        """
+        if self.snapshot is None:
+            return self.availability_cache.get_or_load(date, lambda: self._load_slot_occupancy(date))
+        
+        try:
+            occupancy = self.snapshot.read(date)
+        except ValueError:
+            # Not a calendar date, so it has no snapshot row
+            return self._load_slot_occupancy(date)
+        if occupancy is None:
+            generation = self.snapshot.row_generation(date)
+            occupancy = self._load_slot_occupancy(date)
+            self.snapshot.store(date, occupancy, expected_generation=generation)
+        return occupancy
+    
+    def get_cache_stats(self):
+        """Hit/miss counters of whichever layer serves seat counts: 'snapshot' or 'cache'"""
+        if self.snapshot is not None:
+            return {**self.snapshot.stats(), "source": "snapshot"}
+        return {**self.availability_cache.stats(), "source": "cache"}
+    
+    def _booking_cursor(self, conn):
+        """Cursor whose rows come back as Booking records"""
         cursor = conn.cursor()
+        cursor.row_factory = booking_row_factory
+        return cursor
+    
+    def get_booking(self, booking_id):
+        """Retrieve a booking by ID, falling through to the archive"""
+        with self.pool.connection() as conn:
+            cursor = self._booking_cursor(conn)
+            booking = cursor.execute(
+                f'SELECT {BOOKING_SELECT} FROM bookings WHERE id = ?', (booking_id,)
+            ).fetchone()
+            if booking is None:
+                booking = cursor.execute(
+                    f'SELECT {BOOKING_SELECT} FROM bookings_archive WHERE id = ?', (booking_id,)
+                ).fetchone()
+            return booking
+    
+    def get_bookings_by_email(self, email):
+        """Get all bookings for an email, including archived ones"""
+        with self.pool.connection() as conn:
+            return self._booking_cursor(conn).execute(f'''
+                SELECT {BOOKING_SELECT} FROM bookings WHERE email = ?
+                UNION ALL
+                SELECT {BOOKING_SELECT} FROM bookings_archive WHERE email = ?
+                ORDER BY date DESC, time DESC
+            ''', (email, email)).fetchall()
+    
+    def cancel_booking(self, booking_id):
+        """
+        Cancel a booking
         
-        cursor.execute('UPDATE bookings SET status = ? WHERE id = ?', ('cancelled', booking_id))
+        Waiting parties that now fit are promoted to bookings in the same
+        transaction; their ids are returned under "promoted".
+        """
+        promoted = []
+        with self.pool.transaction() as conn:
+            booking = conn.execute('''
+                SELECT date, time, party_size, status, customer_name, email, phone
+                FROM bookings WHERE id = ?
+            ''', (booking_id,)).fetchone()
+            
+            if booking:
+                date, time, party_size, status, customer_name, email, phone = booking
+                conn.execute('UPDATE bookings SET status = ? WHERE id = ?', ('cancelled', booking_id))
+                conn.execute('DELETE FROM table_assignments WHERE booking_id = ?', (booking_id,))
+                if status == 'confirmed':
+                    self._release_seats(conn, date, time, party_size)
+                    self._update_rollups(conn, [(date, time, party_size, -1)])
+                    self._append_events(conn, [(booking_id, BOOKING_CANCELLED, date, time, party_size, {
+                        "customer_name": customer_name, "email": email, "phone": phone
+                    })])
+                    promoted = self._promote_from_waitlist(conn, date, time, party_size)
         
-        if cursor.rowcount > 0:
-            conn.commit()
-            conn.close()
-            return {"success": True, "message": f"Booking {booking_id} has been cancelled."}
+        if booking:
+            self.invalidate_date(date)
+            self.job_queue.wake()
+            result = {"success": True, "message": f"Booking {booking_id} has been cancelled."}
+            if promoted:
+                result["promoted"] = promoted
+            return result
         
-        conn.close()
         return {"success": False, "message": "Booking not found."}
     
-    def get_all_bookings(self, date=None):
-        """Get all bookings, optionally filtered by date"""
-        conn = sqlite3.connect(self.db_name)
+    def _promote_from_waitlist(self, conn, date, time, party_size):
+        """Promote waiting parties into the seats a cancelled booking freed"""
+        starts = overlapping_starts(time, party_size)
+        waiting = conn.execute('''
+            SELECT 1 FROM waitlist
+            WHERE date = ? AND time BETWEEN ? AND ? AND status = 'waiting'
+            LIMIT 1
+        ''', (date, starts[0], starts[-1])).fetchone()
+        if waiting is None:
+            return []
         
-        if date:
-            query = 'SELECT * FROM bookings WHERE date = ? ORDER BY time'
-            df = pd.read_sql_query(query, conn, params=(date,))
-        else:
-            query = 'SELECT * FROM bookings ORDER BY date DESC, time DESC LIMIT 100'
-            df = pd.read_sql_query(query, conn)
+        occupancy = dict(conn.execute(
+            'SELECT time, seats_taken FROM slot_occupancy WHERE date = ?', (date,)
+        ).fetchall())
+        schedule = self._load_table_schedule(conn, date)
+        cursor = conn.cursor()
+        cursor.row_factory = waitlist_row_factory
+        
+        def head(start, size):
+            # One seek on the partial idx_waitlist_queue index
+            return cursor.execute(f'''
+                SELECT {WAITLIST_SELECT} FROM waitlist
+                WHERE date = ? AND time = ? AND party_size = ? AND status = 'waiting'
+                ORDER BY id LIMIT 1
+            ''', (date, start, size)).fetchone()
+        
+        def promote(entry, tables):
+            self._add_seats(conn, date, entry.time, entry.party_size)
+            for minutes in covered_slots(entry.time, entry.party_size):
+                occupancy[minutes] = occupancy.get(minutes, 0) + entry.party_size
+            booking_id = self._insert_booking(
+                conn, schedule, tables, entry.customer_name, entry.email, entry.phone,
+                date, entry.time, entry.party_size, entry.special_requests, waitlist_id=entry.id
+            )
+            conn.execute(
+                "UPDATE waitlist SET status = 'promoted', booking_id = ? WHERE id = ?", (booking_id, entry.id)
+            )
+            return booking_id
+        
+        return self._promote_waitlist(occupancy, schedule, starts, head, promote)
+    
+    def join_waitlist(self, customer_name, email, phone, date, time, party_size, special_requests=""):
+        """
+        Add a party to the waitlist for a slot
         
-        conn.close()
+        A guest waits at most once per slot: a repeat request (a rerun or
+        double-click) returns the entry already waiting instead of queueing
+        a second party that would later be promoted into a second booking.
+        """
+        time, rejection = self._validate_request(time, party_size)
+        if rejection:
+            return rejection
+        if self.check_availability(date, time, party_size):
+            return booking_rejected(SLOT_OPEN_MESSAGE)
+        
+        with self.pool.transaction() as conn:
+            existing = conn.execute('''
+                SELECT id FROM waitlist WHERE email = ? AND date = ? AND time = ? AND status = 'waiting'
+            ''', (email, str(date), time)).fetchone()
+            if existing:
+                return waitlist_joined(existing[0], date, time, already_waiting=True)
+            
+            cursor = conn.execute('''
+                INSERT INTO waitlist (customer_name, email, phone, date, time, party_size, special_requests)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (customer_name, email, phone, str(date), time, party_size, special_requests))
+        
+        return waitlist_joined(cursor.lastrowid, date, time)
+    
+    def leave_waitlist(self, waitlist_id):
+        """Withdraw a waiting party"""
+        with self.pool.transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE waitlist SET status = 'withdrawn' WHERE id = ? AND status = 'waiting'", (waitlist_id,)
+            )
+        
+        if cursor.rowcount:
+            return {"success": True, "message": f"Waitlist entry {waitlist_id} has been withdrawn."}
+        return {"success": False, "message": "Waitlist entry not found."}
+    
+    def get_waitlist(self, date, time=None):
+        """Waiting entries for a date, optionally for one slot"""
+        query = f"SELECT {WAITLIST_SELECT} FROM waitlist WHERE date = ? AND status = 'waiting'"
+        params = [str(date)]
+        if time is not None:
+            query += ' AND time = ?'
+            params.append(slot_to_minutes(time))
+        
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = waitlist_row_factory
+            return cursor.execute(query + ' ORDER BY time, id', params).fetchall()
+    
+    def get_all_bookings(self, date=None, limit=100):
+        """
+        Get bookings as a DataFrame, optionally filtered by date
+        
+        Without a date only the most recent `limit` bookings are returned;
+        use iter_bookings() or get_bookings_page() to walk the full history.
+        """
+        with self.pool.connection() as conn:
+            if date:
+                query = 'SELECT * FROM bookings WHERE date = ? ORDER BY time'
+                df = pd.read_sql_query(query, conn, params=(date,))
+            else:
+                query = 'SELECT * FROM bookings ORDER BY date DESC, time DESC LIMIT ?'
+                df = pd.read_sql_query(query, conn, params=(limit,))
+        
+        df['time'] = df['time'].map(minutes_to_slot)
         return df
     
-    def get_available_slots(self, date):
-        """Get available time slots for a date"""
-        from config import BOOKING_SLOTS, RESTAURANT_INFO
+    def get_bookings_page(self, after=None, limit=50, date=None, columns=None, descending=False):
+        """
+        Fetch one page of bookings using keyset pagination on (date, time, id)
         
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
+        Args:
+            after: Cursor returned by the previous page (None for the first page)
+            limit: Maximum records per page
+            date: Only include bookings on this date
+            columns: Booking columns to select (defaults to all)
+            descending: Newest first
+        
+        Returns:
+            (records, next_cursor) where records are named tuples and
+            next_cursor is None once the last page has been read
+        """
+        columns = check_booking_columns(columns)
+        selected = columns + tuple(c for c in KEYSET_COLUMNS if c not in columns)
+        key_positions = [selected.index(c) for c in KEYSET_COLUMNS]
+        record_type = booking_record_type(columns)
+        
+        conditions = []
+        params = []
+        if date:
+            conditions.append('date = ?')
+            params.append(str(date))
+        if after:
+            operator = '<' if descending else '>'
+            if date:
+                conditions.append(f"(time, id) {operator} (?, ?)")
+                params.extend(after[1:])
+            else:
+                conditions.append(f"(date, time, id) {operator} (?, ?, ?)")
+                params.extend(after)
+        
+        direction = 'DESC' if descending else 'ASC'
+        query = f"SELECT {', '.join(selected)} FROM bookings"
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += f' ORDER BY date {direction}, time {direction}, id {direction} LIMIT ?'
+        params.append(limit)
+        
+        with self.pool.connection() as conn:
+            rows = conn.execute(query, params).fetchall()
         
-        cursor.execute('''
-            SELECT time, SUM(party_size) as total_guests
-            FROM bookings
-            WHERE date = ? AND status = 'confirmed'
-            GROUP BY time
-        ''', (date,))
+        width = len(columns)
+        records = [record_type._make(row[:width]) for row in rows]
+        next_cursor = None
+        if len(rows) == limit:
+            last = rows[-1]
+            next_cursor = tuple(last[i] for i in key_positions)
         
-        booked_slots = {row[0]: row[1] for row in cursor.fetchall()}
-        conn.close()
+        return records, next_cursor
+    
+    def iter_booking_frames(self, chunk_size=10000, **kwargs):
+        """
+        Stream bookings as pandas DataFrames of at most chunk_size rows
+        
+        Accepts the same filters as iter_bookings().
+        """
+        columns = tuple(kwargs.pop("columns", None) or BOOKING_COLUMNS)
+        chunk = []
+        for record in self.iter_bookings(columns=columns, batch_size=chunk_size, **kwargs):
+            chunk.append(record)
+            if len(chunk) == chunk_size:
+                yield pd.DataFrame.from_records(chunk, columns=columns)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame.from_records(chunk, columns=columns)
+    
+    def get_bookings_in_window(self, date, start_time, end_time):
+        """
+        Get bookings on a date whose slot falls between two times (inclusive)
         
-        capacity = RESTAURANT_INFO.get('capacity', 100)
-        available_slots = []
+        Args:
+            start_time / end_time: Minutes or slot labels, e.g. '6:00 PM', '8:00 PM'
+        """
+        with self.pool.connection() as conn:
+            return self._booking_cursor(conn).execute(f'''
+                SELECT {BOOKING_SELECT} FROM bookings
+                WHERE date = ? AND time BETWEEN ? AND ?
+                ORDER BY time, id
+            ''', (str(date), slot_to_minutes(start_time), slot_to_minutes(end_time))).fetchall()
+    
+    def _occupancy_rows(self, dates):
+        """Occupied slots for a contiguous date range in one query"""
+        with self.pool.connection() as conn:
+            return conn.execute('''
+                SELECT date, time, seats_taken FROM slot_occupancy
+                WHERE date BETWEEN ? AND ?
+            ''', (dates[0], dates[-1])).fetchall()
+    
+    def archive_bookings(self, before=None, batch_size=ARCHIVE_BATCH_SIZE, max_batches=None):
+        """
+        Move bookings dated before a cutoff into bookings_archive
         
-        for slot in BOOKING_SLOTS:
-            current_bookings = booked_slots.get(slot, 0)
-            remaining_capacity = capacity - current_bookings
+        Each batch is its own short write transaction, so live reservations
+        are never blocked for long. Seats held by archived confirmed
+        bookings are released so the occupancy counters stay reconciled.
+        
+        Args:
+            before: Cutoff date (defaults to ARCHIVE_HORIZON_DAYS ago)
+            batch_size: Rows moved per transaction
+            max_batches: Stop after this many batches (None for all)
+        
+        Returns:
+            Number of bookings archived
+        """
+        if before is None:
+            before = datetime.now().date() - timedelta(days=ARCHIVE_HORIZON_DAYS)
+        before = str(before)
+        
+        archived = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            with self.pool.transaction() as conn:
+                rows = conn.execute(f'''
+                    SELECT {BOOKING_SELECT} FROM bookings
+                    WHERE date < ?
+                    ORDER BY date, time, id
+                    LIMIT ?
+                ''', (before, batch_size)).fetchall()
+                if not rows:
+                    break
+                
+                conn.executemany(f'''
+                    INSERT OR REPLACE INTO bookings_archive ({BOOKING_SELECT})
+                    VALUES ({", ".join("?" * len(BOOKING_COLUMNS))})
+                ''', rows)
+                for row in rows:
+                    booking = Booking._make(row)
+                    if booking.status == 'confirmed':
+                        self._release_seats(conn, booking.date, booking.time, booking.party_size)
+                conn.executemany('DELETE FROM bookings WHERE id = ?', [(row[0],) for row in rows])
+                conn.executemany('DELETE FROM table_assignments WHERE booking_id = ?', [(row[0],) for row in rows])
+                conn.execute(
+                    'DELETE FROM slot_occupancy WHERE date < ? AND seats_taken <= 0', (before,)
+                )
             
-            if remaining_capacity > 0:
-                available_slots.append({
-                    "time": slot,
-                    "available_seats": remaining_capacity
-                })
+            for date in {Booking._make(row).date for row in rows}:
+                self.invalidate_date(date)
+            archived += len(rows)
+            batches += 1
+        
+        return archived
+    
+    def verify_occupancy(self):
+        """
+        Compare the occupancy counters against the raw bookings rows
+        
+        Returns:
+            List of dicts for every slot whose counter disagrees
+        """
+        with self.pool.connection() as conn:
+            recorded = {
+                (date, time): seats_taken
+                for date, time, seats_taken in conn.execute(
+                    'SELECT date, time, seats_taken FROM slot_occupancy WHERE seats_taken != 0'
+                )
+            }
+            expected = {
+                (date, time): seats
+                for date, time, seats in occupancy_by_date(conn.execute(CONFIRMED_BY_DATE))
+            }
+        
+        return [
+            {"date": date, "time": time, "expected": expected.get((date, time), 0),
+             "recorded": recorded.get((date, time), 0)}
+            for date, time in sorted(expected.keys() | recorded.keys())
+            if expected.get((date, time), 0) != recorded.get((date, time), 0)
+        ]
+    
+    def rebuild_occupancy(self):
+        """Recompute every occupancy counter from the bookings table"""
+        with self.pool.transaction() as conn:
+            slots = rebuild_slot_occupancy(conn)
+        
+        if self.snapshot is not None:
+            self.snapshot.clear()
+        else:
+            self.availability_cache.clear()
+        return slots
+
+    def _rollup_rows(self, start_date, end_date):
+        """Slot rollups for a date range; never touches the bookings table"""
+        with self.pool.connection() as conn:
+            return conn.execute('''
+                SELECT date, time, covers, bookings, cancellations FROM daily_slot_rollup
+                WHERE date BETWEEN ? AND ?
+            ''', (str(start_date), str(end_date))).fetchall()
+    
+    def _party_size_rows(self, start_date, end_date):
+        """Party-size rollups for a date range"""
+        with self.pool.connection() as conn:
+            return conn.execute('''
+                SELECT date, party_size, bookings FROM daily_party_size_rollup
+                WHERE date BETWEEN ? AND ?
+            ''', (str(start_date), str(end_date))).fetchall()
+    
+    def rebuild_rollups(self, since=None):
+        """
+        Catch-up job: recompute the reporting rollups from the bookings
+        
+        Use after restoring a backup or editing bookings outside the app.
         
-        return available_slots
+        Returns:
+            Number of slot rollup rows written
+        """
+        with self.pool.transaction() as conn:
+            return rebuild_rollups(conn, since)
+    
+    def read_events(self, after_id=0, limit=100):
+        """Booking events with id > after_id, oldest first"""
+        with self.pool.connection() as conn:
+            rows = conn.execute(f'''
+                SELECT {", ".join(EVENT_COLUMNS)} FROM booking_events
+                WHERE id > ? ORDER BY id LIMIT ?
+            ''', (after_id, limit)).fetchall()
+        return [decode_event(row) for row in rows]
+    
+    def get_consumer_offset(self, consumer):
+        """Last event id committed by a named consumer (0 if none)"""
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                'SELECT last_event_id FROM consumer_offsets WHERE consumer = ?', (consumer,)
+            ).fetchone()
+        return row[0] if row else 0
+    
+    def commit_consumer_offset(self, consumer, event_id):
+        """Durably advance a named consumer's offset; offsets never move backwards"""
+        with self.pool.transaction() as conn:
+            conn.execute('''
+                INSERT INTO consumer_offsets (consumer, last_event_id, updated_at)
+                VALUES (?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT (consumer) DO UPDATE SET
+                    last_event_id = MAX(last_event_id, excluded.last_event_id),
+                    updated_at = excluded.updated_at
+            ''', (consumer, event_id))
+    
+    def get_booking_tables(self, booking_id):
+        """Table ids assigned to a booking"""
+        with self.pool.connection() as conn:
+            return [row[0] for row in conn.execute(
+                'SELECT table_id FROM table_assignments WHERE booking_id = ? ORDER BY table_id',
+                (booking_id,)
+            )]
+    
+    def repack_tables(self, date):
+        """
+        Re-assign a day's confirmed bookings to tables from scratch
+        
+        Parties are re-seated largest first on their tightest options, which
+        frees the big tables and combinations for later large parties. The
+        new plan is only saved if it seats at least as many parties as the
+        current one.
+        
+        Returns:
+            dict with success, message and the ids of unseated bookings
+        """
+        date = str(date)
+        with self.pool.transaction() as conn:
+            bookings = conn.execute('''
+                SELECT id, time, party_size FROM bookings
+                WHERE date = ? AND status = 'confirmed'
+            ''', (date,)).fetchall()
+            seated = conn.execute(
+                'SELECT COUNT(DISTINCT booking_id) FROM table_assignments WHERE date = ?', (date,)
+            ).fetchone()[0]
+            
+            schedule, unseated = repack(bookings)
+            if len(bookings) - len(unseated) < seated:
+                return {"success": False, "message": "Repacking would leave more parties without a table."}
+            
+            conn.execute('DELETE FROM table_assignments WHERE date = ?', (date,))
+            self._save_table_assignments(conn, [
+                (booking_id, table_id, date, start, end)
+                for booking_id, table_id, start, end in schedule.assignments()
+            ])
+        
+        self.invalidate_date(date)
+        return {"success": True, "message": f"Repacked {len(bookings)} booking(s) on {date}.",
+                "unseated": unseated}
+
+def create_booking_store(backend=BOOKING_BACKEND, **kwargs):
+    """
+    Create the configured booking storage engine
+    
+    Args:
+        backend: 'sqlite' (default) or 'memory'
+    """
+    if backend == "sqlite":
+        return BookingSystem(**kwargs)
+    if backend == "memory":
+        return InMemoryBookingStore()
+    raise ValueError(f"Unknown booking backend: {backend!r}")
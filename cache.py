@@ -0,0 +1,101 @@
+"""
+Cache - Thread-safe LRU Cache with TTL and Hit/Miss Counters
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+class LRUCache:
+    """
+    Bounded least-recently-used cache with optional per-entry TTL.
+
+    Loads go through get_or_load(), which refuses to store a value if an
+    invalidation happened while the loader was running, so a slow reader
+    can never put pre-write data back into the cache.
+    """
+
+    def __init__(self, maxsize=128, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = 0
+
+    def get(self, key, default=MISSING):
+        """Return the cached value for key, counting a hit or a miss"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, version=None):
+        """
+        Store a value
+
+        Args:
+            version: Cache version observed before the value was computed;
+                     the store is skipped if an invalidation happened since
+        """
+        with self._lock:
+            if version is not None and version != self._version:
+                return
+            expires_at = time.monotonic() + self.ttl if self.ttl else None
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_load(self, key, loader):
+        """Return the cached value, calling loader() and caching on a miss"""
+        value = self.get(key)
+        if value is not MISSING:
+            return value
+        version = self._version
+        value = loader()
+        self.set(key, value, version=version)
+        return value
+
+    def invalidate(self, key):
+        """Drop a single entry"""
+        with self._lock:
+            self._version += 1
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._version += 1
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        """True if key is cached and not expired; does not count a hit or refresh recency"""
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and (entry[0] is None or entry[0] > time.monotonic())
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "size": len(self._data),
+                "maxsize": self.maxsize
+            }
@@ -0,0 +1,91 @@
+"""
+Capacity Engine - Dining-duration-aware Slot Occupancy
+"""
+
+from bisect import bisect_left, bisect_right
+from itertools import groupby
+from config import DINING_DURATIONS
+from time_slots import SLOT_MINUTES
+
+def dining_duration(party_size):
+    """Minutes a party of this size is expected to hold its table"""
+    for max_party_size, minutes in DINING_DURATIONS:
+        if party_size <= max_party_size:
+            return minutes
+    return DINING_DURATIONS[-1][1]
+
+def covered_slot_range(start, party_size):
+    """
+    Index range into SLOT_MINUTES of the slots a booking occupies
+
+    A party seated at `start` occupies every configured slot that begins
+    before it is expected to leave.
+    """
+    first = bisect_left(SLOT_MINUTES, start)
+    last = bisect_left(SLOT_MINUTES, start + dining_duration(party_size))
+    return first, max(last, first + 1)
+
+def covered_slots(start, party_size):
+    """Slot minutes occupied by a booking starting at `start`"""
+    first, last = covered_slot_range(start, party_size)
+    return SLOT_MINUTES[first:last]
+
+def overlapping_starts(start, party_size):
+    """
+    Start slots whose stays can overlap the slots a booking covers
+
+    Used to find which waiting parties may fit once the booking is gone.
+    """
+    slots = covered_slots(start, party_size)
+    longest = max(minutes for _, minutes in DINING_DURATIONS)
+    first = bisect_right(SLOT_MINUTES, slots[0] - longest)
+    last = bisect_right(SLOT_MINUTES, slots[-1])
+    return SLOT_MINUTES[first:last]
+
+def day_occupancy(bookings):
+    """
+    Seats occupied in every slot of one day
+
+    Each booking adds its party at the first covered slot and removes it
+    after the last one in a difference array; a single prefix sum then
+    yields the occupancy of all slots, so the cost is O(slots + bookings).
+
+    Args:
+        bookings: Iterable of (start_minutes, party_size)
+
+    Returns:
+        dict of slot minutes -> seats occupied (occupied slots only)
+    """
+    diff = [0] * (len(SLOT_MINUTES) + 1)
+    for start, party_size in bookings:
+        first, last = covered_slot_range(start, party_size)
+        diff[first] += party_size
+        diff[last] -= party_size
+
+    occupancy = {}
+    running = 0
+    for index, minutes in enumerate(SLOT_MINUTES):
+        running += diff[index]
+        if running:
+            occupancy[minutes] = running
+    return occupancy
+
+def occupancy_by_date(rows):
+    """
+    Occupancy for many days from bookings sorted by date
+
+    Args:
+        rows: Iterable of (date, start_minutes, party_size) ordered by date
+
+    Yields:
+        (date, slot_minutes, seats_occupied)
+    """
+    for date, day_rows in groupby(rows, key=lambda row: row[0]):
+        occupancy = day_occupancy((start, party_size) for _, start, party_size in day_rows)
+        for minutes, seats in occupancy.items():
+            yield date, minutes, seats
+
+def remaining_seats(occupancy, start, party_size, capacity):
+    """Seats free for the whole stay of a party starting at `start`"""
+    occupied = max((occupancy.get(minutes, 0) for minutes in covered_slots(start, party_size)), default=0)
+    return capacity - occupied
@@ -2,31 +2,28 @@
 Chatbot Engine - AI-Powered Restaurant Assistant using Google Gemini
 """
 
+from collections import deque
+import hashlib
+import json
+import threading
+import time
 import google.generativeai as genai
-from config import GEMINI_API_KEY, RESTAURANT_INFO
-from restaurant_data import get_full_menu_text, SPECIAL_OFFERS, DIETARY_INFO, CHEF_RECOMMENDATIONS
+from answer_cache import AnswerCache, is_cacheable
+from config import GEMINI_API_KEY, GEMINI_MODEL, RESTAURANT_INFO, CHAT_SUMMARY_MAX_WORDS
+from conversation import ConversationWindow
+from intent_router import IntentRouter
+from restaurant_data import MENU_DATA, get_full_menu_text, SPECIAL_OFFERS, DIETARY_INFO, CHEF_RECOMMENDATIONS
 
-class RestaurantChatbot:
-    def __init__(self):
-        # Configure Gemini API
-        genai.configure(api_key=GEMINI_API_KEY)
-        
-        # Initialize the model - using gemini-2.5-flash (confirmed available)
-        self.model = genai.GenerativeModel('models/gemini-2.5-flash')
-        
-        # Conversation history
-        self.chat_history = []
-        
-        # System context
-        self.system_context = self._build_system_context()
-        
-        # Start chat session
-        self.chat = self.model.start_chat(history=[])
+def context_fingerprint():
+    """Content hash of every piece of restaurant data the system context is built from"""
+    data = [MENU_DATA, SPECIAL_OFFERS, DIETARY_INFO, CHEF_RECOMMENDATIONS, RESTAURANT_INFO]
+    encoded = json.dumps(data, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+def build_system_context():
+    """Build comprehensive system context for the AI"""
     
-    def _build_system_context(self):
-        """Build comprehensive system context for the AI"""
-        
-        context = f"""You are an AI assistant for {RESTAURANT_INFO['name']}, a premium {RESTAURANT_INFO['cuisine_type']} restaurant.
+    parts = [f"""You are an AI assistant for {RESTAURANT_INFO['name']}, a premium {RESTAURANT_INFO['cuisine_type']} restaurant.
 
 RESTAURANT INFORMATION:
 - Name: {RESTAURANT_INFO['name']}
@@ -35,34 +32,34 @@ RESTAURANT INFORMATION:
 - Email: {RESTAURANT_INFO['email']}
 
 OPERATING HOURS:
-"""
-        for day, hours in RESTAURANT_INFO['hours'].items():
-            context += f"- {day}: {hours}\n"
-        
-        context += f"\nCAPACITY: {RESTAURANT_INFO['capacity']} guests\n\n"
-        
-        # Add menu
-        context += get_full_menu_text()
-        
-        # Add special offers
-        context += "\n\nSPECIAL OFFERS:\n"
-        for offer in SPECIAL_OFFERS:
-            context += f"\n{offer['name']}: {offer['description']}\n"
-            context += f"Time: {offer['time']}\n"
-            if 'price' in offer:
-                context += f"Price: {offer['price']}\n"
-        
-        # Add dietary info
-        context += "\n\nDIETARY INFORMATION:\n"
-        for key, value in DIETARY_INFO.items():
-            context += f"- {key.title()}: {value}\n"
-        
-        # Add chef recommendations
-        context += "\n\nCHEF'S RECOMMENDATIONS:\n"
-        for rec in CHEF_RECOMMENDATIONS:
-            context += f"- {rec}\n"
-        
-        context += """
+"""]
+    for day, hours in RESTAURANT_INFO['hours'].items():
+        parts.append(f"- {day}: {hours}\n")
+    
+    parts.append(f"\nCAPACITY: {RESTAURANT_INFO['capacity']} guests\n\n")
+    
+    # Add menu
+    parts.append(get_full_menu_text())
+    
+    # Add special offers
+    parts.append("\n\nSPECIAL OFFERS:\n")
+    for offer in SPECIAL_OFFERS:
+        parts.append(f"\n{offer['name']}: {offer['description']}\n")
+        parts.append(f"Time: {offer['time']}\n")
+        if 'price' in offer:
+            parts.append(f"Price: {offer['price']}\n")
+    
+    # Add dietary info
+    parts.append("\n\nDIETARY INFORMATION:\n")
+    for key, value in DIETARY_INFO.items():
+        parts.append(f"- {key.title()}: {value}\n")
+    
+    # Add chef recommendations
+    parts.append("\n\nCHEF'S RECOMMENDATIONS:\n")
+    for rec in CHEF_RECOMMENDATIONS:
+        parts.append(f"- {rec}\n")
+    
+    parts.append("""
 
 YOUR ROLE:
 You are a friendly, knowledgeable, and professional restaurant assistant. Your responsibilities include:
@@ -83,9 +80,161 @@ GUIDELINES:
 - Always prioritize customer satisfaction
 
 Remember: You represent a premium dining establishment. Maintain a professional yet friendly tone.
-"""
+""")
+    
+    return "".join(parts)
+
+# One system context per process, shared by every session and rebuilt only
+# when the restaurant data it was built from changes
+_context = None
+_context_lock = threading.Lock()
+
+def get_system_context():
+    """
+    Get the process-wide system context
+    
+    Returns:
+        (fingerprint, context text, model configured with it as system instruction)
+    """
+    global _context
+    fingerprint = context_fingerprint()
+    with _context_lock:
+        if _context is None or _context[0] != fingerprint:
+            genai.configure(api_key=GEMINI_API_KEY)
+            text = build_system_context()
+            model = genai.GenerativeModel(GEMINI_MODEL, system_instruction=text)
+            _context = (fingerprint, text, model)
+        return _context
+
+SUMMARY_INSTRUCTION = f"""Summarize this conversation between a restaurant guest and the restaurant's assistant in at most {CHAT_SUMMARY_MAX_WORDS} words.
+Keep every fact the assistant may need later: the guest's name, party size, dates and times, dietary needs
+and allergies, preferences, dishes discussed and any open questions. Fold in the earlier summary if there is one.
+Reply with the summary only."""
+
+# Plain model without the restaurant context, for summarizing old turns
+_summary_model = None
+_summary_model_lock = threading.Lock()
+
+def summarize_conversation(summary, messages):
+    """Running summary of a conversation: the previous summary plus older messages"""
+    global _summary_model
+    with _summary_model_lock:
+        if _summary_model is None:
+            genai.configure(api_key=GEMINI_API_KEY)
+            _summary_model = genai.GenerativeModel(GEMINI_MODEL, system_instruction=SUMMARY_INSTRUCTION)
+    
+    transcript = "\n".join(
+        f"{'Guest' if message['role'] == 'user' else 'Assistant'}: {message['content']}" for message in messages
+    )
+    prompt = f"Earlier summary: {summary}\n\n{transcript}" if summary else transcript
+    return _summary_model.generate_content(prompt).text.strip()
+
+class ResponseMetrics:
+    """
+    Time-to-first-token and total latency of recent model responses, across all sessions
+    
+    Answers served by the intent router or the answer cache are counted
+    and timed separately: they take microseconds, and mixed into the model
+    latencies they would drag the percentiles far below what a guest
+    waiting on Gemini actually sees.
+    """
+    
+    def __init__(self, window=1000):
+        self.responses = 0
+        self.errors = 0
+        self.compactions = 0
+        self.local_answers = 0
+        self.cached_answers = 0
+        self._first_token = deque(maxlen=window)
+        self._total = deque(maxlen=window)
+        self._instant = deque(maxlen=window)
+        self._prompt_tokens = deque(maxlen=window)
+        self._lock = threading.Lock()
+    
+    def record(self, first_token, total):
+        with self._lock:
+            self.responses += 1
+            self._first_token.append(first_token)
+            self._total.append(total)
+    
+    def record_instant(self, source, elapsed):
+        """An answer served without the model by the intent router ("local") or the answer cache ("cached")"""
+        with self._lock:
+            if source == "local":
+                self.local_answers += 1
+            else:
+                self.cached_answers += 1
+            self._instant.append(elapsed)
+    
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+    
+    def record_prompt(self, tokens):
+        """Prompt size of one message sent to the model"""
+        with self._lock:
+            self._prompt_tokens.append(tokens)
+    
+    def record_compaction(self):
+        with self._lock:
+            self.compactions += 1
+    
+    def stats(self):
+        """
+        Latency percentiles in seconds and prompt sizes in tokens
+        
+        Returns:
+            dict with model response/error/compaction counts, p50/p95 of
+            time to first token, of total response time and of prompt tokens
+            per model message, and the count and p50/p95 latency of answers
+            served locally or from the cache (None before any response)
+        """
+        with self._lock:
+            first_token, total = sorted(self._first_token), sorted(self._total)
+            prompt_tokens, instant = sorted(self._prompt_tokens), sorted(self._instant)
+            responses, errors, compactions = self.responses, self.errors, self.compactions
+            local_answers, cached_answers = self.local_answers, self.cached_answers
+        
+        def percentile(values, p):
+            return values[min(int(p * len(values)), len(values) - 1)] if values else None
         
-        return context
+        return {
+            "responses": responses,
+            "errors": errors,
+            "ttft_p50": percentile(first_token, 0.50),
+            "ttft_p95": percentile(first_token, 0.95),
+            "total_p50": percentile(total, 0.50),
+            "total_p95": percentile(total, 0.95),
+            "prompt_tokens_p50": percentile(prompt_tokens, 0.50),
+            "prompt_tokens_p95": percentile(prompt_tokens, 0.95),
+            "prompt_tokens_max": prompt_tokens[-1] if prompt_tokens else None,
+            "compactions": compactions,
+            "local_answers": local_answers,
+            "cached_answers": cached_answers,
+            "instant_p50": percentile(instant, 0.50),
+            "instant_p95": percentile(instant, 0.95)
+        }
+
+response_metrics = ResponseMetrics()
+
+# First-turn answers shared by every session in the process
+answer_cache = AnswerCache()
+
+# Hours, address, prices, dietary and popular-dish questions answered without the model
+intent_router = IntentRouter()
+
+class RestaurantChatbot:
+    def __init__(self):
+        # Shared system context and the model that carries it as system instruction
+        self.context_fingerprint, self.system_context, self.model = get_system_context()
+        
+        # Conversation history: recent turns verbatim, older ones summarized
+        self.memory = ConversationWindow(summarize_conversation)
+        self.chat_history = self.memory.messages
+        self._compacted = threading.Event()  # set once the chat session must be rebuilt from memory
+        
+        # Start chat session
+        self.chat = self.model.start_chat(history=[])
     
     def get_response(self, user_message):
         """
@@ -97,39 +246,192 @@ Remember: You represent a premium dining establishment. Maintain a professional
         Returns:
             AI-generated response
         """
+        self._apply_compaction()
+        local = self._local_answer(user_message)
+        if local is not None:
+            return local
+        
+        cacheable = self._is_cacheable(user_message)
+        if cacheable:
+            cached = self._cached_answer(user_message)
+            if cached is not None:
+                return cached
+        
         try:
-            # For the first message, include system context
-            if len(self.chat_history) == 0:
-                full_message = f"{self.system_context}\n\nCustomer: {user_message}"
-            else:
-                full_message = user_message
-            
-            # Get response from Gemini
-            response = self.chat.send_message(full_message)
+            estimated_tokens = self.memory.prompt_tokens(user_message, self.system_context)
+            started = time.perf_counter()
+            # Get response from Gemini; the system context travels as system instruction
+            response = self.chat.send_message(user_message)
             ai_response = response.text
+            elapsed = time.perf_counter() - started
+            response_metrics.record(elapsed, elapsed)
+            self._record_prompt(response, estimated_tokens)
             
-            # Store in history
-            self.chat_history.append({
-                "role": "user",
-                "content": user_message
-            })
-            self.chat_history.append({
-                "role": "assistant",
-                "content": ai_response
-            })
-            
+            self._remember(user_message, ai_response)
+            if cacheable:
+                answer_cache.set(user_message, ai_response, self.context_fingerprint)
             return ai_response
             
         except Exception as e:
+            response_metrics.record_error()
             error_message = f"I apologize, but I'm having trouble processing your request. Error: {str(e)}"
             return error_message
     
+    def get_response_stream(self, user_message):
+        """
+        Stream the AI response to a user message as it is generated
+        
+        Args:
+            user_message: User's input message
+        
+        Yields:
+            Text chunks; the complete answer is added to the chat history
+            once the stream finishes. A stream that fails or is abandoned
+            part-way is rewound out of the chat session, so the next
+            message does not trip over a half-received turn.
+        """
+        self._apply_compaction()
+        local = self._local_answer(user_message)
+        if local is not None:
+            yield local
+            return
+        
+        cacheable = self._is_cacheable(user_message)
+        if cacheable:
+            cached = self._cached_answer(user_message)
+            if cached is not None:
+                yield cached
+                return
+        
+        estimated_tokens = self.memory.prompt_tokens(user_message, self.system_context)
+        started = time.perf_counter()
+        first_token = None
+        chunks = []
+        response = None
+        completed = False
+        try:
+            try:
+                response = self.chat.send_message(user_message, stream=True)
+                for chunk in response:
+                    try:
+                        text = chunk.text
+                    except ValueError:
+                        # Chunks without text parts (e.g. the final finish-reason chunk)
+                        continue
+                    if not text:
+                        continue
+                    if first_token is None:
+                        first_token = time.perf_counter() - started
+                    chunks.append(text)
+                    yield text
+            except Exception as e:
+                response_metrics.record_error()
+                yield ("\n\n" if chunks else "") + f"I apologize, but I'm having trouble processing your request. Error: {str(e)}"
+                return
+            completed = True
+        finally:
+            # Runs on errors and on GeneratorExit when the caller stops reading
+            if not completed and response is not None:
+                self._rewind_unfinished()
+        
+        total = time.perf_counter() - started
+        response_metrics.record(total if first_token is None else first_token, total)
+        self._record_prompt(response, estimated_tokens)
+        ai_response = "".join(chunks)
+        self._remember(user_message, ai_response)
+        if cacheable and ai_response:
+            answer_cache.set(user_message, ai_response, self.context_fingerprint)
+    
+    def _rewind_unfinished(self):
+        """Drop the exchange of a stream that did not finish from the chat session"""
+        try:
+            self.chat.rewind()
+        except Exception:
+            # Nothing usable to rewind; start over from the remembered conversation
+            self.chat = self.model.start_chat(history=self.memory.chat_history())
+    
+    def _record_prompt(self, response, estimated_tokens):
+        """Prompt size as counted by the API, or our estimate if the response has no usage data"""
+        usage = getattr(response, "usage_metadata", None)
+        response_metrics.record_prompt(getattr(usage, "prompt_token_count", 0) or estimated_tokens)
+    
+    def _is_cacheable(self, user_message):
+        """Only an opening question can be answered without the conversation so far"""
+        return not self.chat_history and is_cacheable(user_message)
+    
+    def _local_answer(self, user_message):
+        """
+        Answer a structured question (hours, prices, ...) from restaurant data
+        
+        Returns:
+            The answer, or None if the message needs the model
+        """
+        started = time.perf_counter()
+        answer = intent_router.route(user_message)
+        if answer is not None:
+            self._answered_without_model(user_message, answer, started, "local")
+        return answer
+    
+    def _cached_answer(self, user_message):
+        """
+        Answer a first-turn question from the shared cache
+        
+        Returns:
+            The cached answer, or None on a miss
+        """
+        started = time.perf_counter()
+        answer = answer_cache.get(user_message, self.context_fingerprint)
+        if answer is not None:
+            self._answered_without_model(user_message, answer, started, "cached")
+        return answer
+    
+    def _answered_without_model(self, user_message, answer, started, source):
+        """Replay an exchange into the chat session so follow-up questions still see it"""
+        exchange = [
+            {"role": "user", "parts": [user_message]},
+            {"role": "model", "parts": [answer]}
+        ]
+        try:
+            self.chat.history = [*self.chat.history, *exchange]
+        except Exception:
+            # The session's history is unreadable (e.g. a response that was
+            # blocked or never fully received); rebuild it from our own record
+            self.chat = self.model.start_chat(history=[*self.memory.chat_history(), *exchange])
+        response_metrics.record_instant(source, time.perf_counter() - started)
+        self._remember(user_message, answer)
+    
+    def _remember(self, user_message, ai_response):
+        """
+        Store one exchange in history
+
+        Once the history outgrows its budget the older turns are summarized
+        on a background thread, so the reply that triggered it is not held
+        up by a second model call; the chat session picks up the compacted
+        history before the next message.
+        """
+        self.memory.add(user_message, ai_response)
+        self.memory.compact_in_background(self._on_compacted)
+    
+    def _on_compacted(self):
+        response_metrics.record_compaction()
+        self._compacted.set()
+    
+    def _apply_compaction(self):
+        """Rebuild the chat session from a window compacted since the last message"""
+        if self._compacted.is_set():
+            self._compacted.clear()
+            # The session resends its whole history each turn, so rebuild it from the compacted window
+            self.chat = self.model.start_chat(history=self.memory.chat_history())
+    
     def reset_conversation(self):
         """Reset the conversation history"""
-        self.chat_history = []
+        self.memory.clear()
+        self._compacted.clear()
+        # Pick up a rebuilt context if the restaurant data changed
+        self.context_fingerprint, self.system_context, self.model = get_system_context()
         self.chat = self.model.start_chat(history=[])
         return "Conversation reset. How can I help you today?"
     
     def get_chat_history(self):
-        """Get the conversation history"""
+        """Get the recent conversation history (older turns live in self.memory.summary)"""
         return self.chat_history
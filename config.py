@@ -6,11 +6,15 @@ load_dotenv()
 
 # API Configuration
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "models/gemini-2.5-flash")
 
 # Application Settings
 APP_TITLE = "🍽️ Bella Vista Restaurant"
 APP_SUBTITLE = "Your AI-Powered Dining Assistant"
 
+# Admin Analytics page: hidden unless a password is set, and asks for it before showing anything
+ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "")
+
 # Restaurant Information
 RESTAURANT_INFO = {
     "name": "Bella Vista Restaurant",
@@ -38,5 +42,105 @@ BOOKING_SLOTS = [
 MAX_PARTY_SIZE = 12
 MIN_PARTY_SIZE = 1
 
+# Expected dining duration in minutes as (largest party size, minutes) tiers;
+# a party occupies every slot that starts before it is expected to leave
+DINING_DURATIONS = [
+    (2, 90),
+    (4, 105),
+    (6, 120),
+    (MAX_PARTY_SIZE, 150)
+]
+
+# Table Inventory as (table id, seats); the seats add up to the capacity
+TABLES = (
+    [(f"T{n}", 2) for n in range(1, 11)]
+    + [(f"T{n}", 4) for n in range(11, 23)]
+    + [(f"T{n}", 6) for n in range(23, 27)]
+    + [("T27", 8)]
+)
+
+# Tables that can be pushed together to seat one larger party
+COMBINABLE_TABLES = [
+    ("T1", "T2"), ("T3", "T4"),
+    ("T11", "T12"), ("T13", "T14"), ("T15", "T16"),
+    ("T17", "T18", "T19"),
+    ("T23", "T24"), ("T25", "T26"),
+    ("T20", "T27")
+]
+
 # Database
 DB_NAME = "restaurant_bookings.db"
+
+# Database Connection Pool
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_BUSY_TIMEOUT = 5000  # milliseconds
+DB_STATEMENT_CACHE_SIZE = 256
+DB_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "foreign_keys": "ON",
+    "temp_store": "MEMORY",
+    "cache_size": -16000,  # ~16 MB page cache per connection
+    "busy_timeout": DB_BUSY_TIMEOUT
+}
+
+# Availability Cache
+AVAILABILITY_CACHE_SIZE = 256  # dates kept in memory
+AVAILABILITY_CACHE_TTL = 30  # seconds
+
+# Bulk Import/Export
+BULK_BATCH_SIZE = 1000  # rows per transaction / fetch
+
+# Archival
+ARCHIVE_HORIZON_DAYS = 90  # bookings older than this move to bookings_archive
+ARCHIVE_BATCH_SIZE = 500  # rows moved per short write transaction
+
+# Group Commit (write-behind booking queue)
+WRITE_BEHIND = os.getenv("BOOKING_WRITE_BEHIND", "false").lower() == "true"
+GROUP_COMMIT_MAX_BATCH = 64  # bookings per commit
+GROUP_COMMIT_MAX_WAIT = 0.002  # seconds to wait for a batch to fill
+
+# Idempotent Booking Submissions
+IDEMPOTENCY_CACHE_SIZE = 1024  # recently completed keys kept in memory
+
+# Booking Storage Engine ("sqlite" or "memory")
+BOOKING_BACKEND = os.getenv("BOOKING_BACKEND", "sqlite")
+
+# Booking Event Log
+EVENT_BATCH_SIZE = 100  # events handed to a consumer per offset commit
+EVENT_POLL_INTERVAL = 1.0  # seconds an idle consumer waits before polling again
+
+# Shared Availability Snapshot (mmap'd file next to the database)
+AVAILABILITY_SNAPSHOT = os.getenv("BOOKING_SNAPSHOT", "true").lower() == "true"
+SNAPSHOT_DAYS = 400  # ring of date rows kept in the file
+SNAPSHOT_MAX_AGE = 60  # seconds before a row is considered stale
+SNAPSHOT_READ_RETRIES = 1000  # reads of a row that is mid-write before it counts as a miss
+
+# Background Jobs (booking confirmation and cancellation notices)
+NOTIFICATIONS_ENABLED = os.getenv("BOOKING_NOTIFICATIONS", "false").lower() == "true"  # needs an SMTP server
+JOB_WORKERS = 2
+JOB_POLL_INTERVAL = 0.5  # seconds an idle worker waits before polling again
+JOB_MAX_ATTEMPTS = 5  # attempts before a job is moved to the dead state
+JOB_BACKOFF_BASE = 2.0  # seconds before the first retry, doubling per attempt
+JOB_BACKOFF_MAX = 300.0  # cap on the retry delay in seconds
+JOB_LEASE_TIMEOUT = 300  # seconds before a running job counts as abandoned
+JOB_RETENTION = 7 * 24 * 3600  # seconds done jobs are kept before they are purged
+JOB_PURGE_INTERVAL = 3600  # seconds between purges run by idle workers
+JOB_PURGE_BATCH_SIZE = 500  # done jobs deleted per transaction
+
+# Outgoing Mail
+SMTP_HOST = os.getenv("SMTP_HOST", "localhost")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "1025"))
+SMTP_TIMEOUT = 10  # seconds
+
+# Chat Answer Cache (first-turn FAQ answers shared across sessions)
+ANSWER_CACHE_SIZE = 256  # questions kept in memory
+ANSWER_CACHE_TTL = 3600  # seconds
+ANSWER_CACHE_SIMILARITY = 0.85  # word-overlap needed to reuse a differently worded question; 0 disables
+ANSWER_CACHE_MAX_WORDS = 25  # longer questions are too specific to be worth caching
+
+# Conversation Memory (per chat session)
+CHAT_KEEP_TURNS = 6  # most recent exchanges sent to the model verbatim
+CHAT_COMPACT_EVERY = 4  # extra exchanges allowed before older ones are summarized
+CHAT_TOKEN_BUDGET = 3000  # estimated tokens of history (summary + recent turns) sent with each message
+CHAT_SUMMARY_MAX_WORDS = 150
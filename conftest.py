@@ -0,0 +1,7 @@
+"""
+Pytest configuration
+"""
+
+# test_models.py is a script that lists the Gemini models available to an
+# API key, not a test module
+collect_ignore = ["test_models.py"]
@@ -0,0 +1,163 @@
+"""
+Conversation Memory - Token-budgeted Chat History with a Running Summary
+"""
+
+import threading
+from config import CHAT_KEEP_TURNS, CHAT_COMPACT_EVERY, CHAT_TOKEN_BUDGET, CHAT_SUMMARY_MAX_WORDS
+
+CHARS_PER_TOKEN = 4  # rough average for English text with Gemini's tokenizer
+
+SUMMARY_PREFIX = "Summary of our conversation so far:"
+SUMMARY_ACK = "Thanks, I'll keep that in mind."
+
+def estimate_tokens(text):
+    """Approximate token count without a tokenizer round trip"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def fallback_summary(summary, messages, max_words=CHAT_SUMMARY_MAX_WORDS):
+    """
+    Summary built without the model: the earlier summary plus the guest's
+    questions, trimmed to the most recent max_words words
+    """
+    questions = [message["content"].strip() for message in messages if message["role"] == "user"]
+    text = " ".join(filter(None, [summary, "Guest asked: " + "; ".join(questions) if questions else ""]))
+    words = text.split()
+    return " ".join(words[-max_words:])
+
+class ConversationWindow:
+    """
+    Chat history that stays within a token budget.
+
+    The last `keep_turns` exchanges are kept verbatim. Once there are
+    `compact_every` more than that, or the history outgrows `token_budget`,
+    the older exchanges are folded into a running summary by
+    summarizer(previous_summary, messages) and dropped. Waiting for a few
+    extra exchanges means one summarization call covers several turns.
+
+    compact_in_background() runs the summarizer on a worker thread so a
+    reply is not held up by the extra model call; exchanges added
+    meanwhile are kept, and a clear() discards the stale result.
+    """
+
+    def __init__(self, summarizer=None, keep_turns=CHAT_KEEP_TURNS, compact_every=CHAT_COMPACT_EVERY,
+                 token_budget=CHAT_TOKEN_BUDGET):
+        self.summarizer = summarizer
+        self.keep_turns = keep_turns
+        self.compact_every = compact_every
+        self.token_budget = token_budget
+        self.messages = []  # {"role": "user" | "assistant", "content": str}
+        self.summary = ""
+        self.compactions = 0
+        self._lock = threading.Lock()
+        self._compacting = False
+        self._generation = 0  # bumped by clear() so in-flight compactions are dropped
+
+    def add(self, user_message, ai_response):
+        """Record one exchange"""
+        with self._lock:
+            self.messages.append({"role": "user", "content": user_message})
+            self.messages.append({"role": "assistant", "content": ai_response})
+
+    def history_tokens(self, messages=None):
+        """Estimated tokens of the summary and the given (default: kept) messages"""
+        messages = self.messages if messages is None else messages
+        return estimate_tokens(self.summary) + sum(estimate_tokens(message["content"]) for message in messages)
+
+    def prompt_tokens(self, user_message, system_context=""):
+        """Estimated prompt size of the next message: system context, history and the message itself"""
+        return estimate_tokens(system_context) + self.history_tokens() + estimate_tokens(user_message)
+
+    def compact(self):
+        """
+        Summarize older exchanges if the window is over its turn or token limit
+
+        Returns:
+            True if the history changed and the chat session should be rebuilt
+        """
+        with self._lock:
+            older = self._older_messages()
+            summary, generation = self.summary, self._generation
+        if not older:
+            return False
+        return self._fold(self._summarize(summary, older), older, generation)
+
+    def compact_in_background(self, on_compacted=None):
+        """
+        Like compact(), but the summarizer runs on a daemon thread
+
+        At most one compaction runs at a time. on_compacted() is called from
+        that thread once the window has changed.
+
+        Returns:
+            The started thread, or None if there was nothing to compact
+        """
+        with self._lock:
+            if self._compacting:
+                return None
+            older = self._older_messages()
+            if not older:
+                return None
+            self._compacting = True
+            summary, generation = self.summary, self._generation
+
+        def run():
+            try:
+                compacted = self._fold(self._summarize(summary, older), older, generation)
+            finally:
+                with self._lock:
+                    self._compacting = False
+            if compacted and on_compacted:
+                on_compacted()
+
+        thread = threading.Thread(target=run, name="conversation-compaction", daemon=True)
+        thread.start()
+        return thread
+
+    def _older_messages(self):
+        """Copy of the exchanges to fold into the summary (empty within limits); caller holds the lock"""
+        exchanges = len(self.messages) // 2
+        if exchanges <= self.keep_turns + self.compact_every and self.history_tokens() <= self.token_budget:
+            return []
+
+        keep = min(self.keep_turns, exchanges)
+        while keep > 1 and self.history_tokens(self.messages[-2 * keep:]) > self.token_budget:
+            keep -= 1
+        return self.messages[:len(self.messages) - 2 * keep]
+
+    def _summarize(self, summary, older):
+        try:
+            if self.summarizer is None:
+                raise LookupError("No summarizer configured")
+            return self.summarizer(summary, older)
+        except Exception:
+            # The model is unavailable; keep the guest's questions rather than nothing
+            return fallback_summary(summary, older)
+
+    def _fold(self, summary, older, generation):
+        """Replace the summarized exchanges, unless the window was cleared meanwhile"""
+        with self._lock:
+            if generation != self._generation:
+                return False
+            self.summary = summary
+            # Only appends can happen meanwhile, so the summarized exchanges are still the oldest
+            del self.messages[:len(older)]
+            self.compactions += 1
+            return True
+
+    def chat_history(self):
+        """History for starting a Gemini chat session: the summary as an opening exchange, then recent turns"""
+        history = []
+        with self._lock:
+            if self.summary:
+                history.append({"role": "user", "parts": [f"{SUMMARY_PREFIX} {self.summary}"]})
+                history.append({"role": "model", "parts": [SUMMARY_ACK]})
+            for message in self.messages:
+                role = "user" if message["role"] == "user" else "model"
+                history.append({"role": role, "parts": [message["content"]]})
+        return history
+
+    def clear(self):
+        with self._lock:
+            self.messages.clear()
+            self.summary = ""
+            self._generation += 1
@@ -0,0 +1,155 @@
+"""
+Database - SQLite Connection Management
+"""
+
+import sqlite3
+import threading
+import queue
+from contextlib import contextmanager
+from config import DB_POOL_SIZE, DB_BUSY_TIMEOUT, DB_STATEMENT_CACHE_SIZE, DB_PRAGMAS
+
+class ConnectionPool:
+    """
+    Bounded pool of reusable SQLite connections.
+
+    Connections are opened once in WAL mode with tuned pragmas and handed
+    out per thread. A thread that already holds a connection gets the same
+    one back, so nested helpers share the caller's transaction.
+    """
+
+    def __init__(self, db_name, size=DB_POOL_SIZE):
+        self.db_name = db_name
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._savepoint_id = 0
+
+    def _connect(self):
+        """Open a new connection and apply the configured pragmas"""
+        conn = sqlite3.connect(
+            self.db_name,
+            timeout=DB_BUSY_TIMEOUT / 1000,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=DB_STATEMENT_CACHE_SIZE
+        )
+        for pragma, value in DB_PRAGMAS.items():
+            conn.execute(f"PRAGMA {pragma} = {value}")
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=DB_BUSY_TIMEOUT / 1000)
+        except queue.Empty:
+            # Same error type as a busy database, so callers handle both alike
+            raise sqlite3.OperationalError("connection pool exhausted") from None
+
+    def _release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the current thread"""
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            self._local.depth += 1
+            try:
+                yield held
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self._acquire()
+        self._local.conn = conn
+        self._local.depth = 1
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self._local.depth = 0
+            self._release(conn)
+
+    def in_transaction(self):
+        """True if the current thread holds a connection with an open transaction"""
+        conn = getattr(self._local, "conn", None)
+        return conn is not None and conn.in_transaction
+
+    @contextmanager
+    def transaction(self, immediate=True):
+        """
+        Run a block inside a transaction
+
+        Args:
+            immediate: Take the write lock up front (BEGIN IMMEDIATE)
+
+        Nested calls become savepoints of the enclosing transaction.
+        """
+        with self.connection() as conn:
+            if conn.in_transaction:
+                with self._lock:
+                    self._savepoint_id += 1
+                    name = f"sp_{self._savepoint_id}"
+                conn.execute(f"SAVEPOINT {name}")
+                try:
+                    yield conn
+                except BaseException:
+                    conn.execute(f"ROLLBACK TO {name}")
+                    conn.execute(f"RELEASE {name}")
+                    raise
+                conn.execute(f"RELEASE {name}")
+                return
+
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+
+    def close_all(self):
+        """Close every idle connection in the pool"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(db_name):
+    """Get the process-wide connection pool for a database file"""
+    with _pools_lock:
+        pool = _pools.get(db_name)
+        if pool is None:
+            pool = ConnectionPool(db_name)
+            _pools[db_name] = pool
+        return pool
@@ -0,0 +1,77 @@
+"""
+Booking Events - Append-only Change Log and Incremental Consumers
+"""
+
+from collections import namedtuple
+import json
+import threading
+from config import EVENT_BATCH_SIZE, EVENT_POLL_INTERVAL
+
+BOOKING_CREATED = "created"
+BOOKING_CANCELLED = "cancelled"
+
+EVENT_COLUMNS = ("id", "booking_id", "event_type", "date", "time", "party_size", "payload", "created_at")
+
+class BookingEvent(namedtuple("BookingEvent", EVENT_COLUMNS)):
+    """One entry of the booking change log; payload is a dict"""
+    __slots__ = ()
+
+def encode_payload(payload):
+    return json.dumps(payload or {}, sort_keys=True)
+
+def decode_event(row):
+    """BookingEvent from a stored row whose payload is JSON text"""
+    event = BookingEvent._make(row)
+    return event._replace(payload=json.loads(event.payload or "{}"))
+
+class EventConsumer:
+    """
+    Named reader that tails the booking event log.
+
+    The consumer's position is stored with the bookings, so it resumes
+    after a restart where it left off. Offsets are committed after a batch
+    has been handled, which gives at-least-once delivery: a handler that
+    fails part-way sees the whole batch again on the next poll.
+    """
+
+    def __init__(self, store, name, batch_size=EVENT_BATCH_SIZE):
+        self.store = store
+        self.name = name
+        self.batch_size = batch_size
+
+    @property
+    def offset(self):
+        """Id of the last event this consumer has committed"""
+        return self.store.get_consumer_offset(self.name)
+
+    def poll(self, limit=None):
+        """Next events after the committed offset, without committing them"""
+        return self.store.read_events(self.offset, limit or self.batch_size)
+
+    def commit(self, event_id):
+        """Record that every event up to event_id has been handled"""
+        self.store.commit_consumer_offset(self.name, event_id)
+
+    def process(self, handler):
+        """
+        Hand every pending event to handler(event), one batch at a time
+
+        Returns:
+            Number of events processed
+        """
+        processed = 0
+        while True:
+            events = self.poll()
+            if not events:
+                return processed
+            for event in events:
+                handler(event)
+            self.commit(events[-1].id)
+            processed += len(events)
+
+    def run(self, handler, poll_interval=EVENT_POLL_INTERVAL, stop=None):
+        """Keep processing new events until `stop` (a threading.Event) is set"""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            if not self.process(handler):
+                stop.wait(poll_interval)
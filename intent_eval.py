@@ -0,0 +1,155 @@
+"""
+Intent Evaluation - Routing Accuracy and Latency of the Local Intent Router
+
+Usage:
+    python intent_eval.py [--verbose]
+"""
+
+import sys
+import time
+from intent_router import (
+    classify, answer, HOURS, LOCATION, CONTACT, PRICE, DIETARY, POPULAR, CHAT
+)
+
+# (message, expected intent); CHAT means the model should answer
+EVAL_SET = [
+    ("What are your opening hours?", HOURS),
+    ("What time do you close on Sunday?", HOURS),
+    ("when do you open on saturday", HOURS),
+    ("Are you open on Mondays?", HOURS),
+    ("what's your closing time friday", HOURS),
+    ("Hours?", HOURS),
+    ("How late are you open?", HOURS),
+    ("Is the restaurant closed on Tuesdays?", HOURS),
+    ("What's your address?", LOCATION),
+    ("Where are you located?", LOCATION),
+    ("where is the restaurant", LOCATION),
+    ("Can I get directions to the restaurant?", LOCATION),
+    ("What's your location?", LOCATION),
+    ("What is your phone number?", CONTACT),
+    ("How can I contact you?", CONTACT),
+    ("what's your email", CONTACT),
+    ("Can I call the restaurant?", CONTACT),
+    ("How much is the Osso Buco?", PRICE),
+    ("What does the tiramisu cost?", PRICE),
+    ("Price of the lobster ravioli?", PRICE),
+    ("how much is a cappuccino", PRICE),
+    ("How expensive is the ribeye steak?", PRICE),
+    ("What do your desserts cost?", PRICE),
+    ("How much are the appetizers?", PRICE),
+    ("Do you have vegan options?", DIETARY),
+    ("Do you have vegan pasta?", DIETARY),
+    ("What vegetarian dishes do you have?", DIETARY),
+    ("Is the panna cotta gluten-free?", DIETARY),
+    ("Is the carbonara vegetarian?", DIETARY),
+    ("Any gluten free desserts?", DIETARY),
+    ("I'm celiac, what can I eat?", DIETARY),
+    ("veggie mains?", DIETARY),
+    ("Do you have vegan desserts?", DIETARY),
+    ("What are your most popular dishes?", POPULAR),
+    ("What do you recommend?", POPULAR),
+    ("What's your signature dish?", POPULAR),
+    ("What are the bestsellers?", POPULAR),
+    ("Which desserts are the most popular?", POPULAR),
+    ("What's your best dish?", POPULAR),
+    ("Hi!", CHAT),
+    ("Hello there, how are you?", CHAT),
+    ("Thank you so much!", CHAT),
+    ("Tell me about your restaurant", CHAT),
+    ("What wine goes with the osso buco?", CHAT),
+    ("Can I book a table for 4 on Friday?", CHAT),
+    ("Do you have a table available tonight?", CHAT),
+    ("I want to cancel my reservation", CHAT),
+    ("When is happy hour?", CHAT),
+    ("What's included in the Sunday brunch?", CHAT),
+    ("Are you open on Christmas Day?", CHAT),
+    ("Are you open on New Year's Eve?", CHAT),
+    ("What are your hours on Memorial Day?", CHAT),
+    ("Open on the 4th of July?", CHAT),
+    ("Are you closed on Labor Day?", CHAT),
+    ("What time do you close on Valentine's Day?", CHAT),
+    ("Are you open on Mother's Day?", CHAT),
+    ("Is it vegan?", CHAT),
+    ("Do you have vegan or gluten-free pasta?", CHAT),
+    ("Which dishes are vegetarian and gluten free?", CHAT),
+    ("How much is that?", CHAT),
+    ("What's the difference between the linguine and the ravioli?", CHAT),
+    ("What is the best dish for a birthday dinner?", CHAT),
+    ("Can you describe the lobster ravioli?", CHAT),
+    ("Is the salmon wild caught?", CHAT),
+    ("I have a nut allergy, which dishes should I avoid?", CHAT),
+    ("Do you allow dogs on the terrace?", CHAT),
+    ("Do you deliver to my address?", CHAT),
+    ("are dogs allowed on the patio during opening hours", CHAT),
+    ("Is there a vegan menu for kids?", CHAT),
+    ("Do you have vegetarian lasagna?", CHAT),
+    ("Is there parking nearby?", CHAT),
+    ("We're celebrating our anniversary next week and would love some ideas for a special evening menu", CHAT),
+    ("What's the story behind the name Bella Vista?", CHAT),
+]
+
+def evaluate(verbose=False):
+    """
+    Run the labeled set through the classifier
+
+    Returns:
+        dict with accuracy, wrong local answers, missed local answers,
+        per-intent accuracy and classify+answer latency in microseconds
+    """
+    correct = 0
+    wrong_answers = []  # answered locally with the wrong intent, or should have gone to the model
+    missed = []  # sent to the model although a local answer was expected
+    by_intent = {}
+    latencies = []
+
+    for message, expected in EVAL_SET:
+        started = time.perf_counter()
+        intent = classify(message)
+        if intent is not None:
+            answer(intent)
+        latencies.append((time.perf_counter() - started) * 1e6)
+
+        predicted = intent.name if intent else CHAT
+        hits, total = by_intent.get(expected, (0, 0))
+        by_intent[expected] = (hits + (predicted == expected), total + 1)
+        if predicted == expected:
+            correct += 1
+        elif predicted == CHAT:
+            missed.append((message, expected))
+        else:
+            wrong_answers.append((message, expected, predicted))
+        if verbose:
+            mark = "ok " if predicted == expected else "ERR"
+            print(f"{mark} {predicted:<9}{expected:<9}{message}")
+
+    latencies.sort()
+    return {
+        "accuracy": correct / len(EVAL_SET),
+        "wrong_answers": wrong_answers,
+        "missed": missed,
+        "by_intent": {intent: hits / total for intent, (hits, total) in by_intent.items()},
+        "latency_p50_us": latencies[len(latencies) // 2],
+        "latency_p95_us": latencies[min(int(0.95 * len(latencies)), len(latencies) - 1)]
+    }
+
+def main():
+    results = evaluate(verbose="--verbose" in sys.argv)
+
+    print(f"Intent routing on {len(EVAL_SET)} labeled messages")
+    print("=" * 60)
+    print(f"{'Accuracy':<28}{results['accuracy']:.1%}")
+    for intent, accuracy in sorted(results["by_intent"].items()):
+        print(f"  {intent:<26}{accuracy:.1%}")
+    print(f"{'Latency p50':<28}{results['latency_p50_us']:.1f} µs")
+    print(f"{'Latency p95':<28}{results['latency_p95_us']:.1f} µs")
+
+    for message, expected, predicted in results["wrong_answers"]:
+        print(f"WRONG  {message!r}: expected {expected}, answered as {predicted}")
+    for message, expected in results["missed"]:
+        print(f"MISSED {message!r}: expected {expected}, sent to the model")
+
+    # A wrong canned answer is worse than an extra model call
+    return 1 if results["wrong_answers"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
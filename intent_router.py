@@ -0,0 +1,267 @@
+"""
+Intent Router - Local Answers for Structured Restaurant Questions
+"""
+
+from collections import Counter, namedtuple
+import threading
+from config import RESTAURANT_INFO
+from restaurant_data import (
+    MENU_DATA, DIETARY_INFO, CHEF_RECOMMENDATIONS, get_items_by_dietary, get_popular_items
+)
+from answer_cache import normalize_question
+
+HOURS = "hours"
+LOCATION = "location"
+CONTACT = "contact"
+PRICE = "price"
+DIETARY = "dietary"
+POPULAR = "popular"
+CHAT = "chat"  # open-ended conversation, answered by the model
+
+INTENTS = (HOURS, LOCATION, CONTACT, PRICE, DIETARY, POPULAR)
+
+Intent = namedtuple("Intent", ("name", "item", "category", "diet", "day"))
+
+MAX_ROUTED_WORDS = 16  # longer messages are conversation, not a lookup
+
+# Words that mark a question as needing the model: it refers back to the
+# conversation, is about a booking or an occasion the data doesn't cover
+CHAT_WORDS = frozenset("""
+    it that this those these they them
+    book booking booked reservation reserve reserved table tables available availability cancel
+    happy brunch special specials offer offers deal deals event events party
+    holiday holidays christmas xmas thanksgiving easter halloween eve years memorial labor labour
+    independence july valentine valentines mothers fathers
+    wine pair pairing compare difference between why
+""".split())
+
+# Question scaffolding a lookup may contain besides trigger, diet, category,
+# weekday and menu words; any other word ("deliver", "kids", "lasagna")
+# means the question asks for more than the canned answer covers
+ROUTING_WORDS = frozenset("""
+    a an the and or of to in on at for with is are be do does can could would will
+    you your yours we our us i im me please hi hello hey there any some
+    what whats when where which who how
+    dish dishes option options menu food eat serve item items free
+    time late number most restaurant get have has
+""".split())
+
+TRIGGERS = {
+    HOURS: frozenset("hours hour open opens opening close closes closing closed".split()),
+    LOCATION: frozenset("address located location directions".split()),
+    CONTACT: frozenset("phone telephone call email contact".split()),
+    PRICE: frozenset("price prices priced cost costs much expensive cheap".split()),
+    DIETARY: frozenset("vegan vegetarian veggie gluten celiac coeliac".split()),
+    POPULAR: frozenset(
+        "popular bestseller bestsellers best signature famous favorite favourite recommend recommendation"
+        " recommendations".split()
+    )
+}
+
+DIET_WORDS = {
+    "vegan": "vegan",
+    "vegetarian": "vegetarian",
+    "veggie": "vegetarian",
+    "gluten": "gluten-free",
+    "celiac": "gluten-free",
+    "coeliac": "gluten-free"
+}
+
+CATEGORY_WORDS = {
+    "appetizer": "Appetizers",
+    "starter": "Appetizers",
+    "main": "Main Courses",
+    "entree": "Main Courses",
+    "pasta": "Pasta",
+    "dessert": "Desserts",
+    "sweet": "Desserts",
+    "beverage": "Beverages",
+    "drink": "Beverages"
+}
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+# Name words too generic to identify a dish on their own
+GENERIC_NAME_WORDS = frozenset("fresh grilled stuffed italian san trio".split())
+
+def _singular(word):
+    return word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+
+def _hours_by_day():
+    """Weekday -> (label, hours) from RESTAURANT_INFO ranges such as "Monday-Thursday\""""
+    days = {}
+    for label, hours in RESTAURANT_INFO["hours"].items():
+        first, _, last = label.lower().partition("-")
+        start = WEEKDAYS.index(first.strip())
+        end = WEEKDAYS.index(last.strip()) if last else start
+        for day in WEEKDAYS[start:end + 1]:
+            days[day] = (label, hours)
+    return days
+
+def _item_index():
+    """Menu items by lowercase name, and by name words that identify a single dish"""
+    items = {}
+    words = {}
+    for category, category_items in MENU_DATA.items():
+        for item in category_items:
+            items[normalize_question(item["name"])] = {**item, "category": category}
+    word_counts = Counter(
+        _singular(word) for name in items for word in set(name.split()) if word not in GENERIC_NAME_WORDS
+    )
+    for name in items:
+        for word in name.split():
+            if word_counts.get(_singular(word)) == 1:
+                words[_singular(word)] = name
+    return items, words
+
+HOURS_BY_DAY = _hours_by_day()
+ITEMS_BY_NAME, ITEMS_BY_WORD = _item_index()
+KNOWN_WORDS = ROUTING_WORDS.union(
+    *TRIGGERS.values(), DIET_WORDS, CATEGORY_WORDS, WEEKDAYS, *(name.split() for name in ITEMS_BY_NAME)
+)
+
+def _find_item(text, words):
+    for name in ITEMS_BY_NAME:
+        if f" {name} " in f" {text} ":
+            return name
+    names = {ITEMS_BY_WORD[word] for word in words if word in ITEMS_BY_WORD}
+    return names.pop() if len(names) == 1 else None
+
+def classify(message):
+    """
+    Work out whether a message can be answered from restaurant data
+
+    Returns:
+        Intent, or None if the message should go to the model
+    """
+    text = normalize_question(message)
+    raw_words = text.split()
+    if not raw_words or len(raw_words) > MAX_ROUTED_WORDS or CHAT_WORDS.intersection(raw_words):
+        return None
+    if any(word not in KNOWN_WORDS and _singular(word) not in KNOWN_WORDS for word in raw_words):
+        return None
+    words = {_singular(word) for word in raw_words} | set(raw_words)
+
+    matched = [name for name, triggers in TRIGGERS.items() if triggers & words]
+    # "what time do you close" / "where are you" without the trigger nouns
+    if not matched and "where" in words and words & {"you", "restaurant"}:
+        matched = [LOCATION]
+    if len(matched) != 1:
+        return None
+
+    name = matched[0]
+    item = _find_item(text, words)
+    category = next((CATEGORY_WORDS[word] for word in words if word in CATEGORY_WORDS), None)
+    diets = {DIET_WORDS[word] for word in raw_words if word in DIET_WORDS}
+    if len(diets) > 1:
+        # "vegan or gluten-free", "vegetarian and gluten free": let the model combine them
+        return None
+    diet = diets.pop() if diets else None
+    day = next((day for day in WEEKDAYS if day in words), None)
+
+    if name == PRICE and item is None and category is None:
+        # "how much" with nothing to price is small talk ("thanks so much")
+        return None
+    if name == POPULAR and (item is not None or diet is not None or {"for", "with"} & words):
+        # "best dish for a birthday", "what goes best with the salmon"
+        return None
+    if name in (LOCATION, CONTACT) and item is not None:
+        return None
+    return Intent(name, item, category, diet, day)
+
+def _format_items(items):
+    return "\n".join(f"- {item['name']} (${item['price']})" for item in items)
+
+def answer(intent):
+    """Reply text for a classified intent"""
+    name = intent.name
+    if name == HOURS:
+        if intent.day:
+            _, hours = HOURS_BY_DAY[intent.day]
+            return f"🕐 On {intent.day.title()} we're open {hours}."
+        lines = "\n".join(f"- {label}: {hours}" for label, hours in RESTAURANT_INFO["hours"].items())
+        return f"🕐 Our opening hours:\n{lines}"
+
+    if name == LOCATION:
+        return f"📍 You'll find {RESTAURANT_INFO['name']} at {RESTAURANT_INFO['address']}."
+
+    if name == CONTACT:
+        return f"📞 You can call us on {RESTAURANT_INFO['phone']} or email {RESTAURANT_INFO['email']}."
+
+    if name == PRICE:
+        if intent.item:
+            item = ITEMS_BY_NAME[intent.item]
+            return f"🍽️ The {item['name']} is ${item['price']}: {item['description']}."
+        items = MENU_DATA[intent.category]
+        return f"🍽️ Our {intent.category.lower()}:\n{_format_items(items)}"
+
+    if name == DIETARY:
+        diet = intent.diet
+        if intent.item:
+            item = ITEMS_BY_NAME[intent.item]
+            if diet in item.get("dietary", []):
+                return f"✅ Yes, the {item['name']} is {diet}."
+            return (f"The {item['name']} isn't marked {diet} on our menu. "
+                    f"{DIETARY_INFO.get(diet, DIETARY_INFO['allergies'])}")
+        items = get_items_by_dietary(diet)
+        if intent.category:
+            items = [item for item in items if item["category"] == intent.category]
+        note = DIETARY_INFO.get(diet, "")
+        dishes = intent.category.lower() if intent.category else "dishes"
+        if not items:
+            return f"We don't have any {dishes} marked {diet} on the menu. {note}".strip()
+        return f"🌱 Our {diet} {dishes}:\n{_format_items(items)}\n\n{note}".strip()
+
+    if name == POPULAR:
+        items = get_popular_items()
+        if intent.category:
+            items = [item for item in items if item["category"] == intent.category]
+        picks = "\n".join(f"- {recommendation}" for recommendation in CHEF_RECOMMENDATIONS)
+        if intent.category:
+            return f"⭐ Guest favourites among our {intent.category.lower()}:\n{_format_items(items)}"
+        return f"⭐ Guest favourites:\n{_format_items(items)}\n\n👨‍🍳 Chef's recommendations:\n{picks}"
+
+    raise ValueError(f"Unknown intent: {name!r}")
+
+class IntentRouter:
+    """
+    Keyword classifier in front of the model.
+
+    Hours, address, contact details, prices, dietary options and popular
+    dishes are answered straight from RESTAURANT_INFO and restaurant_data;
+    anything ambiguous, conversational, longer than MAX_ROUTED_WORDS or
+    with words outside KNOWN_WORDS falls through to the model. The rules prefer falling through over a
+    wrong canned answer.
+    """
+
+    def __init__(self):
+        self.routed = Counter()
+        self.fallbacks = 0
+        self._lock = threading.Lock()
+
+    def route(self, message):
+        """
+        Answer a message locally if it matches a structured intent
+
+        Returns:
+            Reply text, or None to send the message to the model
+        """
+        intent = classify(message)
+        with self._lock:
+            if intent is None:
+                self.fallbacks += 1
+            else:
+                self.routed[intent.name] += 1
+        return None if intent is None else answer(intent)
+
+    def stats(self):
+        """Messages answered locally per intent, fallbacks and the local share"""
+        with self._lock:
+            routed = sum(self.routed.values())
+            total = routed + self.fallbacks
+            return {
+                "routed": routed,
+                "fallbacks": self.fallbacks,
+                "local_ratio": routed / total if total else 0.0,
+                "by_intent": dict(self.routed)
+            }
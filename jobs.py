@@ -0,0 +1,286 @@
+"""
+Job Queue - Persistent Background Jobs with Retries
+"""
+
+from collections import deque
+import json
+import logging
+import random
+import threading
+import time
+from config import (
+    JOB_WORKERS, JOB_POLL_INTERVAL, JOB_MAX_ATTEMPTS, JOB_BACKOFF_BASE, JOB_BACKOFF_MAX, JOB_LEASE_TIMEOUT,
+    JOB_RETENTION, JOB_PURGE_INTERVAL, JOB_PURGE_BATCH_SIZE
+)
+from database import get_pool
+
+JOB_STATUSES = ("pending", "running", "done", "dead")
+
+logger = logging.getLogger(__name__)
+
+def enqueue_job(conn, kind, payload, delay=0, max_attempts=JOB_MAX_ATTEMPTS):
+    """
+    Insert a job through an open connection
+
+    Called inside a booking transaction this is an outbox: the job exists
+    if and only if the booking change committed.
+
+    Returns:
+        The new job id
+    """
+    now = time.time()
+    cursor = conn.execute('''
+        INSERT INTO jobs (kind, payload, max_attempts, run_at, created_at)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (kind, json.dumps(payload), max_attempts, now + delay, now))
+    return cursor.lastrowid
+
+def backoff_delay(attempts):
+    """Seconds before retry number `attempts`: doubling from JOB_BACKOFF_BASE, capped, with jitter"""
+    delay = min(JOB_BACKOFF_BASE * 2 ** (attempts - 1), JOB_BACKOFF_MAX)
+    return delay * random.uniform(0.8, 1.2)
+
+class JobQueue:
+    """
+    SQLite-backed job queue drained by a small pool of worker threads.
+
+    Workers claim the oldest due job with a single UPDATE ... RETURNING, so
+    several processes can share one queue. A failed job goes back to
+    pending with exponential backoff until max_attempts, then to the dead
+    state with its last error kept for inspection. Jobs left running by a
+    crashed worker are reclaimed after JOB_LEASE_TIMEOUT by whichever
+    worker claims next, and done jobs are purged once they are older than
+    JOB_RETENTION so the table only holds recent history.
+    """
+
+    def __init__(self, db_name, handlers=None, workers=JOB_WORKERS, poll_interval=JOB_POLL_INTERVAL):
+        self.db_name = db_name
+        self.pool = get_pool(db_name)
+        self.handlers = dict(handlers or {})
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.completed = 0
+        self.failed = 0
+        self.worker_errors = 0  # claim/purge failures outside any job handler
+        self._latencies = deque(maxlen=1000)
+        self._last_purge = 0.0
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def enqueue(self, kind, payload, delay=0, max_attempts=JOB_MAX_ATTEMPTS):
+        """Add a job in its own transaction and wake the workers"""
+        with self.pool.transaction() as conn:
+            job_id = enqueue_job(conn, kind, payload, delay, max_attempts)
+        self.wake()
+        return job_id
+
+    def wake(self):
+        """Tell idle workers that new work may be due"""
+        self._wakeup.set()
+
+    def start(self):
+        """Start the worker threads (idempotent)"""
+        with self._lock:
+            if self._threads:
+                return
+            self._stopped.clear()
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"job-worker-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        """Stop the workers after their current job"""
+        with self._lock:
+            self._stopped.set()
+            self._wakeup.set()
+            for thread in self._threads:
+                thread.join(timeout)
+            self._threads = []
+
+    def reclaim_abandoned(self):
+        """Return jobs stuck in running past the lease timeout to pending"""
+        with self.pool.transaction() as conn:
+            return self._reclaim(conn)
+
+    def _reclaim(self, conn):
+        now = time.time()
+        return conn.execute('''
+            UPDATE jobs SET status = 'pending', run_at = ?
+            WHERE status = 'running' AND started_at < ?
+        ''', (now, now - JOB_LEASE_TIMEOUT)).rowcount
+
+    def _claim(self):
+        # Expired leases are checked on every claim, not just at startup,
+        # so a job whose worker died is retried while the others keep running
+        with self.pool.transaction() as conn:
+            self._reclaim(conn)
+            now = time.time()
+            # The status index would match too, but only idx_jobs_due
+            # returns the due jobs already in claim order
+            return conn.execute('''
+                UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = ?
+                WHERE id = (
+                    SELECT id FROM jobs INDEXED BY idx_jobs_due
+                    WHERE status = 'pending' AND run_at <= ?
+                    ORDER BY run_at, id LIMIT 1
+                )
+                RETURNING id, kind, payload, attempts, max_attempts, created_at
+            ''', (now, now)).fetchone()
+
+    def run_once(self):
+        """
+        Claim and execute one due job
+
+        Returns:
+            True if a job was processed
+        """
+        job = self._claim()
+        if job is None:
+            return False
+
+        job_id, kind, payload, attempts, max_attempts, created_at = job
+        try:
+            handler = self.handlers.get(kind)
+            if handler is None:
+                raise LookupError(f"No handler for job kind {kind!r}")
+            handler(json.loads(payload))
+        except Exception as e:
+            self._fail(job_id, attempts, max_attempts, e)
+            return True
+
+        finished_at = time.time()
+        with self.pool.transaction() as conn:
+            conn.execute('''
+                UPDATE jobs SET status = 'done', finished_at = ?, last_error = NULL WHERE id = ?
+            ''', (finished_at, job_id))
+        self._latencies.append(finished_at - created_at)
+        self.completed += 1
+        return True
+
+    def _fail(self, job_id, attempts, max_attempts, error):
+        self.failed += 1
+        message = f"{type(error).__name__}: {error}"
+        with self.pool.transaction() as conn:
+            if attempts >= max_attempts:
+                conn.execute('''
+                    UPDATE jobs SET status = 'dead', finished_at = ?, last_error = ? WHERE id = ?
+                ''', (time.time(), message, job_id))
+            else:
+                conn.execute('''
+                    UPDATE jobs SET status = 'pending', run_at = ?, last_error = ? WHERE id = ?
+                ''', (time.time() + backoff_delay(attempts), message, job_id))
+
+    def drain(self, timeout=None):
+        """Process due jobs on the calling thread until none are left"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        processed = 0
+        while self.run_once():
+            processed += 1
+            if deadline is not None and time.monotonic() > deadline:
+                break
+        return processed
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                if self.run_once():
+                    continue
+                self._purge_if_due()
+            except Exception:
+                # Database busy or similar; back off and try again
+                self.worker_errors += 1
+                logger.exception("Job worker %s failed; retrying in %ss",
+                                 threading.current_thread().name, self.poll_interval)
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _purge_if_due(self):
+        """Purge done jobs from an idle worker at most once per JOB_PURGE_INTERVAL"""
+        with self._lock:
+            if time.time() - self._last_purge < JOB_PURGE_INTERVAL:
+                return
+            self._last_purge = time.time()
+        self.purge_done()
+
+    def purge_done(self, older_than=JOB_RETENTION, batch_size=JOB_PURGE_BATCH_SIZE):
+        """
+        Delete done jobs that finished more than `older_than` seconds ago
+
+        Rows go in batches of their own short transactions so bookings are
+        never blocked for long. Dead jobs are kept for retry_dead().
+
+        Returns:
+            Number of jobs deleted
+        """
+        cutoff = time.time() - older_than
+        purged = 0
+        while True:
+            with self.pool.transaction() as conn:
+                deleted = conn.execute('''
+                    DELETE FROM jobs WHERE id IN (
+                        SELECT id FROM jobs WHERE status = 'done' AND finished_at < ? LIMIT ?
+                    )
+                ''', (cutoff, batch_size)).rowcount
+            purged += deleted
+            if deleted < batch_size:
+                return purged
+
+    def retry_dead(self, job_ids=None):
+        """Move dead jobs (all, or the given ids) back to pending with a fresh attempt budget"""
+        query = "UPDATE jobs SET status = 'pending', attempts = 0, run_at = ? WHERE status = 'dead'"
+        params = [time.time()]
+        if job_ids:
+            query += f" AND id IN ({', '.join('?' * len(job_ids))})"
+            params.extend(job_ids)
+        with self.pool.transaction() as conn:
+            cursor = conn.execute(query, params)
+        self.wake()
+        return cursor.rowcount
+
+    def stats(self):
+        """
+        Queue depth and latency metrics
+
+        Returns:
+            dict with a count per status, the age in seconds of the oldest
+            due pending job, this process's completed, failed and worker
+            error counters and enqueue-to-done latency percentiles over
+            recent jobs
+        """
+        with self.pool.connection() as conn:
+            counts = dict(conn.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall())
+            oldest = conn.execute(
+                "SELECT MIN(run_at) FROM jobs WHERE status = 'pending' AND run_at <= ?", (time.time(),)
+            ).fetchone()[0]
+
+        latencies = sorted(self._latencies)
+        def percentile(p):
+            return latencies[min(int(p * len(latencies)), len(latencies) - 1)] if latencies else None
+
+        return {
+            **{status: counts.get(status, 0) for status in JOB_STATUSES},
+            "oldest_pending_age": time.time() - oldest if oldest else 0.0,
+            "completed": self.completed,
+            "failed": self.failed,
+            "worker_errors": self.worker_errors,
+            "latency_p50": percentile(0.50),
+            "latency_p95": percentile(0.95),
+            "latency_max": latencies[-1] if latencies else None
+        }
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+def get_job_queue(db_name, handlers=None):
+    """Get the process-wide job queue for a database file; workers are started with start()"""
+    with _queues_lock:
+        queue = _queues.get(db_name)
+        if queue is None:
+            queue = JobQueue(db_name, handlers)
+            _queues[db_name] = queue
+        elif handlers:
+            queue.handlers.update(handlers)
+        return queue
@@ -0,0 +1,206 @@
+"""
+Management Commands - Maintenance tasks for the booking database
+
+Usage:
+    python manage.py verify-occupancy
+    python manage.py rebuild-occupancy
+    python manage.py import-bookings FILE [--format csv|jsonl] [--rejects FILE]
+    python manage.py export-bookings FILE [--format csv|jsonl] [--date YYYY-MM-DD]
+    python manage.py archive-bookings [--before YYYY-MM-DD] [--batch-size N]
+    python manage.py repack-tables --date YYYY-MM-DD
+    python manage.py rebuild-rollups [--since YYYY-MM-DD]
+    python manage.py tail-events [--consumer NAME] [--follow]
+    python manage.py run-jobs [--drain]
+    python manage.py job-stats
+    python manage.py retry-dead-jobs [ID ...]
+    python manage.py purge-jobs [--days N]
+    python manage.py smtp-sink [--port N]
+"""
+
+import argparse
+import json
+import sys
+import time
+from booking_system import BookingSystem
+from config import ARCHIVE_BATCH_SIZE, SMTP_PORT, JOB_RETENTION
+from time_slots import minutes_to_slot
+from booking_io import import_bookings, export_bookings
+from events import EventConsumer
+from notifications import LocalSMTPSink
+
+def verify_occupancy(system, args):
+    mismatches = system.verify_occupancy()
+    for row in mismatches:
+        print(f"{row['date']} {minutes_to_slot(row['time'])}: expected {row['expected']}, recorded {row['recorded']}")
+    print(f"{len(mismatches)} mismatched slot(s)")
+    return 1 if mismatches else 0
+
+def rebuild_occupancy(system, args):
+    slots = system.rebuild_occupancy()
+    print(f"Rebuilt occupancy counters for {slots} slot(s)")
+    return 0
+
+def import_command(system, args):
+    rejects = open(args.rejects, "w", encoding="utf-8") if args.rejects else None
+    
+    def record_reject(line_number, row, result):
+        if rejects and not result["success"] and not result.get("skipped"):
+            rejects.write(json.dumps({"line": line_number, "row": row, "error": result["message"]}) + "\n")
+    
+    try:
+        summary = import_bookings(system, args.file, fmt=args.format, on_result=record_reject)
+    finally:
+        if rejects:
+            rejects.close()
+    print(f"Imported {summary['accepted']} booking(s), rejected {summary['rejected']}, "
+          f"skipped {summary['skipped']} not confirmed")
+    return 0
+
+def export_command(system, args):
+    written = export_bookings(system, args.file, fmt=args.format, date=args.date)
+    print(f"Exported {written} booking(s) to {args.file}")
+    return 0
+
+def archive_command(system, args):
+    archived = system.archive_bookings(before=args.before, batch_size=args.batch_size)
+    print(f"Archived {archived} booking(s)")
+    return 0
+
+def repack_command(system, args):
+    result = system.repack_tables(args.date)
+    print(result["message"])
+    if result.get("unseated"):
+        print(f"Without a table: {', '.join(map(str, result['unseated']))}")
+    return 0 if result["success"] else 1
+
+def rollups_command(system, args):
+    rows = system.rebuild_rollups(since=args.since)
+    print(f"Rebuilt {rows} daily slot rollup(s)")
+    return 0
+
+def tail_events_command(system, args):
+    def show(event):
+        print(f"#{event.id} {event.created_at} {event.event_type} booking {event.booking_id}: "
+              f"{event.date} {minutes_to_slot(event.time)}, party of {event.party_size}")
+    
+    consumer = EventConsumer(system, args.consumer)
+    if args.follow:
+        try:
+            consumer.run(show)
+        except KeyboardInterrupt:
+            pass
+    else:
+        consumer.process(show)
+    print(f"Consumer '{args.consumer}' is at event {consumer.offset}")
+    return 0
+
+def run_jobs_command(system, args):
+    queue = system.job_queue
+    if args.drain:
+        print(f"Processed {queue.drain()} job(s)")
+        return 0
+    
+    queue.start()
+    print(f"Running {queue.workers} job worker(s); press Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        queue.stop()
+    return 0
+
+def job_stats_command(system, args):
+    for name, value in system.job_queue.stats().items():
+        print(f"{name:<20}{'-' if value is None else value}")
+    return 0
+
+def retry_dead_command(system, args):
+    print(f"Requeued {system.job_queue.retry_dead(args.ids)} dead job(s)")
+    return 0
+
+def purge_jobs_command(system, args):
+    purged = system.job_queue.purge_done(older_than=args.days * 24 * 3600)
+    print(f"Purged {purged} done job(s) older than {args.days:g} day(s)")
+    return 0
+
+def smtp_sink_command(system, args):
+    sink = LocalSMTPSink(port=args.port).start()
+    print(f"SMTP sink listening on {sink.host}:{sink.port}; press Ctrl+C to stop")
+    seen = 0
+    try:
+        while True:
+            time.sleep(0.5)
+            for mail_from, recipients, data in sink.messages[seen:]:
+                print(f"--- {mail_from} -> {', '.join(recipients)}\n{data.decode('utf-8', 'replace')}")
+            seen = len(sink.messages)
+    except KeyboardInterrupt:
+        sink.stop()
+    return 0
+
+COMMANDS = {
+    "verify-occupancy": verify_occupancy,
+    "rebuild-occupancy": rebuild_occupancy,
+    "import-bookings": import_command,
+    "export-bookings": export_command,
+    "archive-bookings": archive_command,
+    "repack-tables": repack_command,
+    "rebuild-rollups": rollups_command,
+    "tail-events": tail_events_command,
+    "run-jobs": run_jobs_command,
+    "job-stats": job_stats_command,
+    "retry-dead-jobs": retry_dead_command,
+    "purge-jobs": purge_jobs_command,
+    "smtp-sink": smtp_sink_command,
+}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bella Vista booking database maintenance")
+    parser.add_argument("--db", help="Database file (defaults to config.DB_NAME)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name in COMMANDS:
+        subparsers.add_parser(name)
+    
+    import_parser = subparsers.choices["import-bookings"]
+    import_parser.add_argument("file")
+    import_parser.add_argument("--format", choices=["csv", "jsonl"])
+    import_parser.add_argument("--rejects", help="Write rejected rows to this JSONL file")
+    
+    export_parser = subparsers.choices["export-bookings"]
+    export_parser.add_argument("file")
+    export_parser.add_argument("--format", choices=["csv", "jsonl"])
+    export_parser.add_argument("--date", help="Only export bookings on this date")
+    
+    archive_parser = subparsers.choices["archive-bookings"]
+    archive_parser.add_argument("--before", help="Archive bookings dated before this day "
+                                                 "(defaults to config.ARCHIVE_HORIZON_DAYS ago)")
+    archive_parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    
+    repack_parser = subparsers.choices["repack-tables"]
+    repack_parser.add_argument("--date", required=True, help="Day whose table plan is rebuilt")
+    
+    rollups_parser = subparsers.choices["rebuild-rollups"]
+    rollups_parser.add_argument("--since", help="Only rebuild days on or after this date")
+    
+    events_parser = subparsers.choices["tail-events"]
+    events_parser.add_argument("--consumer", default="cli", help="Offset name to resume from")
+    events_parser.add_argument("--follow", action="store_true", help="Keep waiting for new events")
+    
+    jobs_parser = subparsers.choices["run-jobs"]
+    jobs_parser.add_argument("--drain", action="store_true", help="Process due jobs once and exit")
+    
+    retry_parser = subparsers.choices["retry-dead-jobs"]
+    retry_parser.add_argument("ids", nargs="*", type=int, help="Job ids (defaults to every dead job)")
+    
+    purge_parser = subparsers.choices["purge-jobs"]
+    purge_parser.add_argument("--days", type=float, default=JOB_RETENTION / (24 * 3600),
+                              help="Keep done jobs that finished within this many days")
+    
+    sink_parser = subparsers.choices["smtp-sink"]
+    sink_parser.add_argument("--port", type=int, default=SMTP_PORT)
+
+    args = parser.parse_args(argv)
+    system = BookingSystem(args.db)
+    return COMMANDS[args.command](system, args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,391 @@
+"""
+Migrations - Versioned Database Schema Upgrades
+"""
+
+from time_slots import slot_to_minutes
+from capacity import occupancy_by_date
+from tables import repack
+
+CONFIRMED_BY_DATE = '''
+    SELECT date, time, party_size FROM bookings
+    WHERE status = 'confirmed'
+    ORDER BY date
+'''
+
+def rebuild_slot_occupancy(conn):
+    """
+    Recompute slot_occupancy from the confirmed bookings
+
+    Each party counts in every slot its dining duration covers.
+
+    Returns:
+        Number of occupied slots written
+    """
+    conn.execute('DELETE FROM slot_occupancy')
+    rows = list(occupancy_by_date(conn.execute(CONFIRMED_BY_DATE)))
+    conn.executemany(
+        'INSERT INTO slot_occupancy (date, time, seats_taken) VALUES (?, ?, ?)', rows
+    )
+    return len(rows)
+
+def rebuild_rollups(conn, since=None):
+    """
+    Recompute the reporting rollups from live and archived bookings
+
+    Args:
+        since: Only rebuild dates on or after this day (None for all)
+
+    Returns:
+        Number of slot rollup rows written
+    """
+    since = str(since or '')
+    conn.execute('DELETE FROM daily_slot_rollup WHERE date >= ?', (since,))
+    conn.execute('DELETE FROM daily_party_size_rollup WHERE date >= ?', (since,))
+    all_bookings = '''
+        SELECT date, time, party_size, status FROM bookings WHERE date >= ?
+        UNION ALL
+        SELECT date, time, party_size, status FROM bookings_archive WHERE date >= ?
+    '''
+    cursor = conn.execute(f'''
+        INSERT INTO daily_slot_rollup (date, time, covers, bookings, cancellations)
+        SELECT date, time,
+               SUM(CASE WHEN status = 'confirmed' THEN party_size ELSE 0 END),
+               SUM(status = 'confirmed'),
+               SUM(status = 'cancelled')
+        FROM ({all_bookings})
+        GROUP BY date, time
+    ''', (since, since))
+    conn.execute(f'''
+        INSERT INTO daily_party_size_rollup (date, party_size, bookings)
+        SELECT date, party_size, COUNT(*)
+        FROM ({all_bookings})
+        WHERE status = 'confirmed'
+        GROUP BY date, party_size
+    ''', (since, since))
+    return cursor.rowcount
+
+def _assign_existing_tables(conn):
+    """Seat every confirmed booking at concrete tables, one day at a time"""
+    dates = [row[0] for row in conn.execute(
+        "SELECT DISTINCT date FROM bookings WHERE status = 'confirmed'"
+    )]
+    for date in dates:
+        schedule, _ = repack(conn.execute('''
+            SELECT id, time, party_size FROM bookings
+            WHERE date = ? AND status = 'confirmed'
+        ''', (date,)))
+        conn.executemany(
+            'INSERT INTO table_assignments (booking_id, table_id, date, start_time, end_time) VALUES (?, ?, ?, ?, ?)',
+            [(booking_id, table_id, date, start, end)
+             for booking_id, table_id, start, end in schedule.assignments()]
+        )
+
+def _encode_slot_times(conn):
+    """Rebuild bookings and slot_occupancy with integer minute times"""
+    conn.create_function("slot_minutes", 1, slot_to_minutes, deterministic=True)
+    sequence = conn.execute(
+        "SELECT seq FROM sqlite_sequence WHERE name = 'bookings'"
+    ).fetchone()
+
+    conn.execute('''
+        CREATE TABLE bookings_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            customer_name TEXT NOT NULL,
+            email TEXT NOT NULL,
+            phone TEXT NOT NULL,
+            date TEXT NOT NULL,
+            time INTEGER NOT NULL,
+            party_size INTEGER NOT NULL,
+            special_requests TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            status TEXT DEFAULT 'confirmed'
+        )
+    ''')
+    conn.execute('''
+        INSERT INTO bookings_new
+        SELECT id, customer_name, email, phone, date, slot_minutes(time),
+               party_size, special_requests, created_at, status
+        FROM bookings
+    ''')
+    conn.execute('DROP TABLE bookings')
+    conn.execute('ALTER TABLE bookings_new RENAME TO bookings')
+    if sequence:
+        conn.execute(
+            "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'bookings'", sequence
+        )
+
+    conn.execute('CREATE INDEX idx_bookings_slot ON bookings (date, time, status, party_size)')
+    conn.execute('CREATE INDEX idx_bookings_email ON bookings (email, date, time)')
+    conn.execute('CREATE INDEX idx_bookings_date_time ON bookings (date, time)')
+
+    conn.execute('DROP TABLE slot_occupancy')
+    conn.execute('''
+        CREATE TABLE slot_occupancy (
+            date TEXT NOT NULL,
+            time INTEGER NOT NULL,
+            seats_taken INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (date, time)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        INSERT INTO slot_occupancy (date, time, seats_taken)
+        SELECT date, time, SUM(party_size) FROM bookings
+        WHERE status = 'confirmed'
+        GROUP BY date, time
+    ''')
+
+# Each migration is (version, description, steps). A step is either an SQL
+# statement or a callable taking the open connection. Migrations are applied
+# in order and recorded in schema_version, so existing database files are
+# upgraded in place the next time the app starts.
+MIGRATIONS = [
+    (1, "Create bookings table", [
+        '''
+        CREATE TABLE IF NOT EXISTS bookings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            customer_name TEXT NOT NULL,
+            email TEXT NOT NULL,
+            phone TEXT NOT NULL,
+            date TEXT NOT NULL,
+            time TEXT NOT NULL,
+            party_size INTEGER NOT NULL,
+            special_requests TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            status TEXT DEFAULT 'confirmed'
+        )
+        '''
+    ]),
+    (2, "Index hot availability and email lookups", [
+        # Covers check_availability (date, time, status) and the GROUP BY
+        # time in get_available_slots without touching the table rows
+        '''
+        CREATE INDEX IF NOT EXISTS idx_bookings_slot
+        ON bookings (date, time, status, party_size)
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_bookings_email
+        ON bookings (email, date, time)
+        '''
+    ]),
+    (3, "Materialize per-slot occupancy counters", [
+        '''
+        CREATE TABLE IF NOT EXISTS slot_occupancy (
+            date TEXT NOT NULL,
+            time TEXT NOT NULL,
+            seats_taken INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (date, time)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        INSERT OR REPLACE INTO slot_occupancy (date, time, seats_taken)
+        SELECT date, time, SUM(party_size) FROM bookings
+        WHERE status = 'confirmed'
+        GROUP BY date, time
+        '''
+    ]),
+    (4, "Index keyset pagination order", [
+        # The implicit trailing rowid makes this a (date, time, id) index
+        '''
+        CREATE INDEX IF NOT EXISTS idx_bookings_date_time
+        ON bookings (date, time)
+        '''
+    ]),
+    (5, "Store slot times as minutes since midnight", [_encode_slot_times]),
+    (6, "Create bookings archive for past reservations", [
+        '''
+        CREATE TABLE IF NOT EXISTS bookings_archive (
+            id INTEGER PRIMARY KEY,
+            customer_name TEXT NOT NULL,
+            email TEXT NOT NULL,
+            phone TEXT NOT NULL,
+            date TEXT NOT NULL,
+            time INTEGER NOT NULL,
+            party_size INTEGER NOT NULL,
+            special_requests TEXT,
+            created_at TIMESTAMP,
+            status TEXT,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_bookings_archive_email
+        ON bookings_archive (email, date, time)
+        '''
+    ]),
+    (7, "Record idempotency keys for booking submissions", [
+        '''
+        CREATE TABLE IF NOT EXISTS booking_requests (
+            idempotency_key TEXT PRIMARY KEY,
+            booking_id INTEGER NOT NULL,
+            response TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        '''
+    ]),
+    (8, "Count each party in every slot of its dining duration", [rebuild_slot_occupancy]),
+    (9, "Assign bookings to tables", [
+        '''
+        CREATE TABLE IF NOT EXISTS table_assignments (
+            booking_id INTEGER NOT NULL,
+            table_id TEXT NOT NULL,
+            date TEXT NOT NULL,
+            start_time INTEGER NOT NULL,
+            end_time INTEGER NOT NULL,
+            PRIMARY KEY (booking_id, table_id)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_table_assignments_date
+        ON table_assignments (date)
+        ''',
+        _assign_existing_tables
+    ]),
+    (10, "Create per-slot waitlist", [
+        '''
+        CREATE TABLE IF NOT EXISTS waitlist (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            customer_name TEXT NOT NULL,
+            email TEXT NOT NULL,
+            phone TEXT NOT NULL,
+            date TEXT NOT NULL,
+            time INTEGER NOT NULL,
+            party_size INTEGER NOT NULL,
+            special_requests TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            status TEXT NOT NULL DEFAULT 'waiting',
+            booking_id INTEGER
+        )
+        ''',
+        # Only waiting rows are indexed, so the head of each
+        # (slot, party size) queue is a single seek
+        '''
+        CREATE INDEX IF NOT EXISTS idx_waitlist_queue
+        ON waitlist (date, time, party_size, id)
+        WHERE status = 'waiting'
+        '''
+    ]),
+    (11, "Create daily reporting rollups", [
+        '''
+        CREATE TABLE IF NOT EXISTS daily_slot_rollup (
+            date TEXT NOT NULL,
+            time INTEGER NOT NULL,
+            covers INTEGER NOT NULL DEFAULT 0,
+            bookings INTEGER NOT NULL DEFAULT 0,
+            cancellations INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (date, time)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS daily_party_size_rollup (
+            date TEXT NOT NULL,
+            party_size INTEGER NOT NULL,
+            bookings INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (date, party_size)
+        ) WITHOUT ROWID
+        ''',
+        rebuild_rollups
+    ]),
+    (12, "Append-only booking event log and consumer offsets", [
+        '''
+        CREATE TABLE IF NOT EXISTS booking_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            booking_id INTEGER NOT NULL,
+            event_type TEXT NOT NULL,
+            date TEXT NOT NULL,
+            time INTEGER NOT NULL,
+            party_size INTEGER NOT NULL,
+            payload TEXT NOT NULL DEFAULT '{}',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS consumer_offsets (
+            consumer TEXT PRIMARY KEY,
+            last_event_id INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP
+        )
+        '''
+    ]),
+    (13, "Background job queue", [
+        '''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL,
+            run_at REAL NOT NULL,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL,
+            last_error TEXT
+        )
+        ''',
+        # Workers always look for the oldest due pending job
+        '''
+        CREATE INDEX IF NOT EXISTS idx_jobs_due
+        ON jobs (run_at, id)
+        WHERE status = 'pending'
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_jobs_status
+        ON jobs (status)
+        '''
+    ]),
+    (14, "One waiting waitlist entry per guest and slot", [
+        # Keep the earliest of any duplicates so their place in the queue holds
+        '''
+        UPDATE waitlist SET status = 'withdrawn'
+        WHERE status = 'waiting' AND id NOT IN (
+            SELECT MIN(id) FROM waitlist WHERE status = 'waiting' GROUP BY email, date, time
+        )
+        ''',
+        '''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_waitlist_waiting_guest
+        ON waitlist (email, date, time)
+        WHERE status = 'waiting'
+        '''
+    ]),
+]
+
+def get_schema_version(conn):
+    """Return the highest applied migration version"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    row = conn.execute('SELECT MAX(version) FROM schema_version').fetchone()
+    return row[0] or 0
+
+def migrate(conn):
+    """
+    Apply pending migrations on an open connection
+
+    Must be called inside a write transaction so concurrent app processes
+    cannot apply the same migration twice.
+
+    Returns:
+        List of versions that were applied
+    """
+    current = get_schema_version(conn)
+    applied = []
+
+    for version, description, steps in MIGRATIONS:
+        if version <= current:
+            continue
+        for step in steps:
+            if callable(step):
+                step(conn)
+            else:
+                conn.execute(step)
+        conn.execute(
+            'INSERT INTO schema_version (version, description) VALUES (?, ?)',
+            (version, description)
+        )
+        applied.append(version)
+
+    return applied
@@ -0,0 +1,136 @@
+"""
+Notifications - Booking Confirmation Emails and a Local SMTP Sink
+"""
+
+from email.message import EmailMessage
+import smtplib
+import socketserver
+import threading
+from config import RESTAURANT_INFO, SMTP_HOST, SMTP_PORT, SMTP_TIMEOUT
+from events import BOOKING_CREATED, BOOKING_CANCELLED
+from time_slots import minutes_to_slot
+
+NOTIFICATION_JOB = "booking_notification"
+
+def build_notification(job):
+    """
+    Email for a booking notification job
+
+    Args:
+        job: dict with booking_id, event_type, date, time, party_size and
+             the booking event payload (customer_name, email, tables, ...)
+    """
+    name = RESTAURANT_INFO["name"]
+    when = f"{job['date']} at {minutes_to_slot(job['time'])}"
+    guests = f"{job['party_size']} guest{'s' if job['party_size'] != 1 else ''}"
+
+    message = EmailMessage()
+    message["From"] = RESTAURANT_INFO["email"]
+    message["To"] = job["email"]
+
+    if job["event_type"] == BOOKING_CREATED:
+        if job.get("waitlist_id"):
+            message["Subject"] = f"Good news: a table opened up at {name}"
+            intro = "A table has opened up and we've moved you off the waitlist."
+        else:
+            message["Subject"] = f"Your {name} reservation is confirmed"
+            intro = "Thank you for your reservation."
+        tables = ", ".join(job.get("tables") or [])
+        body = (
+            f"Hi {job['customer_name']},\n\n{intro}\n\n"
+            f"Reservation ID: {job['booking_id']}\n"
+            f"When: {when}\nParty: {guests}\n"
+            + (f"Table: {tables}\n" if tables else "")
+            + f"\nWe look forward to seeing you!\n{name}\n{RESTAURANT_INFO['phone']}\n"
+        )
+    elif job["event_type"] == BOOKING_CANCELLED:
+        message["Subject"] = f"Your {name} reservation has been cancelled"
+        body = (
+            f"Hi {job['customer_name']},\n\n"
+            f"Your reservation {job['booking_id']} for {guests} on {when} has been cancelled.\n\n"
+            f"We hope to welcome you another time.\n{name}\n{RESTAURANT_INFO['phone']}\n"
+        )
+    else:
+        raise ValueError(f"Unknown booking event type: {job['event_type']!r}")
+
+    message.set_content(body)
+    return message
+
+def send_booking_notification(job):
+    """Job handler: deliver a booking notification over SMTP"""
+    with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT) as smtp:
+        smtp.send_message(build_notification(job))
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough of RFC 5321 for smtplib.send_message()"""
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode("ascii"))
+
+    def handle(self):
+        self.reply("220 localhost Bella Vista SMTP sink")
+        mail_from, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("utf-8", "replace").strip()
+            verb = command[:4].upper()
+            if verb in ("HELO", "EHLO"):
+                self.reply("250 localhost")
+            elif verb == "MAIL":
+                mail_from, recipients = command.split(":", 1)[1].strip(), []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                recipients.append(command.split(":", 1)[1].strip())
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    data = self.rfile.readline()
+                    if not data or data in (b".\r\n", b".\n"):
+                        break
+                    lines.append(data[1:] if data.startswith(b"..") else data)
+                self.server.sink.received(mail_from, recipients, b"".join(lines))
+                self.reply("250 OK: queued")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            elif verb in ("RSET", "NOOP"):
+                self.reply("250 OK")
+            else:
+                self.reply("502 Command not implemented")
+
+class LocalSMTPSink:
+    """
+    In-process SMTP server that keeps every message instead of sending it.
+
+    Stand-in for a real mail server in tests and local development:
+
+        sink = LocalSMTPSink(port=1025).start()
+        ...
+        sink.messages  # [(mail_from, [recipients], raw bytes), ...]
+    """
+
+    def __init__(self, host="localhost", port=0):
+        self.messages = []
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer((host, port), _SMTPHandler)
+        self._server.daemon_threads = True
+        self._server.sink = self
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = None
+
+    def received(self, mail_from, recipients, data):
+        with self._lock:
+            self.messages.append((mail_from, recipients, data))
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="smtp-sink", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
@@ -228,21 +228,20 @@ CHEF_RECOMMENDATIONS = [
 
 def get_full_menu_text():
     """Generate formatted menu text for AI context"""
-    menu_text = "BELLA VISTA RESTAURANT MENU\n\n"
+    lines = ["BELLA VISTA RESTAURANT MENU", ""]
     
     for category, items in MENU_DATA.items():
-        menu_text += f"\n{category.upper()}\n" + "="*50 + "\n"
+        lines += ["", category.upper(), "="*50]
         for item in items:
-            menu_text += f"\n{item['name']} - ${item['price']}\n"
-            menu_text += f"  {item['description']}\n"
+            lines += ["", f"{item['name']} - ${item['price']}", f"  {item['description']}"]
             if item.get('dietary'):
-                menu_text += f"  Dietary: {', '.join(item['dietary'])}\n"
+                lines.append(f"  Dietary: {', '.join(item['dietary'])}")
             if item.get('popular'):
-                menu_text += "  ⭐ Popular Choice\n"
+                lines.append("  ⭐ Popular Choice")
             if item.get('chef_special'):
-                menu_text += "  👨‍🍳 Chef's Special\n"
+                lines.append("  👨‍🍳 Chef's Special")
     
-    return menu_text
+    return "\n".join(lines) + "\n"
 
 def search_menu(query):
     """Search menu items by name or description"""
@@ -0,0 +1,213 @@
+"""
+Availability Snapshot - Memory-mapped Seat Counts Shared Across Processes
+"""
+
+from contextlib import contextmanager
+from datetime import date as date_type
+import mmap
+import os
+import struct
+import threading
+import time
+import numpy as np
+from config import SNAPSHOT_DAYS, SNAPSHOT_MAX_AGE, SNAPSHOT_READ_RETRIES
+from time_slots import SLOT_MINUTES
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory file locks, run without a snapshot
+    fcntl = None
+
+MAGIC = b"BVAS"
+LAYOUT_VERSION = 1
+
+# File header: magic, layout version, days, slots, global generation
+HEADER = struct.Struct("<4sIIIQ")
+# Row header: row generation (odd while being written), date ordinal, padding, loaded_at
+ROW_HEADER = struct.Struct("<QiId")
+
+class AvailabilitySnapshot:
+    """
+    Fixed-layout date x slot array of seats taken, in an mmap'd file.
+
+    Every server process maps the same file. Dates live in a ring of
+    SNAPSHOT_DAYS rows (row = date ordinal % days), each stamped with its
+    date and load time. Writers serialise on an flock and bump the row's
+    generation to odd before writing and back to even afterwards; readers
+    take no lock and retry if the generation moved, so a read is a few
+    hundred bytes of memcpy with no database round trip. Rows older than
+    SNAPSHOT_MAX_AGE count as stale and callers fall back to SQLite, as do
+    rows that stay mid-write for SNAPSHOT_READ_RETRIES attempts (a writer
+    that died holding them); the next process to open the file or write
+    the row evens such a generation out again.
+    """
+
+    def __init__(self, path, days=SNAPSHOT_DAYS, slots=SLOT_MINUTES, max_age=SNAPSHOT_MAX_AGE,
+                 read_retries=SNAPSHOT_READ_RETRIES):
+        self.path = path
+        self.days = days
+        self.slots = list(slots)
+        self.max_age = max_age
+        self.read_retries = read_retries
+        self.hits = 0
+        self.misses = 0
+        self._row_size = ROW_HEADER.size + 4 * len(self.slots)
+        self._lock = threading.Lock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        size = HEADER.size + self.days * self._row_size
+
+        with self._file_lock():
+            if os.fstat(self._fd).st_size != size or not self._header_matches():
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, HEADER.pack(MAGIC, LAYOUT_VERSION, self.days, len(self.slots), 0), 0)
+            self._map = mmap.mmap(self._fd, size)
+            self._repair_torn_rows()
+
+    def _header_matches(self):
+        data = os.pread(self._fd, HEADER.size, 0)
+        if len(data) < HEADER.size:
+            return False
+        magic, version, days, slots, _ = HEADER.unpack(data)
+        return (magic, version, days, slots) == (MAGIC, LAYOUT_VERSION, self.days, len(self.slots))
+
+    def _repair_torn_rows(self):
+        """
+        Even out rows left at an odd generation by a writer that died
+        mid-write; their seats may be half written, so they are marked
+        stale. Caller holds the file lock, so no live writer is mid-row.
+        """
+        for index in range(self.days):
+            offset = HEADER.size + index * self._row_size
+            generation, row_ordinal, _, _ = ROW_HEADER.unpack_from(self._map, offset)
+            if generation % 2:
+                ROW_HEADER.pack_into(self._map, offset, generation + 1, row_ordinal, 0, 0.0)
+
+    @contextmanager
+    def _file_lock(self):
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _row(self, date):
+        """(date ordinal, byte offset of its row); raises ValueError for a malformed date"""
+        ordinal = date_type.fromisoformat(str(date)).toordinal()
+        return ordinal, HEADER.size + (ordinal % self.days) * self._row_size
+
+    @property
+    def generation(self):
+        """Total number of row writes since the file was created"""
+        return HEADER.unpack_from(self._map, 0)[4]
+
+    def row_generation(self, date):
+        """Generation of a date's row; pass it to store() to detect racing writers"""
+        _, offset = self._row(date)
+        return ROW_HEADER.unpack_from(self._map, offset)[0]
+
+    def read(self, date):
+        """
+        Seats taken per slot for a date
+
+        Returns:
+            dict of slot minutes -> seats, or None if the row is missing,
+            belongs to another date, is older than max_age or stays
+            mid-write for read_retries attempts
+        """
+        ordinal, offset = self._row(date)
+        for _ in range(self.read_retries):
+            generation, row_ordinal, _, loaded_at = ROW_HEADER.unpack_from(self._map, offset)
+            if generation % 2:
+                time.sleep(0)  # let the writer finish
+                continue
+            seats = np.frombuffer(
+                self._map, dtype="<i4", count=len(self.slots), offset=offset + ROW_HEADER.size
+            ).copy()
+            if ROW_HEADER.unpack_from(self._map, offset)[0] == generation:
+                break
+        else:
+            # The row never settled: treat it as a miss and let SQLite answer
+            self.misses += 1
+            return None
+
+        if row_ordinal != ordinal or time.time() - loaded_at > self.max_age:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {minutes: int(taken) for minutes, taken in zip(self.slots, seats) if taken}
+
+    def store(self, date, occupancy, expected_generation=None):
+        """
+        Publish a date's seat counts
+
+        Args:
+            occupancy: dict of slot minutes -> seats taken
+            expected_generation: Only write if the row is still at this
+                                 generation, so a slow reader cannot
+                                 overwrite a newer value from a writer
+
+        Returns:
+            True if the row was written
+        """
+        ordinal, offset = self._row(date)
+        seats = np.array([occupancy.get(minutes, 0) for minutes in self.slots], dtype="<i4")
+        with self._file_lock():
+            generation = ROW_HEADER.unpack_from(self._map, offset)[0]
+            if expected_generation is not None and generation != expected_generation:
+                return False
+            generation += generation % 2  # a torn row from a dead writer
+            ROW_HEADER.pack_into(self._map, offset, generation + 1, ordinal, 0, time.time())
+            self._map[offset + ROW_HEADER.size:offset + self._row_size] = seats.tobytes()
+            ROW_HEADER.pack_into(self._map, offset, generation + 2, ordinal, 0, time.time())
+            struct.pack_into("<Q", self._map, HEADER.size - 8, self.generation + 1)
+        return True
+
+    def invalidate(self, date):
+        """Mark a date's row stale so the next reader reloads it from SQLite"""
+        ordinal, offset = self._row(date)
+        with self._file_lock():
+            generation, row_ordinal, _, _ = ROW_HEADER.unpack_from(self._map, offset)
+            if row_ordinal == ordinal:
+                ROW_HEADER.pack_into(self._map, offset, generation + 2 - generation % 2, ordinal, 0, 0.0)
+
+    def clear(self):
+        """Mark every row stale"""
+        with self._file_lock():
+            for index in range(self.days):
+                offset = HEADER.size + index * self._row_size
+                generation, row_ordinal, _, _ = ROW_HEADER.unpack_from(self._map, offset)
+                ROW_HEADER.pack_into(self._map, offset, generation + 2 - generation % 2, row_ordinal, 0, 0.0)
+
+    def stats(self):
+        """Hit/miss counters for this process"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "generation": self.generation
+        }
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+def get_snapshot(db_name):
+    """
+    Get the process-wide availability snapshot for a database file
+
+    Returns None where advisory file locks are unavailable.
+    """
+    if fcntl is None:
+        return None
+    with _snapshots_lock:
+        snapshot = _snapshots.get(db_name)
+        if snapshot is None:
+            snapshot = AvailabilitySnapshot(f"{db_name}-availability.snap")
+            _snapshots[db_name] = snapshot
+        return snapshot
@@ -0,0 +1,738 @@
+"""
+Booking Storage - Storage Engine Interface and In-Memory Engine
+"""
+
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right, insort
+from collections import namedtuple
+from datetime import datetime
+from functools import lru_cache
+import heapq
+import threading
+import numpy as np
+import pandas as pd
+from config import MAX_PARTY_SIZE, MIN_PARTY_SIZE, RESTAURANT_INFO, BOOKING_SLOTS
+from time_slots import SLOT_MINUTES, slot_to_minutes, minutes_to_slot, is_booking_slot, slots_after
+from capacity import covered_slots, remaining_seats, overlapping_starts
+from tables import TableSchedule, repack
+from events import BookingEvent, BOOKING_CREATED, BOOKING_CANCELLED
+
+BOOKING_FIELDS = ("customer_name", "email", "phone", "date", "time", "party_size")
+BOOKING_COLUMNS = (
+    "id", "customer_name", "email", "phone", "date", "time",
+    "party_size", "special_requests", "created_at", "status"
+)
+KEYSET_COLUMNS = ("date", "time", "id")
+WAITLIST_COLUMNS = (
+    "id", "customer_name", "email", "phone", "date", "time",
+    "party_size", "special_requests", "created_at", "status", "booking_id"
+)
+
+PARTY_SIZE_MESSAGE = f"Party size must be between {MIN_PARTY_SIZE} and {MAX_PARTY_SIZE} guests."
+INVALID_SLOT_MESSAGE = "Please choose one of our available booking times."
+INVALID_DATE_MESSAGE = "Please give the date as YYYY-MM-DD."
+UNAVAILABLE_MESSAGE = "Sorry, this time slot is not available. Please choose another time."
+SLOT_OPEN_MESSAGE = "Good news: this time slot still has space, so you can book it directly."
+
+class Booking(namedtuple("Booking", BOOKING_COLUMNS)):
+    """Immutable booking row; a tuple subclass with no per-instance __dict__"""
+    __slots__ = ()
+
+    @property
+    def time_label(self):
+        """Display label for the stored minutes-since-midnight time"""
+        return minutes_to_slot(self.time)
+
+    def to_dict(self):
+        """Plain dict for the UI and JSON serialisation, with a display time"""
+        data = dict(zip(self._fields, self))
+        data["time"] = self.time_label
+        return data
+
+class WaitlistEntry(namedtuple("WaitlistEntry", WAITLIST_COLUMNS)):
+    """Immutable waitlist row; status is 'waiting', 'promoted' or 'withdrawn'"""
+    __slots__ = ()
+
+    @property
+    def time_label(self):
+        """Display label for the stored minutes-since-midnight time"""
+        return minutes_to_slot(self.time)
+
+    def to_dict(self):
+        """Plain dict for the UI and JSON serialisation, with a display time"""
+        data = dict(zip(self._fields, self))
+        data["time"] = self.time_label
+        return data
+
+@lru_cache(maxsize=None)
+def booking_record_type(columns):
+    """Named-tuple record class for a selection of booking columns"""
+    if columns == BOOKING_COLUMNS:
+        return Booking
+    return namedtuple("BookingRecord", columns)
+
+def check_booking_columns(columns):
+    """Validated tuple of booking columns (all of them if none are given); raises ValueError"""
+    columns = tuple(columns or BOOKING_COLUMNS)
+    unknown = set(columns) - set(BOOKING_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown booking column(s): {', '.join(sorted(unknown))}")
+    return columns
+
+def parse_slot(time):
+    """Minutes for a configured booking slot, or None if it is not one"""
+    try:
+        minutes = slot_to_minutes(time)
+    except ValueError:
+        return None
+    return minutes if is_booking_slot(minutes) else None
+
+def booking_confirmed(booking_id, tables=None):
+    result = {
+        "success": True,
+        "booking_id": booking_id,
+        "message": f"Booking confirmed! Your reservation ID is {booking_id}."
+    }
+    if tables:
+        result["tables"] = list(tables)
+    return result
+
+def booking_rejected(message):
+    return {"success": False, "message": message}
+
+def booking_skipped(status):
+    """Bulk-import result for a row that is not a live booking (e.g. cancelled)"""
+    result = booking_rejected(f"Skipped {status} booking.")
+    result["skipped"] = True
+    return result
+
+def whole_party_size(value):
+    """Party size as an int, or 0 (always rejected) if it is not a whole number"""
+    if isinstance(value, bool):
+        return 0
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return 0
+    return int(number) if number.is_integer() else 0
+
+def booking_unavailable():
+    """Rejection for a full slot; the party may join the waitlist instead"""
+    result = booking_rejected(UNAVAILABLE_MESSAGE)
+    result["can_waitlist"] = True
+    return result
+
+def waitlist_joined(waitlist_id, date, time, already_waiting=False):
+    result = {
+        "success": True,
+        "waitlist_id": waitlist_id,
+        "message": f"You're on the waitlist for {minutes_to_slot(time)} on {date}. "
+                   f"Your waitlist ID is {waitlist_id}; we'll book you in as soon as a table frees up."
+    }
+    if already_waiting:
+        result["already_waiting"] = True
+        result["message"] = f"You're already on the waitlist for {minutes_to_slot(time)} on {date}. " \
+                            f"Your waitlist ID is {waitlist_id}."
+    return result
+
+class BookingStore(ABC):
+    """
+    Storage engine interface for reservations.
+
+    Engines implement create, get, list, cancel and the per-date slot
+    occupancy and table schedule lookups; availability queries are built
+    on top of those here.
+    """
+
+    @abstractmethod
+    def create_booking(self, customer_name, email, phone, date, time, party_size, special_requests="",
+                       idempotency_key=None):
+        """Atomically check capacity and insert a booking; returns a result dict"""
+
+    @abstractmethod
+    def get_booking(self, booking_id):
+        """Booking record for an id, or None"""
+
+    @abstractmethod
+    def get_bookings_by_email(self, email):
+        """Booking records for an email, newest first"""
+
+    @abstractmethod
+    def get_bookings_page(self, after=None, limit=50, date=None, columns=None, descending=False):
+        """One keyset page of records in (date, time, id) order and the next cursor"""
+
+    @abstractmethod
+    def cancel_booking(self, booking_id):
+        """Cancel a booking and release its seats; returns a result dict"""
+
+    @abstractmethod
+    def join_waitlist(self, customer_name, email, phone, date, time, party_size, special_requests=""):
+        """Queue a party for a full slot, once per email and slot; returns a result dict"""
+
+    @abstractmethod
+    def leave_waitlist(self, waitlist_id):
+        """Withdraw a waiting party; returns a result dict"""
+
+    @abstractmethod
+    def get_waitlist(self, date, time=None):
+        """Waiting entries for a date (optionally one slot) in (time, arrival) order"""
+
+    @abstractmethod
+    def read_events(self, after_id=0, limit=100):
+        """Booking events with id > after_id, oldest first"""
+
+    @abstractmethod
+    def get_consumer_offset(self, consumer):
+        """Last event id committed by a named consumer (0 if none)"""
+
+    @abstractmethod
+    def commit_consumer_offset(self, consumer, event_id):
+        """Durably advance a named consumer's offset"""
+
+    @abstractmethod
+    def get_booking_tables(self, booking_id):
+        """Table ids assigned to a booking"""
+
+    @abstractmethod
+    def repack_tables(self, date):
+        """Re-assign a day's confirmed bookings to tables; returns a result dict"""
+
+    @abstractmethod
+    def _slot_occupancy(self, date):
+        """Seats occupied per slot (minutes -> seats) for a date, across each party's whole stay"""
+
+    @abstractmethod
+    def _table_schedule(self, date):
+        """TableSchedule of the confirmed bookings on a date; callers must not modify it"""
+
+    @abstractmethod
+    def _rollup_rows(self, start_date, end_date):
+        """(date, time, covers, bookings, cancellations) slot rollups for a date range"""
+
+    @abstractmethod
+    def _party_size_rows(self, start_date, end_date):
+        """(date, party_size, bookings) rollups for a date range"""
+
+    def _capacity(self):
+        """Total seats available per time slot"""
+        return RESTAURANT_INFO.get('capacity', 100)
+
+    def _validate_request(self, time, party_size):
+        """
+        Validate party size and time slot
+
+        Returns:
+            (minutes, None) when valid, otherwise (None, rejection result)
+        """
+        if party_size < MIN_PARTY_SIZE or party_size > MAX_PARTY_SIZE:
+            return None, booking_rejected(PARTY_SIZE_MESSAGE)
+
+        minutes = parse_slot(time)
+        if minutes is None:
+            return None, booking_rejected(INVALID_SLOT_MESSAGE)
+        return minutes, None
+
+    def _promote_waitlist(self, occupancy, schedule, starts, head, promote):
+        """
+        Seat waiting parties in capacity that was just freed
+
+        For each start slot whose stays overlap the freed seats, the largest
+        party size that now fits and has someone waiting is served first,
+        earliest arrival within that size, until nobody else fits. Finding
+        the next party costs one queue-head lookup per party size that fits.
+
+        Args:
+            occupancy: Slot counters for the date; promote() must update them
+            schedule: TableSchedule for the date; promote() must update it
+            starts: Candidate start slots (minutes)
+            head: head(start, party_size) -> earliest waiting entry or None
+            promote: promote(entry, tables) -> id of the new booking
+
+        Returns:
+            List of promoted booking ids
+        """
+        capacity = self._capacity()
+        promoted = []
+        for start in starts:
+            while True:
+                for party_size in range(MAX_PARTY_SIZE, MIN_PARTY_SIZE - 1, -1):
+                    if remaining_seats(occupancy, start, party_size, capacity) < party_size:
+                        continue
+                    tables = schedule.find(party_size, start)
+                    if tables is None:
+                        continue
+                    entry = head(start, party_size)
+                    if entry is not None:
+                        break
+                else:
+                    break
+                promoted.append(promote(entry, tables))
+        return promoted
+
+    def check_availability(self, date, time, party_size):
+        """Check if a time slot is available"""
+        time = parse_slot(time)
+        if time is None:
+            return False
+
+        occupancy = self._slot_occupancy(str(date))
+        if remaining_seats(occupancy, time, party_size, self._capacity()) < party_size:
+            return False
+
+        return self._table_schedule(str(date)).find(party_size, time) is not None
+
+    def get_available_slots(self, date, party_size=MIN_PARTY_SIZE):
+        """
+        Get available time slots for a date
+
+        A slot is listed when the party can be seated there for its whole
+        dining duration, at a table or combination of tables; available_seats
+        is the smallest number of free seats across the slots that stay
+        would cover.
+        """
+        booked_slots = self._slot_occupancy(str(date))
+        schedule = self._table_schedule(str(date))
+
+        capacity = self._capacity()
+        available_slots = []
+
+        for slot, minutes in zip(BOOKING_SLOTS, SLOT_MINUTES):
+            remaining_capacity = remaining_seats(booked_slots, minutes, party_size, capacity)
+
+            if remaining_capacity >= party_size and schedule.find(party_size, minutes) is not None:
+                available_slots.append({
+                    "time": slot,
+                    "minutes": minutes,
+                    "available_seats": remaining_capacity
+                })
+
+        return available_slots
+
+    def next_available_slot(self, date, after, party_size):
+        """
+        Find the first slot later than `after` that can seat the party
+
+        Returns:
+            dict like get_available_slots() entries, or None
+        """
+        after = slot_to_minutes(after)
+        booked_slots = self._slot_occupancy(str(date))
+        schedule = self._table_schedule(str(date))
+        capacity = self._capacity()
+
+        for minutes in slots_after(after):
+            remaining_capacity = remaining_seats(booked_slots, minutes, party_size, capacity)
+            if remaining_capacity >= party_size and schedule.find(party_size, minutes) is not None:
+                return {
+                    "time": minutes_to_slot(minutes),
+                    "minutes": minutes,
+                    "available_seats": remaining_capacity
+                }
+        return None
+
+    def iter_bookings(self, date=None, columns=None, batch_size=500, descending=False, after=None):
+        """
+        Stream bookings in (date, time, id) order with flat memory use
+
+        Yields:
+            Named-tuple records with the selected columns
+        """
+        cursor = after
+        while True:
+            records, cursor = self.get_bookings_page(
+                after=cursor, limit=batch_size, date=date,
+                columns=columns, descending=descending
+            )
+            yield from records
+            if cursor is None:
+                break
+
+    def _occupancy_rows(self, dates):
+        """(date, minutes, seats_taken) for every occupied slot on the given dates"""
+        for date in dates:
+            for minutes, seats_taken in self._slot_occupancy(date).items():
+                yield date, minutes, seats_taken
+
+    def get_availability_range(self, start_date, end_date):
+        """
+        Get available seats for every slot across a range of dates
+
+        Args:
+            start_date: First date (inclusive), date or 'YYYY-MM-DD'
+            end_date: Last date (inclusive), date or 'YYYY-MM-DD'
+
+        Returns:
+            DataFrame indexed by date with one column per booking slot,
+            holding the remaining seats in that slot
+        """
+        dates = pd.date_range(start_date, end_date).strftime('%Y-%m-%d')
+        rows = list(self._occupancy_rows(dates)) if len(dates) else []
+
+        occupancy = np.zeros((len(dates), len(BOOKING_SLOTS)), dtype=np.int64)
+        if rows:
+            booked = pd.DataFrame(rows, columns=['date', 'time', 'seats_taken'])
+            date_idx = dates.get_indexer(booked['date'])
+            slot_idx = pd.Index(SLOT_MINUTES).get_indexer(booked['time'])
+            known = (date_idx >= 0) & (slot_idx >= 0)
+            occupancy[date_idx[known], slot_idx[known]] = booked['seats_taken'].to_numpy()[known]
+
+        available = np.clip(self._capacity() - occupancy, 0, None)
+        return pd.DataFrame(
+            available,
+            index=pd.Index(dates, name='date'),
+            columns=pd.Index(BOOKING_SLOTS, name='time')
+        )
+
+    def get_slot_covers(self, start_date, end_date):
+        """
+        Confirmed covers per slot for a date range, read from the rollups
+
+        Returns:
+            DataFrame indexed by date with one column per booking slot
+        """
+        dates = pd.date_range(start_date, end_date).strftime('%Y-%m-%d')
+        covers = np.zeros((len(dates), len(BOOKING_SLOTS)), dtype=np.int64)
+        rows = list(self._rollup_rows(dates[0], dates[-1])) if len(dates) else []
+        if rows:
+            rollup = pd.DataFrame(rows, columns=['date', 'time', 'covers', 'bookings', 'cancellations'])
+            date_idx = dates.get_indexer(rollup['date'])
+            slot_idx = pd.Index(SLOT_MINUTES).get_indexer(rollup['time'])
+            known = (date_idx >= 0) & (slot_idx >= 0)
+            covers[date_idx[known], slot_idx[known]] = rollup['covers'].to_numpy()[known]
+
+        return pd.DataFrame(
+            covers,
+            index=pd.Index(dates, name='date'),
+            columns=pd.Index(BOOKING_SLOTS, name='time')
+        )
+
+    def get_daily_trends(self, start_date, end_date):
+        """
+        Daily covers, bookings and cancellations for a date range
+
+        Returns:
+            DataFrame indexed by every date in the range with covers,
+            bookings, cancellations and cancellation_rate columns
+        """
+        dates = pd.Index(pd.date_range(start_date, end_date).strftime('%Y-%m-%d'), name='date')
+        rows = list(self._rollup_rows(dates[0], dates[-1])) if len(dates) else []
+        rollup = pd.DataFrame(rows, columns=['date', 'time', 'covers', 'bookings', 'cancellations'])
+        daily = (
+            rollup.groupby('date')[['covers', 'bookings', 'cancellations']].sum()
+            .reindex(dates, fill_value=0)
+            .astype(np.int64)
+        )
+        requested = daily['bookings'] + daily['cancellations']
+        daily['cancellation_rate'] = (daily['cancellations'] / requested.where(requested > 0)).fillna(0.0)
+        return daily
+
+    def get_party_size_histogram(self, start_date, end_date):
+        """Confirmed bookings per party size over a date range, as a Series"""
+        start, end = str(pd.Timestamp(start_date).date()), str(pd.Timestamp(end_date).date())
+        counts = pd.DataFrame(
+            list(self._party_size_rows(start, end)), columns=['date', 'party_size', 'bookings']
+        ).groupby('party_size')['bookings'].sum()
+        return counts.reindex(range(MIN_PARTY_SIZE, MAX_PARTY_SIZE + 1), fill_value=0).astype(np.int64)
+
+class InMemoryBookingStore(BookingStore):
+    """
+    Pure in-memory engine for tests and load testing.
+
+    Bookings live in a dict keyed by id, with a sorted (date, time, id)
+    index for keyset pagination, a per-email id index, per-date slot
+    counters and table schedules. Waiting parties sit in one min-heap of
+    arrival ids per (date, time, party size), with each guest's latest
+    entry per slot indexed by (email, date, time) so a repeat request
+    returns it; the event log is a list whose positions are the event ids.
+    A single lock makes check-and-insert atomic.
+    """
+
+    def __init__(self):
+        self._bookings = {}
+        self._keys = []
+        self._by_email = {}
+        self._occupancy = {}
+        self._tables = {}
+        self._requests = {}
+        self._waitlist = {}
+        self._waiting = {}
+        self._waiting_guests = {}
+        self._rollup = {}
+        self._party_sizes = {}
+        self._events = []
+        self._offsets = {}
+        self._next_id = 1
+        self._next_waitlist_id = 1
+        self._lock = threading.RLock()
+
+    def create_booking(self, customer_name, email, phone, date, time, party_size, special_requests="",
+                       idempotency_key=None):
+        """Create a new booking"""
+        with self._lock:
+            if idempotency_key and idempotency_key in self._requests:
+                return dict(self._requests[idempotency_key])
+
+            time, rejection = self._validate_request(time, party_size)
+            if rejection:
+                return rejection
+
+            date = str(date)
+            slots = self._occupancy.setdefault(date, {})
+            schedule = self._tables.setdefault(date, TableSchedule())
+            tables = schedule.find(party_size, time)
+            if remaining_seats(slots, time, party_size, self._capacity()) < party_size or tables is None:
+                return booking_unavailable()
+
+            booking_id = self._insert_booking(
+                customer_name, email, phone, date, time, party_size, special_requests, tables
+            )
+            result = booking_confirmed(booking_id, tables)
+            if idempotency_key:
+                self._requests[idempotency_key] = dict(result)
+            return result
+
+    def _insert_booking(self, customer_name, email, phone, date, time, party_size, special_requests, tables,
+                        waitlist_id=None):
+        """Store a booking that already passed the capacity checks; caller holds the lock"""
+        slots = self._occupancy.setdefault(date, {})
+        for minutes in covered_slots(time, party_size):
+            slots[minutes] = slots.get(minutes, 0) + party_size
+
+        booking_id = self._next_id
+        self._next_id += 1
+        self._tables.setdefault(date, TableSchedule()).assign(booking_id, party_size, time, tables)
+        booking = Booking(
+            booking_id, customer_name, email, phone, date, time, party_size,
+            special_requests, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 'confirmed'
+        )
+        self._bookings[booking_id] = booking
+        insort(self._keys, (date, time, booking_id))
+        self._by_email.setdefault(email, []).append(booking_id)
+        self._count_rollup(date, time, party_size, 1)
+        self._append_event(booking_id, BOOKING_CREATED, date, time, party_size, {
+            "customer_name": customer_name, "email": email, "phone": phone,
+            "special_requests": special_requests, "tables": list(tables), "waitlist_id": waitlist_id
+        })
+        return booking_id
+
+    def _append_event(self, booking_id, event_type, date, time, party_size, payload):
+        """Append to the event log; caller holds the lock"""
+        self._events.append(BookingEvent(
+            len(self._events) + 1, booking_id, event_type, date, time, party_size, payload,
+            datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        ))
+
+    def _count_rollup(self, date, time, party_size, sign):
+        """Apply a confirmation (+1) or cancellation (-1) to the rollups"""
+        counters = self._rollup.setdefault((date, time), [0, 0, 0])
+        counters[0] += sign * party_size
+        counters[1] += sign
+        if sign < 0:
+            counters[2] += 1
+        self._party_sizes[(date, party_size)] = self._party_sizes.get((date, party_size), 0) + sign
+
+    def get_booking(self, booking_id):
+        """Retrieve a booking by ID"""
+        return self._bookings.get(booking_id)
+
+    def get_bookings_by_email(self, email):
+        """Get all bookings for an email"""
+        with self._lock:
+            bookings = [self._bookings[i] for i in self._by_email.get(email, [])]
+        return sorted(bookings, key=lambda b: (b.date, b.time), reverse=True)
+
+    def get_bookings_page(self, after=None, limit=50, date=None, columns=None, descending=False):
+        """Fetch one page of bookings using keyset pagination on (date, time, id)"""
+        columns = check_booking_columns(columns)
+        record_type = booking_record_type(columns)
+        positions = [BOOKING_COLUMNS.index(c) for c in columns]
+
+        with self._lock:
+            if date is not None:
+                date = str(date)
+                low = bisect_left(self._keys, (date,))
+                high = bisect_left(self._keys, (date + "\0",))
+            else:
+                low, high = 0, len(self._keys)
+
+            if after:
+                after = tuple(after)
+                if descending:
+                    high = min(high, bisect_left(self._keys, after))
+                else:
+                    low = max(low, bisect_right(self._keys, after))
+
+            if descending:
+                keys = self._keys[max(low, high - limit):high][::-1]
+            else:
+                keys = self._keys[low:min(high, low + limit)]
+            bookings = [self._bookings[key[2]] for key in keys]
+
+        records = [record_type._make(booking[i] for i in positions) for booking in bookings]
+        next_cursor = keys[-1] if len(keys) == limit else None
+        return records, next_cursor
+
+    def cancel_booking(self, booking_id):
+        """Cancel a booking"""
+        with self._lock:
+            booking = self._bookings.get(booking_id)
+            if booking is None:
+                return {"success": False, "message": "Booking not found."}
+
+            if booking.status == 'confirmed':
+                slots = self._occupancy.get(booking.date, {})
+                for minutes in covered_slots(booking.time, booking.party_size):
+                    slots[minutes] = max(slots.get(minutes, 0) - booking.party_size, 0)
+                self._tables[booking.date].release(booking_id)
+                self._count_rollup(booking.date, booking.time, booking.party_size, -1)
+                self._append_event(booking_id, BOOKING_CANCELLED, booking.date, booking.time, booking.party_size, {
+                    "customer_name": booking.customer_name, "email": booking.email, "phone": booking.phone
+                })
+            self._bookings[booking_id] = booking._replace(status='cancelled')
+
+            promoted = []
+            if booking.status == 'confirmed':
+                promoted = self._promote_waitlist(
+                    self._occupancy[booking.date], self._tables[booking.date],
+                    overlapping_starts(booking.time, booking.party_size),
+                    lambda start, party_size: self._waitlist_head(booking.date, start, party_size),
+                    self._promote_entry
+                )
+
+        result = {"success": True, "message": f"Booking {booking_id} has been cancelled."}
+        if promoted:
+            result["promoted"] = promoted
+        return result
+
+    def join_waitlist(self, customer_name, email, phone, date, time, party_size, special_requests=""):
+        """Add a party to the waitlist for a slot, or return the guest's entry if already waiting"""
+        time, rejection = self._validate_request(time, party_size)
+        if rejection:
+            return rejection
+        if self.check_availability(date, time, party_size):
+            return booking_rejected(SLOT_OPEN_MESSAGE)
+
+        with self._lock:
+            date = str(date)
+            existing = self._waitlist.get(self._waiting_guests.get((email, date, time)))
+            if existing is not None and existing.status == 'waiting':
+                return waitlist_joined(existing.id, date, time, already_waiting=True)
+
+            waitlist_id = self._next_waitlist_id
+            self._next_waitlist_id += 1
+            self._waiting_guests[(email, date, time)] = waitlist_id
+            self._waitlist[waitlist_id] = WaitlistEntry(
+                waitlist_id, customer_name, email, phone, date, time, party_size, special_requests,
+                datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 'waiting', None
+            )
+            heapq.heappush(self._waiting.setdefault((date, time, party_size), []), waitlist_id)
+        return waitlist_joined(waitlist_id, date, time)
+
+    def leave_waitlist(self, waitlist_id):
+        """Withdraw a waiting party; its heap slot is discarded lazily"""
+        with self._lock:
+            entry = self._waitlist.get(waitlist_id)
+            if entry is None or entry.status != 'waiting':
+                return {"success": False, "message": "Waitlist entry not found."}
+            self._waitlist[waitlist_id] = entry._replace(status='withdrawn')
+        return {"success": True, "message": f"Waitlist entry {waitlist_id} has been withdrawn."}
+
+    def get_waitlist(self, date, time=None):
+        """Waiting entries for a date, optionally for one slot"""
+        date = str(date)
+        time = None if time is None else slot_to_minutes(time)
+        with self._lock:
+            entries = [
+                entry for entry in self._waitlist.values()
+                if entry.status == 'waiting' and entry.date == date and time in (None, entry.time)
+            ]
+        return sorted(entries, key=lambda entry: (entry.time, entry.id))
+
+    def _waitlist_head(self, date, time, party_size):
+        """Earliest waiting entry of a size for a slot, dropping withdrawn ids on the way"""
+        heap = self._waiting.get((date, time, party_size))
+        while heap:
+            entry = self._waitlist[heap[0]]
+            if entry.status == 'waiting':
+                return entry
+            heapq.heappop(heap)
+        return None
+
+    def _promote_entry(self, entry, tables):
+        """Book a waiting party at the head of its queue; caller holds the lock"""
+        heapq.heappop(self._waiting[(entry.date, entry.time, entry.party_size)])
+        booking_id = self._insert_booking(
+            entry.customer_name, entry.email, entry.phone, entry.date, entry.time,
+            entry.party_size, entry.special_requests, tables, waitlist_id=entry.id
+        )
+        self._waitlist[entry.id] = entry._replace(status='promoted', booking_id=booking_id)
+        return booking_id
+
+    def _slot_occupancy(self, date):
+        """Seats taken per time slot for a date"""
+        with self._lock:
+            return dict(self._occupancy.get(str(date), {}))
+
+    def _table_schedule(self, date):
+        """Table schedule for a date"""
+        return self._tables.get(str(date)) or TableSchedule()
+
+    def get_booking_tables(self, booking_id):
+        """Table ids assigned to a booking"""
+        with self._lock:
+            booking = self._bookings.get(booking_id)
+            if booking is None or booking.date not in self._tables:
+                return []
+            return self._tables[booking.date].tables_for(booking_id)
+
+    def repack_tables(self, date):
+        """Re-assign a day's bookings to tables, keeping the result only if it seats everyone it did before"""
+        date = str(date)
+        with self._lock:
+            current = self._tables.get(date) or TableSchedule()
+            bookings = [
+                (booking.id, booking.time, booking.party_size)
+                for booking in (self._bookings[key[2]] for key in self._keys[
+                    bisect_left(self._keys, (date,)):bisect_left(self._keys, (date + "\0",))
+                ])
+                if booking.status == 'confirmed'
+            ]
+            schedule, unseated = repack(bookings)
+            previously_unseated = sum(1 for booking_id, _, _ in bookings if not current.tables_for(booking_id))
+            if len(unseated) > previously_unseated:
+                return {"success": False, "message": "Repacking would leave more parties without a table."}
+            self._tables[date] = schedule
+
+        return {"success": True, "message": f"Repacked {len(bookings)} booking(s) on {date}.",
+                "unseated": unseated}
+
+    def _rollup_rows(self, start_date, end_date):
+        """Slot rollups for a date range"""
+        with self._lock:
+            return [
+                (date, time, *counters) for (date, time), counters in self._rollup.items()
+                if start_date <= date <= end_date
+            ]
+
+    def _party_size_rows(self, start_date, end_date):
+        """Party-size rollups for a date range"""
+        with self._lock:
+            return [
+                (date, party_size, bookings) for (date, party_size), bookings in self._party_sizes.items()
+                if start_date <= date <= end_date
+            ]
+
+    def read_events(self, after_id=0, limit=100):
+        """Booking events with id > after_id, oldest first"""
+        with self._lock:
+            return self._events[after_id:after_id + limit]
+
+    def get_consumer_offset(self, consumer):
+        """Last event id committed by a named consumer (0 if none)"""
+        with self._lock:
+            return self._offsets.get(consumer, 0)
+
+    def commit_consumer_offset(self, consumer, event_id):
+        """Advance a named consumer's offset; offsets never move backwards"""
+        with self._lock:
+            self._offsets[consumer] = max(self._offsets.get(consumer, 0), event_id)
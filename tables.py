@@ -0,0 +1,134 @@
+"""
+Table Allocator - Table Inventory and Seat Assignment
+"""
+
+from bisect import bisect_left, insort
+from collections import namedtuple
+from config import TABLES, COMBINABLE_TABLES, MAX_PARTY_SIZE
+from capacity import dining_duration
+
+Table = namedtuple("Table", ("id", "seats"))
+
+TABLE_INVENTORY = {table_id: Table(table_id, seats) for table_id, seats in TABLES}
+
+def _seats(tables):
+    return sum(TABLE_INVENTORY[table_id].seats for table_id in tables)
+
+# Every single table and configured combination, tightest fit first
+SEATING_OPTIONS = sorted(
+    [(table_id,) for table_id in TABLE_INVENTORY] + [tuple(tables) for tables in COMBINABLE_TABLES],
+    key=lambda tables: (_seats(tables), len(tables))
+)
+
+# Seating options large enough for each party size, precomputed once
+_OPTIONS_BY_PARTY = {
+    party_size: [tables for tables in SEATING_OPTIONS if _seats(tables) >= party_size]
+    for party_size in range(1, MAX_PARTY_SIZE + 1)
+}
+
+def seating_options(party_size):
+    """Table choices that can seat a party, smallest total seats first"""
+    options = _OPTIONS_BY_PARTY.get(party_size)
+    if options is None:
+        options = [tables for tables in SEATING_OPTIONS if _seats(tables) >= party_size]
+    return options
+
+class TableSchedule:
+    """
+    Busy intervals of every table on one day.
+
+    Each table keeps its bookings as sorted, non-overlapping
+    (start, end, booking_id) intervals, so checking whether a table is free
+    for a stay is a bisect plus one comparison with each neighbour.
+    """
+
+    def __init__(self, rows=()):
+        self._busy = {table_id: [] for table_id in TABLE_INVENTORY}
+        self._assigned = {}
+        for booking_id, table_id, start, end in rows:
+            if table_id in self._busy:
+                self._add(booking_id, (table_id,), start, end)
+
+    def _add(self, booking_id, tables, start, end):
+        for table_id in tables:
+            insort(self._busy[table_id], (start, end, booking_id))
+        self._assigned.setdefault(booking_id, []).extend(tables)
+
+    def is_free(self, table_id, start, end):
+        """True if the table has no booking overlapping [start, end)"""
+        intervals = self._busy[table_id]
+        index = bisect_left(intervals, (start,))
+        if index < len(intervals) and intervals[index][0] < end:
+            return False
+        return not (index and intervals[index - 1][1] > start)
+
+    def find(self, party_size, start):
+        """
+        Best-fitting free tables for a party seated at `start`
+
+        Returns:
+            Tuple of table ids, or None if no option is free for the whole stay
+        """
+        end = start + dining_duration(party_size)
+        for tables in seating_options(party_size):
+            if all(self.is_free(table_id, start, end) for table_id in tables):
+                return tables
+        return None
+
+    def assign(self, booking_id, party_size, start, tables):
+        """
+        Record a booking on its tables
+
+        Returns:
+            (table_id, start, end) rows for persisting the assignment
+        """
+        end = start + dining_duration(party_size)
+        self._add(booking_id, tables, start, end)
+        return [(table_id, start, end) for table_id in tables]
+
+    def allocate(self, booking_id, party_size, start):
+        """Find and assign tables for a booking; returns the table ids or None"""
+        tables = self.find(party_size, start)
+        if tables is not None:
+            self.assign(booking_id, party_size, start, tables)
+        return tables
+
+    def release(self, booking_id):
+        """Free the tables held by a booking"""
+        for table_id in self._assigned.pop(booking_id, ()):
+            self._busy[table_id] = [
+                interval for interval in self._busy[table_id] if interval[2] != booking_id
+            ]
+
+    def tables_for(self, booking_id):
+        """Table ids assigned to a booking"""
+        return list(self._assigned.get(booking_id, ()))
+
+    def assignments(self):
+        """(booking_id, table_id, start, end) for every assigned table"""
+        return [
+            (booking_id, table_id, start, end)
+            for table_id, intervals in self._busy.items()
+            for start, end, booking_id in intervals
+        ]
+
+def repack(bookings):
+    """
+    Re-assign a day's bookings from scratch to free up large tables
+
+    Parties are placed largest first, each on its tightest free option, so
+    small parties no longer sit on the big tables and combinations the
+    large parties need.
+
+    Args:
+        bookings: Iterable of (booking_id, start_minutes, party_size)
+
+    Returns:
+        (TableSchedule, list of booking ids that could not be seated)
+    """
+    schedule = TableSchedule()
+    unseated = []
+    for booking_id, start, party_size in sorted(bookings, key=lambda b: (-b[2], b[1], b[0])):
+        if schedule.allocate(booking_id, party_size, start) is None:
+            unseated.append(booking_id)
+    return schedule, unseated
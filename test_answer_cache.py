@@ -0,0 +1,49 @@
+"""
+Answer Cache Tests - Exact and Reworded Hits, Fingerprints and Eligibility
+"""
+
+import pytest
+from answer_cache import AnswerCache, is_cacheable
+
+@pytest.fixture
+def cache():
+    return AnswerCache(maxsize=8, ttl=None, similarity=0.85)
+
+def test_exact_hit_ignores_case_and_punctuation(cache):
+    cache.set("What time do you close on Sunday?", "At 9 PM.", "v1")
+    assert cache.get("what time do you close on sunday", "v1") == "At 9 PM."
+    assert cache.stats()["hits"] == 1
+
+def test_reworded_question_hits(cache):
+    cache.set("What time do you close on Sunday?", "At 9 PM.", "v1")
+    assert cache.get("Hey, what time do you close on Sunday please?", "v1") == "At 9 PM."
+    assert cache.get("What time do you open on Sunday?", "v1") is None
+    stats = cache.stats()
+    assert (stats["similar_hits"], stats["misses"]) == (1, 1)
+
+def test_new_fingerprint_empties_the_cache(cache):
+    cache.set("Do you have vegan options?", "Yes.", "v1")
+    assert cache.get("Do you have vegan options?", "v2") is None
+    assert cache.stats()["size"] == 0
+
+def test_similarity_zero_disables_fuzzy_matching():
+    cache = AnswerCache(maxsize=8, ttl=None, similarity=0)
+    cache.set("What time do you close on Sunday?", "At 9 PM.", "v1")
+    assert cache.get("Hey, what time do you close on Sunday please?", "v1") is None
+
+def test_least_recently_used_answers_are_evicted():
+    cache = AnswerCache(maxsize=2, ttl=None, similarity=0)
+    for n in range(3):
+        cache.set(f"question {n}", f"answer {n}", "v1")
+    assert cache.get("question 0", "v1") is None
+    assert cache.get("question 2", "v1") == "answer 2"
+
+@pytest.mark.parametrize("question, cacheable", [
+    ("What are your opening hours?", True),
+    ("Are you open tonight?", False),
+    ("Can I cancel my booking?", False),
+    ("", False),
+    (" ".join(["word"] * 30), False),
+])
+def test_only_general_questions_are_cacheable(question, cacheable):
+    assert is_cacheable(question) is cacheable
@@ -0,0 +1,80 @@
+"""
+Archive Tests - Batched Moves, Archive Lookups and Occupancy Reconciliation
+"""
+
+import pytest
+from booking_system import BookingSystem
+
+OLD_DATES = ["2020-01-04", "2020-01-04", "2020-01-05", "2020-02-01", "2020-03-01"]
+LIVE_DATE = "2030-06-01"
+CUTOFF = "2021-01-01"
+
+@pytest.fixture
+def system(tmp_path):
+    system = BookingSystem(str(tmp_path / "bookings.db"))
+    yield system
+    system.pool.close_all()
+
+def seed(system):
+    """Five bookings before the cutoff (one cancelled) and two after it; returns their ids"""
+    rows = [
+        {"customer_name": f"Guest {i}", "email": f"guest{i % 2}@example.com", "phone": "+1 555 0100",
+         "date": date, "time": "7:00 PM", "party_size": 2 + i}
+        for i, date in enumerate(OLD_DATES + [LIVE_DATE, LIVE_DATE])
+    ]
+    ids = [result["booking_id"] for result in system.create_bookings_bulk(rows)]
+    assert system.cancel_booking(ids[1])["success"]
+    return ids
+
+def count(system, query, *params):
+    with system.pool.connection() as conn:
+        return conn.execute(query, params).fetchone()[0]
+
+@pytest.mark.parametrize("batch_size", [1, 2, 5, 6])
+def test_archive_moves_every_old_booking_in_batches(system, batch_size):
+    ids = seed(system)
+
+    assert system.archive_bookings(before=CUTOFF, batch_size=batch_size) == len(OLD_DATES)
+    assert count(system, "SELECT COUNT(*) FROM bookings WHERE date < ?", CUTOFF) == 0
+    assert count(system, "SELECT COUNT(*) FROM bookings_archive") == len(OLD_DATES)
+    assert [b.id for b in system.iter_bookings()] == ids[len(OLD_DATES):]
+
+    # Nothing left to move
+    assert system.archive_bookings(before=CUTOFF, batch_size=batch_size) == 0
+
+def test_max_batches_stops_early_and_resumes_in_date_order(system):
+    ids = seed(system)
+
+    assert system.archive_bookings(before=CUTOFF, batch_size=2, max_batches=1) == 2
+    with system.pool.connection() as conn:
+        assert [row[0] for row in conn.execute("SELECT id FROM bookings_archive ORDER BY id")] == ids[:2]
+    assert system.archive_bookings(before=CUTOFF, batch_size=2, max_batches=1) == 2
+    assert system.archive_bookings(before=CUTOFF, batch_size=2) == 1
+
+def test_lookups_fall_through_to_the_archive(system):
+    ids = seed(system)
+    system.archive_bookings(before=CUTOFF, batch_size=2)
+
+    archived = system.get_booking(ids[0])
+    assert (archived.id, archived.date, archived.party_size, archived.status) == (ids[0], OLD_DATES[0], 2, "confirmed")
+    assert system.get_booking(ids[1]).status == "cancelled"
+    assert system.get_booking(ids[-1]).date == LIVE_DATE
+    assert system.get_booking(max(ids) + 1) is None
+
+    # Live and archived bookings together, newest first
+    by_email = system.get_bookings_by_email("guest0@example.com")
+    assert [b.id for b in by_email] == [ids[6], ids[4], ids[2], ids[0]]
+
+def test_archiving_releases_seats_and_tables(system):
+    ids = seed(system)
+    live_seats = system._slot_occupancy(LIVE_DATE)
+    system._slot_occupancy(OLD_DATES[0])  # warm the cached row that archiving must refresh
+
+    system.archive_bookings(before=CUTOFF, batch_size=2)
+
+    assert system.verify_occupancy() == []
+    assert count(system, "SELECT COUNT(*) FROM slot_occupancy WHERE date < ?", CUTOFF) == 0
+    assert count(system, "SELECT COUNT(*) FROM table_assignments WHERE date < ?", CUTOFF) == 0
+    assert not any(system._slot_occupancy(OLD_DATES[0]).values())
+    assert system._slot_occupancy(LIVE_DATE) == live_seats
+    assert system.get_booking_tables(ids[-1])
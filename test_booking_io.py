@@ -0,0 +1,102 @@
+"""
+Booking Import/Export Tests - Bulk Validation, Ids and Round Trips
+"""
+
+import json
+import pytest
+from booking_system import BookingSystem
+from booking_io import import_bookings, export_bookings
+from storage import PARTY_SIZE_MESSAGE, INVALID_DATE_MESSAGE
+
+DATE = "2030-06-01"
+
+@pytest.fixture
+def system(tmp_path):
+    system = BookingSystem(str(tmp_path / "bookings.db"))
+    yield system
+    system.pool.close_all()
+
+def row(i, date=DATE, time="7:00 PM", party_size=2, **extra):
+    return {
+        "customer_name": f"Guest {i}", "email": f"guest{i}@example.com", "phone": "+1 555 0100",
+        "date": date, "time": time, "party_size": party_size, **extra
+    }
+
+def test_bulk_ids_follow_the_last_assigned_id(system):
+    first = system.create_booking("Guest 0", "guest0@example.com", "+1 555 0100", DATE, "6:00 PM", 2)
+    assert system.cancel_booking(first["booking_id"])["success"]
+
+    results = system.create_bookings_bulk([row(1), row(2, party_size=99), row(3), row(4)])
+
+    # The rejected row does not consume an id; the accepted ones follow the cancelled booking's
+    ids = [result.get("booking_id") for result in results]
+    assert ids == [first["booking_id"] + 1, None, first["booking_id"] + 2, first["booking_id"] + 3]
+    for result, booking_id in zip(results, ids):
+        if booking_id:
+            booking = system.get_booking(booking_id)
+            assert booking.status == "confirmed"
+            assert system.get_booking_tables(booking_id) == result["tables"]
+
+def test_bulk_rejects_invalid_rows_without_booking_them(system):
+    results = system.create_bookings_bulk([
+        row(1, party_size=2.7),
+        row(2, party_size="3.5"),
+        row(3, date="not-a-date"),
+        row(4, date="2030-02-30"),
+        row(5, time="4:15 AM"),
+        row(6, email=""),
+        row(7, party_size="4"),
+        row(8, party_size=4.0),
+    ])
+
+    assert [result["success"] for result in results] == [False] * 6 + [True, True]
+    assert results[0]["message"] == results[1]["message"] == PARTY_SIZE_MESSAGE
+    assert results[2]["message"] == results[3]["message"] == INVALID_DATE_MESSAGE
+    assert "email" in results[5]["message"]
+    assert [system.get_booking(result["booking_id"]).party_size for result in results[6:]] == [4, 4]
+    assert system.verify_occupancy() == []
+
+def test_bulk_skips_rows_that_are_not_confirmed(system):
+    results = system.create_bookings_bulk([row(1, status="cancelled"), row(2, status="confirmed"), row(3)])
+
+    assert results[0] == {"success": False, "skipped": True, "message": "Skipped cancelled booking."}
+    assert results[1]["success"] and results[2]["success"]
+    assert system._slot_occupancy(DATE)[1140] == 4
+
+@pytest.mark.parametrize("fmt", ["csv", "jsonl"])
+def test_export_import_round_trip(system, tmp_path, fmt):
+    # Fill the slot, then free one party's seats and book them again
+    confirmed = []
+    for i in range(60):
+        result = system.create_booking(f"Guest {i}", f"guest{i}@example.com", "+1 555 0100", DATE, "7:00 PM", 6)
+        if not result["success"]:
+            break
+        confirmed.append(result["booking_id"])
+    cancelled = confirmed[0]
+    assert system.cancel_booking(cancelled)["success"]
+    assert system.create_booking("Late", "late@example.com", "+1 555 0100", DATE, "7:00 PM", 6)["success"]
+
+    path = tmp_path / f"bookings.{fmt}"
+    assert export_bookings(system, path) == len(confirmed) + 1
+
+    restored = BookingSystem(str(tmp_path / "restored.db"))
+    rejects = []
+    summary = import_bookings(
+        restored, path, on_result=lambda line, row, result: rejects.append(result) if not result["success"] else None
+    )
+
+    assert summary == {"accepted": len(confirmed), "rejected": 0, "skipped": 1}
+    assert [result.get("skipped") for result in rejects] == [True]
+    assert restored._slot_occupancy(DATE) == system._slot_occupancy(DATE)
+    assert restored.verify_occupancy() == []
+    originals = sorted((b.email, b.time, b.party_size) for b in system.iter_bookings() if b.status == "confirmed")
+    assert sorted((b.email, b.time, b.party_size) for b in restored.iter_bookings()) == originals
+    restored.pool.close_all()
+
+def test_import_reads_jsonl_in_batches(system, tmp_path):
+    path = tmp_path / "bookings.jsonl"
+    path.write_text("".join(json.dumps(row(i, time=time)) + "\n"
+                            for i, time in enumerate(["6:00 PM", "6:30 PM", "7:00 PM", "7:30 PM", "8:00 PM"])))
+
+    assert import_bookings(system, path, batch_size=2) == {"accepted": 5, "rejected": 0, "skipped": 0}
+    assert [b.id for b in system.iter_bookings()] == [1, 2, 3, 4, 5]
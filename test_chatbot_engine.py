@@ -0,0 +1,149 @@
+"""
+Chatbot Engine Tests - Streaming, Rewinds and Answers Without the Model
+"""
+
+import threading
+import time
+import pytest
+
+pytest.importorskip("google.generativeai")
+
+import chatbot_engine
+from chatbot_engine import RestaurantChatbot, ResponseMetrics, AnswerCache, response_metrics
+from conversation import SUMMARY_ACK
+
+class Chunk:
+    def __init__(self, text):
+        self.text = text
+
+class FakeChat:
+    """
+    Chat session with the parts of the Gemini ChatSession contract the bot
+    relies on: a streamed turn is pending until fully read, reading history
+    meanwhile raises, and rewind() drops the pending turn
+    """
+
+    def __init__(self, history, chunks):
+        self._history = list(history)
+        self._chunks = chunks
+        self._pending = None
+        self.rewinds = 0
+
+    @property
+    def history(self):
+        if self._pending is not None:
+            raise RuntimeError("Please let the response complete iteration")
+        return list(self._history)
+
+    @history.setter
+    def history(self, history):
+        self._history = list(history)
+        self._pending = None
+
+    def send_message(self, message, stream=False):
+        self._pending = message
+
+        def stream_chunks():
+            reply = []
+            for chunk in self._chunks:
+                if isinstance(chunk, Exception):
+                    raise chunk
+                reply.append(chunk)
+                yield Chunk(chunk)
+            self._history += [{"role": "user", "parts": [message]}, {"role": "model", "parts": ["".join(reply)]}]
+            self._pending = None
+        return stream_chunks()
+
+    def rewind(self):
+        self.rewinds += 1
+        self._pending = None
+
+class FakeModel:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def start_chat(self, history):
+        return FakeChat(history, self.chunks)
+
+@pytest.fixture
+def make_bot(monkeypatch):
+    def make_bot(chunks=("Once ", "upon ", "a time.")):
+        model = FakeModel(list(chunks))
+        monkeypatch.setattr(chatbot_engine, "get_system_context", lambda: ("fingerprint", "context", model))
+        return RestaurantChatbot()
+    return make_bot
+
+def test_completed_stream_is_remembered(make_bot):
+    bot = make_bot()
+    assert "".join(bot.get_response_stream("Tell me a story about the chef's grandmother")) == "Once upon a time."
+    assert bot.chat.rewinds == 0
+    assert len(bot.chat.history) == 2
+    assert bot.get_chat_history()[-1] == {"role": "assistant", "content": "Once upon a time."}
+
+def test_abandoned_stream_is_rewound(make_bot):
+    bot = make_bot()
+    stream = bot.get_response_stream("Tell me a story about the chef's first kitchen")
+    assert next(stream) == "Once "
+    stream.close()
+
+    assert bot.chat.rewinds == 1
+    assert bot.chat.history == []
+    assert bot.get_chat_history() == []
+
+def test_failed_stream_is_rewound(make_bot):
+    bot = make_bot(["Once ", ConnectionError("connection reset")])
+    errors = response_metrics.stats()["errors"]
+
+    reply = "".join(bot.get_response_stream("Tell me a story about the chef's travels"))
+    assert reply.startswith("Once \n\nI apologize")
+    assert bot.chat.rewinds == 1
+    assert bot.chat.history == []
+    assert response_metrics.stats()["errors"] == errors + 1
+
+def test_local_answer_after_an_abandoned_stream(make_bot):
+    bot = make_bot()
+    bot.chat.send_message("Tell me a story about the chef's mentor", stream=True)  # never read
+
+    reply = "".join(bot.get_response_stream("What are your opening hours?"))
+    assert reply.startswith("🕐")
+    assert bot.chat.history[-1] == {"role": "model", "parts": [reply]}
+
+def test_answers_without_the_model_are_timed_separately(make_bot, monkeypatch):
+    metrics = ResponseMetrics()
+    monkeypatch.setattr(chatbot_engine, "response_metrics", metrics)
+    monkeypatch.setattr(chatbot_engine, "answer_cache", AnswerCache())
+
+    "".join(make_bot().get_response_stream("What are your opening hours?"))
+    "".join(make_bot().get_response_stream("Tell me a story about the chef"))
+    "".join(make_bot().get_response_stream("Tell me a story about the chef"))
+
+    stats = metrics.stats()
+    assert (stats["responses"], stats["local_answers"], stats["cached_answers"]) == (1, 1, 1)
+    # Only the model response feeds the model latency percentiles
+    assert stats["ttft_p50"] == stats["ttft_p95"]
+    assert stats["instant_p50"] is not None
+
+def test_stream_does_not_wait_for_the_summarizer(make_bot, monkeypatch):
+    release = threading.Event()
+    def slow_summary(summary, messages):
+        release.wait(5)
+        return "the guest asked about the chef"
+    monkeypatch.setattr(chatbot_engine, "summarize_conversation", slow_summary)
+    bot = make_bot()
+    bot.memory.keep_turns, bot.memory.compact_every = 1, 0
+
+    for n in range(3):
+        started = time.perf_counter()
+        assert "".join(bot.get_response_stream(f"Tell me story number {n} about the chef")) == "Once upon a time."
+        assert time.perf_counter() - started < 1
+    assert bot.memory.summary == ""
+
+    release.set()
+    for thread in threading.enumerate():
+        if thread.name == "conversation-compaction":
+            thread.join(5)
+    assert bot.memory.summary == "the guest asked about the chef"
+
+    # The next message goes out on a session rebuilt from the compacted window
+    "".join(bot.get_response_stream("And one more about the chef"))
+    assert bot.chat.history[1] == {"role": "model", "parts": [SUMMARY_ACK]}
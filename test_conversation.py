@@ -0,0 +1,113 @@
+"""
+Conversation Tests - Sliding Window, Running Summary and Token Budget
+"""
+
+import threading
+from conversation import ConversationWindow, SUMMARY_PREFIX, SUMMARY_ACK, estimate_tokens, fallback_summary
+
+def fill(window, exchanges, start=0):
+    for n in range(start, start + exchanges):
+        window.add(f"question {n}", f"answer {n}")
+
+def test_no_compaction_within_the_window():
+    window = ConversationWindow(keep_turns=2, compact_every=2, token_budget=10_000)
+    fill(window, 4)
+    assert window.compact() is False
+    assert len(window.messages) == 8
+
+def test_older_exchanges_are_summarized_in_one_call():
+    calls = []
+    def summarizer(summary, messages):
+        calls.append((summary, [message["content"] for message in messages]))
+        return "guest asked about 0 to 2"
+
+    window = ConversationWindow(summarizer, keep_turns=2, compact_every=2, token_budget=10_000)
+    fill(window, 5)
+    assert window.compact() is True
+
+    assert calls == [("", ["question 0", "answer 0", "question 1", "answer 1", "question 2", "answer 2"])]
+    assert [message["content"] for message in window.messages] == ["question 3", "answer 3", "question 4", "answer 4"]
+    assert window.summary == "guest asked about 0 to 2"
+    assert window.compactions == 1
+
+def test_token_budget_forces_compaction():
+    window = ConversationWindow(lambda summary, messages: "short", keep_turns=6, compact_every=4, token_budget=50)
+    window.add("x" * 200, "y" * 200)
+    window.add("tell me more", "sure")
+    assert window.compact() is True
+    assert window.messages == [{"role": "user", "content": "tell me more"}, {"role": "assistant", "content": "sure"}]
+    assert window.history_tokens() <= 50
+
+def test_summarizer_failure_keeps_the_guests_questions():
+    def summarizer(summary, messages):
+        raise ConnectionError("model unavailable")
+
+    window = ConversationWindow(summarizer, keep_turns=1, compact_every=1, token_budget=10_000)
+    fill(window, 3)
+    assert window.compact() is True
+    assert window.summary == "Guest asked: question 0; question 1"
+
+def test_fallback_summary_is_trimmed_to_the_newest_words():
+    messages = [{"role": "user", "content": "one two three"}, {"role": "assistant", "content": "ignored"}]
+    assert fallback_summary("earlier", messages, max_words=3) == "one two three"
+
+def test_chat_history_opens_with_the_summary():
+    window = ConversationWindow(lambda summary, messages: "the guest is vegan", keep_turns=1, compact_every=1,
+                                token_budget=10_000)
+    fill(window, 3)
+    window.compact()
+
+    assert window.chat_history() == [
+        {"role": "user", "parts": [f"{SUMMARY_PREFIX} the guest is vegan"]},
+        {"role": "model", "parts": [SUMMARY_ACK]},
+        {"role": "user", "parts": ["question 2"]},
+        {"role": "model", "parts": ["answer 2"]},
+    ]
+
+def test_prompt_tokens_include_context_history_and_message():
+    window = ConversationWindow()
+    window.add("abcd", "efgh")
+    assert window.prompt_tokens("ijkl", system_context="x" * 8) == 2 + 2 + 1
+    assert estimate_tokens("abcde") == 2
+
+def test_clear():
+    window = ConversationWindow(lambda summary, messages: "summary", keep_turns=1, compact_every=1)
+    fill(window, 3)
+    window.compact()
+    window.clear()
+    assert (window.messages, window.summary, window.chat_history()) == ([], "", [])
+
+def test_background_compaction_keeps_exchanges_added_meanwhile():
+    release = threading.Event()
+    def summarizer(summary, messages):
+        release.wait(5)
+        return "older turns"
+
+    window = ConversationWindow(summarizer, keep_turns=1, compact_every=1, token_budget=10_000)
+    fill(window, 3)
+    compacted = []
+    thread = window.compact_in_background(lambda: compacted.append(True))
+    assert window.compact_in_background() is None  # one compaction at a time
+
+    fill(window, 1, start=3)  # the guest keeps chatting while the summary is written
+    assert window.summary == "" and len(window.messages) == 8
+    release.set()
+    thread.join(5)
+
+    assert compacted == [True]
+    assert window.summary == "older turns"
+    assert [message["content"] for message in window.messages] == ["question 2", "answer 2", "question 3", "answer 3"]
+
+def test_clear_discards_an_in_flight_compaction():
+    release = threading.Event()
+    window = ConversationWindow(lambda summary, messages: release.wait(5) and "stale", keep_turns=1,
+                                compact_every=1)
+    fill(window, 3)
+    thread = window.compact_in_background()
+    window.clear()
+    window.add("hello", "hi")
+    release.set()
+    thread.join(5)
+
+    assert (window.summary, window.compactions) == ("", 0)
+    assert window.messages == [{"role": "user", "content": "hello"}, {"role": "assistant", "content": "hi"}]
@@ -0,0 +1,74 @@
+"""
+Database Tests - Connection Pool Reuse, Exhaustion and Savepoints
+"""
+
+import sqlite3
+import threading
+import pytest
+import database
+from database import ConnectionPool
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), size=1)
+    with pool.transaction() as conn:
+        conn.execute("CREATE TABLE items (name TEXT)")
+    yield pool
+    pool.close_all()
+
+def names(pool):
+    with pool.connection() as conn:
+        return [row[0] for row in conn.execute("SELECT name FROM items ORDER BY rowid")]
+
+def test_exhausted_pool_raises_operational_error(pool, monkeypatch):
+    monkeypatch.setattr(database, "DB_BUSY_TIMEOUT", 50)
+    held, release = threading.Event(), threading.Event()
+
+    def hold():
+        with pool.connection():
+            held.set()
+            release.wait(5)
+    holder = threading.Thread(target=hold)
+    holder.start()
+    assert held.wait(5)
+    try:
+        with pytest.raises(sqlite3.OperationalError, match="connection pool exhausted"):
+            with pool.connection():
+                pass
+    finally:
+        release.set()
+        holder.join(5)
+
+    # The connection went back to the pool and can be borrowed again
+    assert names(pool) == []
+
+def test_nested_borrows_reuse_the_threads_connection(pool):
+    with pool.connection() as outer:
+        with pool.connection() as inner:
+            assert inner is outer
+            with pool.transaction() as conn:
+                assert conn is outer
+                assert pool.in_transaction()
+        assert not pool.in_transaction()
+    assert pool._idle.qsize() == 1
+
+def test_nested_transaction_rolls_back_to_its_savepoint(pool):
+    with pool.transaction() as conn:
+        conn.execute("INSERT INTO items VALUES ('kept')")
+        with pytest.raises(ValueError):
+            with pool.transaction() as nested:
+                nested.execute("INSERT INTO items VALUES ('discarded')")
+                raise ValueError("inner block failed")
+        conn.execute("INSERT INTO items VALUES ('after')")
+
+    assert names(pool) == ["kept", "after"]
+
+def test_outer_failure_rolls_back_released_savepoints(pool):
+    with pytest.raises(ValueError):
+        with pool.transaction() as conn:
+            with pool.transaction() as nested:
+                nested.execute("INSERT INTO items VALUES ('inner')")
+            raise ValueError("outer block failed")
+
+    assert names(pool) == []
+    assert not pool.in_transaction()
@@ -0,0 +1,35 @@
+"""
+Intent Router Tests - Labeled Routing Accuracy and Local Answer Wording
+"""
+
+import pytest
+from intent_eval import EVAL_SET, evaluate
+from intent_router import classify, answer, Intent, IntentRouter, DIETARY, CHAT
+
+def test_eval_set_routes_correctly():
+    result = evaluate()
+    assert result["wrong_answers"] == []
+    assert result["missed"] == []
+    assert result["accuracy"] == 1.0
+
+@pytest.mark.parametrize("message", [message for message, expected in EVAL_SET if expected == CHAT])
+def test_conversation_goes_to_the_model(message):
+    assert classify(message) is None
+
+def test_single_diet_is_kept():
+    intent = classify("Any gluten free desserts?")
+    assert (intent.name, intent.diet, intent.category) == (DIETARY, "gluten-free", "Desserts")
+
+def test_no_matching_dishes_wording():
+    reply = answer(Intent(DIETARY, None, "Desserts", "vegan", None))
+    assert reply.startswith("We don't have any desserts marked vegan on the menu.")
+    reply = answer(Intent(DIETARY, None, None, "kosher", None))
+    assert reply == "We don't have any dishes marked kosher on the menu."
+
+def test_router_stats():
+    router = IntentRouter()
+    assert router.route("What are your opening hours?").startswith("🕐")
+    assert router.route("Are you open on New Year's Eve?") is None
+    stats = router.stats()
+    assert (stats["routed"], stats["fallbacks"], stats["local_ratio"]) == (1, 1, 0.5)
+    assert stats["by_intent"] == {"hours": 1}
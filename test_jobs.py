@@ -0,0 +1,79 @@
+"""
+Job Queue Tests - Claiming, Lease Recovery and Purging
+"""
+
+import sqlite3
+import threading
+import time
+import pytest
+from booking_system import BookingSystem
+from config import JOB_LEASE_TIMEOUT
+from jobs import JobQueue
+
+@pytest.fixture
+def queue(tmp_path):
+    db_name = str(tmp_path / "bookings.db")
+    system = BookingSystem(db_name)  # applies the migrations
+    handled = []
+    queue = JobQueue(db_name, {"record": handled.append}, workers=1)
+    queue.handled = handled
+    yield queue
+    queue.stop()
+    system.pool.close_all()
+
+def job_row(queue, job_id):
+    with queue.pool.connection() as conn:
+        return conn.execute("SELECT status, attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+def test_jobs_run_in_due_order(queue):
+    later = queue.enqueue("record", {"n": 2}, delay=-1)
+    first = queue.enqueue("record", {"n": 1}, delay=-5)
+    queue.enqueue("record", {"n": 3}, delay=60)
+
+    assert queue.drain() == 2
+    assert queue.handled == [{"n": 1}, {"n": 2}]
+    assert job_row(queue, first) == job_row(queue, later) == ("done", 1)
+
+def test_claim_reclaims_an_expired_lease(queue):
+    job_id = queue.enqueue("record", {"n": 1})
+    assert queue._claim()[0] == job_id  # the worker that claimed it dies
+
+    # A live lease is left alone
+    assert queue.run_once() is False
+    with queue.pool.transaction() as conn:
+        conn.execute("UPDATE jobs SET started_at = ? WHERE id = ?", (time.time() - JOB_LEASE_TIMEOUT - 1, job_id))
+
+    # Another worker picks it up on its next claim, without a restart
+    assert queue.run_once() is True
+    assert queue.handled == [{"n": 1}]
+    assert job_row(queue, job_id) == ("done", 2)
+
+def test_purge_done_keeps_recent_and_dead_jobs(queue):
+    job_ids = [queue.enqueue("record", {"n": n}) for n in range(5)]
+    queue.drain()
+    dead = queue.enqueue("missing-handler", {}, max_attempts=1)
+    queue.drain()
+    old = time.time() - 2 * 3600
+    with queue.pool.transaction() as conn:
+        conn.execute(
+            f"UPDATE jobs SET finished_at = ? WHERE id IN ({', '.join('?' * 4)})", (old, *job_ids[:3], dead)
+        )
+
+    assert queue.purge_done(older_than=3600, batch_size=2) == 3
+    assert [job_row(queue, job_id) for job_id in job_ids] == [None] * 3 + [("done", 1)] * 2
+    assert job_row(queue, dead) == ("dead", 1)
+    assert queue.purge_done(older_than=3600) == 0
+
+def test_worker_failures_are_logged_and_counted(queue, monkeypatch, caplog):
+    def run_once():
+        queue.stop_after_error.set()
+        raise sqlite3.OperationalError("database is locked")
+    queue.stop_after_error = threading.Event()
+    monkeypatch.setattr(queue, "run_once", run_once)
+
+    queue.start()
+    assert queue.stop_after_error.wait(5)
+    queue.stop()
+
+    assert queue.stats()["worker_errors"] >= 1
+    assert "database is locked" in caplog.text
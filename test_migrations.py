@@ -0,0 +1,144 @@
+"""
+Migration Tests - Schema Upgrades and Index Usage of the Hot Queries
+"""
+
+import sqlite3
+import pytest
+from migrations import MIGRATIONS, migrate, get_schema_version
+from booking_system import BOOKING_SELECT
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(tmp_path / "bookings.db", isolation_level=None)
+    conn.execute("BEGIN IMMEDIATE")
+    migrate(conn)
+    conn.execute("COMMIT")
+    yield conn
+    conn.close()
+
+def query_plan(conn, query, params):
+    return " | ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params))
+
+def test_migrate_applies_every_version_once(conn):
+    assert get_schema_version(conn) == LATEST_VERSION
+    conn.execute("BEGIN IMMEDIATE")
+    assert migrate(conn) == []
+    conn.execute("COMMIT")
+
+def test_migrate_upgrades_original_schema_in_place(tmp_path):
+    conn = sqlite3.connect(tmp_path / "old.db", isolation_level=None)
+    conn.execute('''
+        CREATE TABLE bookings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            customer_name TEXT NOT NULL,
+            email TEXT NOT NULL,
+            phone TEXT NOT NULL,
+            date TEXT NOT NULL,
+            time TEXT NOT NULL,
+            party_size INTEGER NOT NULL,
+            special_requests TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            status TEXT DEFAULT 'confirmed'
+        )
+    ''')
+    conn.execute('''
+        INSERT INTO bookings (customer_name, email, phone, date, time, party_size)
+        VALUES ('Ann', 'ann@example.com', '555', '2030-01-01', '7:00 PM', 4)
+    ''')
+
+    conn.execute("BEGIN IMMEDIATE")
+    migrate(conn)
+    conn.execute("COMMIT")
+
+    assert conn.execute("SELECT time, status FROM bookings").fetchone() == (19 * 60, "confirmed")
+    assert conn.execute(
+        "SELECT seats_taken FROM slot_occupancy WHERE date = '2030-01-01' AND time = ?", (19 * 60,)
+    ).fetchone() == (4,)
+    assert conn.execute("SELECT COUNT(*) FROM table_assignments").fetchone() == (1,)
+    conn.close()
+
+def test_migrate_withdraws_duplicate_waitlist_entries(tmp_path, monkeypatch):
+    conn = sqlite3.connect(tmp_path / "old.db", isolation_level=None)
+    monkeypatch.setattr("migrations.MIGRATIONS", [m for m in MIGRATIONS if m[0] < 14])
+    migrate(conn)
+    conn.executemany('''
+        INSERT INTO waitlist (customer_name, email, phone, date, time, party_size)
+        VALUES ('Ann', ?, '555', '2030-01-01', ?, 4)
+    ''', [("ann@example.com", 1140), ("ann@example.com", 1140), ("ann@example.com", 1170),
+          ("bob@example.com", 1140)])
+
+    monkeypatch.undo()
+    conn.execute("BEGIN IMMEDIATE")
+    assert migrate(conn) == [14]
+    conn.execute("COMMIT")
+
+    assert conn.execute("SELECT id FROM waitlist WHERE status = 'waiting' ORDER BY id").fetchall() == [
+        (1,), (3,), (4,)
+    ]
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute('''
+            INSERT INTO waitlist (customer_name, email, phone, date, time, party_size)
+            VALUES ('Ann', 'ann@example.com', '555', '2030-01-01', 1140, 2)
+        ''')
+    conn.close()
+
+@pytest.mark.parametrize("query, params, expected", [
+    # get_bookings_by_email
+    (f'''
+        SELECT {BOOKING_SELECT} FROM bookings WHERE email = ?
+        UNION ALL
+        SELECT {BOOKING_SELECT} FROM bookings_archive WHERE email = ?
+        ORDER BY date DESC, time DESC
+     ''', ("ann@example.com",) * 2,
+     ["SEARCH bookings USING INDEX idx_bookings_email (email=?)",
+      "SEARCH bookings_archive USING INDEX idx_bookings_archive_email (email=?)"]),
+    # Confirmed covers in one slot (verify-occupancy, occupancy rebuilds)
+    ("SELECT SUM(party_size) FROM bookings WHERE date = ? AND time = ? AND status = 'confirmed'",
+     ("2030-01-01", 1140),
+     ["SEARCH bookings USING COVERING INDEX idx_bookings_slot (date=? AND time=? AND status=?)"]),
+    # Availability for a date
+    ("SELECT time, seats_taken FROM slot_occupancy WHERE date = ?", ("2030-01-01",),
+     ["SEARCH slot_occupancy USING PRIMARY KEY (date=?)"]),
+    # Seat reservation for the slots a stay covers
+    ("SELECT time, seats_taken FROM slot_occupancy WHERE date = ? AND time IN (?, ?, ?)",
+     ("2030-01-01", 1140, 1170, 1200),
+     ["SEARCH slot_occupancy USING PRIMARY KEY (date=? AND time=?)"]),
+    ("UPDATE slot_occupancy SET seats_taken = MAX(seats_taken - ?, 0) WHERE date = ? AND time = ?",
+     (2, "2030-01-01", 1140),
+     ["SEARCH slot_occupancy USING PRIMARY KEY (date=? AND time=?)"]),
+    # Table schedule for a date
+    ("SELECT booking_id, table_id, start_time, end_time FROM table_assignments WHERE date = ?",
+     ("2030-01-01",),
+     ["SEARCH table_assignments USING INDEX idx_table_assignments_date (date=?)"]),
+    # Keyset page within a date
+    (f'''
+        SELECT {BOOKING_SELECT} FROM bookings WHERE date = ? AND (time, id) > (?, ?)
+        ORDER BY date ASC, time ASC, id ASC LIMIT ?
+     ''', ("2030-01-01", 1140, 10, 50),
+     ["SEARCH bookings USING INDEX idx_bookings_date_time (date=? AND time>?)"]),
+    # Head of a waitlist queue
+    ("""
+        SELECT id FROM waitlist
+        WHERE date = ? AND time = ? AND party_size = ? AND status = 'waiting'
+        ORDER BY id LIMIT 1
+     """, ("2030-01-01", 1140, 4),
+     ["SEARCH waitlist USING INDEX idx_waitlist_queue (date=? AND time=? AND party_size=?)"]),
+    # Next due job for a worker
+    ("""
+        SELECT id FROM jobs INDEXED BY idx_jobs_due
+        WHERE status = 'pending' AND run_at <= ?
+        ORDER BY run_at, id LIMIT 1
+     """, (0.0,),
+     ["SEARCH jobs USING INDEX idx_jobs_due (run_at<?)"]),
+    # A guest's waiting entry for a slot (waitlist dedupe)
+    ("SELECT id FROM waitlist WHERE email = ? AND date = ? AND time = ? AND status = 'waiting'",
+     ("ann@example.com", "2030-01-01", 1140),
+     ["SEARCH waitlist USING INDEX idx_waitlist_waiting_guest (email=? AND date=? AND time=?)"]),
+])
+def test_hot_queries_use_indexes(conn, query, params, expected):
+    plan = query_plan(conn, query, params)
+    for step in expected:
+        assert step in plan
+    assert "SCAN bookings" not in plan
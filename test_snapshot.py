@@ -0,0 +1,123 @@
+"""
+Snapshot Tests - Shared mmap Availability Rows
+"""
+
+import threading
+import pytest
+import booking_system
+from booking_system import BookingSystem
+from capacity import covered_slots
+from snapshot import AvailabilitySnapshot, ROW_HEADER, fcntl
+
+pytestmark = pytest.mark.skipif(fcntl is None, reason="the snapshot needs advisory file locks")
+
+DATE = "2030-06-01"
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "bookings.db-availability.snap")
+
+@pytest.fixture
+def snapshot(path):
+    snapshot = AvailabilitySnapshot(path)
+    yield snapshot
+    snapshot.close()
+
+def tear_row(snapshot, date):
+    """Leave a row the way a writer that died mid-write would: at an odd generation"""
+    _, offset = snapshot._row(date)
+    generation, ordinal, _, loaded_at = ROW_HEADER.unpack_from(snapshot._map, offset)
+    ROW_HEADER.pack_into(snapshot._map, offset, generation + 1, ordinal, 0, loaded_at)
+
+def test_store_and_read(snapshot):
+    assert snapshot.read(DATE) is None
+    assert snapshot.store(DATE, {1140: 12, 1170: 4})
+    assert snapshot.read(DATE) == {1140: 12, 1170: 4}
+    assert snapshot.read("2030-06-02") is None
+
+    snapshot.invalidate(DATE)
+    assert snapshot.read(DATE) is None
+
+def test_store_skips_a_row_another_writer_updated(snapshot):
+    generation = snapshot.row_generation(DATE)
+    snapshot.store(DATE, {1140: 2})
+    assert snapshot.store(DATE, {1140: 99}, expected_generation=generation) is False
+    assert snapshot.read(DATE) == {1140: 2}
+
+def test_torn_row_is_a_miss_not_a_hang(snapshot):
+    snapshot.store(DATE, {1140: 12})
+    tear_row(snapshot, DATE)
+
+    reader = threading.Thread(target=lambda: snapshot.read(DATE), daemon=True)
+    reader.start()
+    reader.join(timeout=5)
+    assert not reader.is_alive()
+    assert snapshot.read(DATE) is None
+
+def test_store_repairs_a_torn_row(snapshot):
+    snapshot.store(DATE, {1140: 12})
+    tear_row(snapshot, DATE)
+
+    assert snapshot.store(DATE, {1140: 4})
+    assert snapshot.row_generation(DATE) % 2 == 0
+    assert snapshot.read(DATE) == {1140: 4}
+
+    tear_row(snapshot, DATE)
+    snapshot.invalidate(DATE)
+    assert snapshot.row_generation(DATE) % 2 == 0
+
+def test_opening_the_file_repairs_torn_rows(snapshot, path):
+    snapshot.store(DATE, {1140: 12})
+    snapshot.store("2030-06-02", {1140: 6})
+    tear_row(snapshot, DATE)
+
+    reopened = AvailabilitySnapshot(path)
+    try:
+        assert reopened.row_generation(DATE) % 2 == 0
+        # The torn row's seats may be half written, so it is reloaded; others survive
+        assert reopened.read(DATE) is None
+        assert reopened.read("2030-06-02") == {1140: 6}
+    finally:
+        reopened.close()
+
+@pytest.fixture(params=["snapshot", "cache"])
+def system(request, tmp_path, monkeypatch):
+    monkeypatch.setattr(booking_system, "AVAILABILITY_SNAPSHOT", request.param == "snapshot")
+    system = BookingSystem(str(tmp_path / "bookings.db"))
+    yield system
+    system.pool.close_all()
+
+def stay(party_size, seats=None):
+    return {minutes: seats or party_size for minutes in covered_slots(1140, party_size)}
+
+def seats(system):
+    return {minutes: seats for minutes, seats in system._slot_occupancy(DATE).items() if seats}
+
+def test_seat_counts_follow_creates_and_cancels(system):
+    source = "snapshot" if system.snapshot is not None else "cache"
+    assert seats(system) == {}
+    assert seats(system) == {}
+    stats = system.get_cache_stats()
+    assert (stats["source"], stats["hits"], stats["misses"]) == (source, 1, 1)
+
+    first = system.create_booking("Ada", "ada@example.com", "+1 555 0100", DATE, "7:00 PM", 4)
+    second = system.create_booking("Bo", "bo@example.com", "+1 555 0101", DATE, "7:00 PM", 2)
+    assert seats(system) == {**stay(4), **stay(2, seats=6)}
+
+    system.cancel_booking(first["booking_id"])
+    assert seats(system) == stay(2)
+    system.cancel_booking(second["booking_id"])
+    assert seats(system) == {}
+
+def test_bulk_create_and_rebuild_refresh_seat_counts(system):
+    assert seats(system) == {}
+    system.create_bookings_bulk([
+        {"customer_name": "Ada", "email": "ada@example.com", "phone": "+1 555 0100", "date": DATE,
+         "time": "7:00 PM", "party_size": 3}
+    ])
+    assert seats(system) == stay(3)
+
+    with system.pool.transaction() as conn:
+        conn.execute("UPDATE slot_occupancy SET seats_taken = 0")
+    assert system.rebuild_occupancy() > 0
+    assert seats(system) == stay(3)
@@ -0,0 +1,531 @@
+"""
+Storage Conformance Tests - Behaviour Every Booking Engine Must Share
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from booking_system import create_booking_store
+from capacity import covered_slots, dining_duration
+from config import BOOKING_SLOTS, RESTAURANT_INFO
+from events import EventConsumer, BOOKING_CREATED, BOOKING_CANCELLED
+from storage import (
+    BookingStore, BOOKING_COLUMNS, PARTY_SIZE_MESSAGE, INVALID_SLOT_MESSAGE, UNAVAILABLE_MESSAGE, SLOT_OPEN_MESSAGE
+)
+from tables import TABLE_INVENTORY
+from time_slots import slot_to_minutes, minutes_to_slot
+
+DATE = "2030-06-01"
+CAPACITY = RESTAURANT_INFO["capacity"]
+
+@pytest.fixture(params=["sqlite", "memory"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        store = create_booking_store("sqlite", db_name=str(tmp_path / "bookings.db"))
+        yield store
+        store.pool.close_all()
+    else:
+        yield create_booking_store("memory")
+
+def book(store, i=0, date=DATE, time="7:00 PM", party_size=2, **extra):
+    return store.create_booking(
+        f"Guest {i}", f"guest{i}@example.com", "+1 555 0100", date, time, party_size, **extra
+    )
+
+def fill_slot(store, party_size, date=DATE, time="7:00 PM"):
+    """Book identical parties into a slot until one is rejected; returns the confirmed results"""
+    confirmed = []
+    for i in range(CAPACITY + 1):
+        result = book(store, i, date=date, time=time, party_size=party_size)
+        if not result["success"]:
+            return confirmed
+        confirmed.append(result)
+    pytest.fail("slot never filled up")
+
+def test_engines_implement_the_interface(store):
+    assert isinstance(store, BookingStore)
+
+def test_create_and_get(store):
+    result = book(store, 1, party_size=4, special_requests="Window seat")
+    assert result["success"]
+
+    booking = store.get_booking(result["booking_id"])
+    assert booking.customer_name == "Guest 1"
+    assert booking.email == "guest1@example.com"
+    assert (booking.date, booking.time_label, booking.party_size) == (DATE, "7:00 PM", 4)
+    assert booking.time == slot_to_minutes("7:00 PM")
+    assert booking.special_requests == "Window seat"
+    assert booking.status == "confirmed"
+    assert booking.to_dict()["time"] == "7:00 PM"
+    assert store.get_booking(result["booking_id"] + 1000) is None
+
+@pytest.mark.parametrize("time, party_size, message", [
+    ("7:00 PM", 0, PARTY_SIZE_MESSAGE),
+    ("7:00 PM", 13, PARTY_SIZE_MESSAGE),
+    ("7:15 PM", 2, INVALID_SLOT_MESSAGE),
+    ("3:00 AM", 2, INVALID_SLOT_MESSAGE),
+])
+def test_invalid_requests_are_rejected(store, time, party_size, message):
+    result = book(store, time=time, party_size=party_size)
+    assert result == {"success": False, "message": message}
+
+def test_bookings_by_email_newest_first(store):
+    for date, time in [("2030-06-01", "7:00 PM"), ("2030-06-03", "12:00 PM"), ("2030-06-03", "6:00 PM")]:
+        book(store, 7, date=date, time=time)
+    book(store, 8)
+
+    bookings = store.get_bookings_by_email("guest7@example.com")
+    assert [(b.date, b.time_label) for b in bookings] == [
+        ("2030-06-03", "6:00 PM"), ("2030-06-03", "12:00 PM"), ("2030-06-01", "7:00 PM")
+    ]
+    assert store.get_bookings_by_email("nobody@example.com") == []
+
+def test_capacity_is_never_exceeded(store):
+    confirmed = fill_slot(store, 12)
+    assert confirmed
+    assert len(confirmed) * 12 <= CAPACITY
+
+    rejected = book(store, 99, party_size=12)
+    assert rejected["success"] is False
+    assert rejected["message"] == UNAVAILABLE_MESSAGE
+    assert store.check_availability(DATE, "7:00 PM", 12) is False
+    assert "7:00 PM" not in [slot["time"] for slot in store.get_available_slots(DATE, 12)]
+    # Other dates are untouched
+    assert store.check_availability("2030-06-02", "7:00 PM", 12) is True
+
+def test_concurrent_bookings_are_atomic(store):
+    expected = len(fill_slot(create_booking_store("memory"), 6))
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(lambda i: book(store, i, party_size=6), range(40)))
+
+    confirmed = [result for result in results if result["success"]]
+    assert len(confirmed) == expected
+    assert len({result["booking_id"] for result in confirmed}) == expected
+    assert sum(store.get_booking(r["booking_id"]).party_size for r in confirmed) <= CAPACITY
+
+def test_cancel_releases_seats(store):
+    confirmed = fill_slot(store, 12)
+    assert store.check_availability(DATE, "7:00 PM", 12) is False
+
+    result = store.cancel_booking(confirmed[0]["booking_id"])
+    assert result["success"]
+    assert store.get_booking(confirmed[0]["booking_id"]).status == "cancelled"
+    assert store.check_availability(DATE, "7:00 PM", 12) is True
+    assert book(store, 99, party_size=12)["success"]
+
+def test_cancel_unknown_booking(store):
+    assert store.cancel_booking(12345) == {"success": False, "message": "Booking not found."}
+
+def test_cancel_twice_releases_seats_once(store):
+    first = book(store, 1, party_size=4)
+    book(store, 2, party_size=4)
+    store.cancel_booking(first["booking_id"])
+    store.cancel_booking(first["booking_id"])
+
+    remaining = store.get_availability_range(DATE, DATE).loc[DATE, "7:00 PM"]
+    assert remaining == CAPACITY - 4
+
+def test_idempotency_key_returns_original_result(store):
+    first = book(store, 1, party_size=4, idempotency_key="form-1")
+    retry = book(store, 1, party_size=4, idempotency_key="form-1")
+    other = book(store, 1, party_size=4, idempotency_key="form-2")
+
+    assert first["success"] and retry == first
+    assert other["success"] and other["booking_id"] != first["booking_id"]
+    assert len(store.get_bookings_by_email("guest1@example.com")) == 2
+
+def test_idempotent_retry_skips_the_availability_check(store):
+    first = book(store, 1, party_size=12, idempotency_key="form-1")
+    fill_slot(store, 12)
+    assert book(store, 1, party_size=12, idempotency_key="form-1") == first
+
+def seed_pages(store):
+    keys = []
+    for i, (date, time) in enumerate([
+        ("2030-06-02", "12:00 PM"), ("2030-06-01", "7:00 PM"), ("2030-06-01", "11:00 AM"),
+        ("2030-06-02", "12:00 PM"), ("2030-06-03", "6:00 PM"), ("2030-06-01", "7:00 PM"),
+        ("2030-06-02", "1:00 PM"),
+    ]):
+        result = book(store, i, date=date, time=time)
+        keys.append((date, slot_to_minutes(time), result["booking_id"]))
+    return sorted(keys)
+
+def walk(store, **kwargs):
+    records, cursor, pages = [], None, 0
+    while True:
+        page, cursor = store.get_bookings_page(after=cursor, limit=3, **kwargs)
+        records.extend(page)
+        pages += 1
+        if cursor is None:
+            return records, pages
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_keyset_paging(store, descending):
+    keys = seed_pages(store)
+    records, pages = walk(store, descending=descending)
+
+    assert [(r.date, r.time, r.id) for r in records] == sorted(keys, reverse=descending)
+    assert pages == 3
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_keyset_paging_within_a_date(store, descending):
+    keys = [key for key in seed_pages(store) if key[0] == "2030-06-01"]
+    records, _ = walk(store, date="2030-06-01", descending=descending)
+    assert [(r.date, r.time, r.id) for r in records] == sorted(keys, reverse=descending)
+
+def test_keyset_paging_selected_columns(store):
+    keys = seed_pages(store)
+    page, cursor = store.get_bookings_page(limit=2, columns=("id", "email"))
+    assert page[0]._fields == ("id", "email")
+    assert [record.id for record in page] == [key[2] for key in keys[:2]]
+    assert cursor == keys[1]
+
+    assert [record.id for record in store.iter_bookings(batch_size=2, columns=("id",))] == [
+        key[2] for key in keys
+    ]
+    with pytest.raises(ValueError):
+        store.get_bookings_page(columns=("id", "password"))
+
+def test_full_records_by_default(store):
+    seed_pages(store)
+    page, _ = store.get_bookings_page(limit=1)
+    assert page[0]._fields == BOOKING_COLUMNS
+
+def test_availability_range(store):
+    book(store, 1, date="2030-06-02", time="7:00 PM", party_size=4)
+
+    availability = store.get_availability_range("2030-06-01", "2030-06-03")
+    assert list(availability.index) == ["2030-06-01", "2030-06-02", "2030-06-03"]
+    assert list(availability.columns) == BOOKING_SLOTS
+    assert availability.loc["2030-06-02", "7:00 PM"] == CAPACITY - 4
+    assert availability.loc["2030-06-01"].eq(CAPACITY).all()
+    assert availability.loc["2030-06-03"].eq(CAPACITY).all()
+
+def test_availability_range_matches_single_date_queries(store):
+    for i, (time, party_size) in enumerate([("12:00 PM", 6), ("7:00 PM", 12), ("7:30 PM", 4)]):
+        book(store, i, time=time, party_size=party_size)
+
+    # The range reports each slot on its own; a listed slot offers the
+    # fewest seats free across the slots a stay starting there covers
+    row = store.get_availability_range(DATE, DATE).loc[DATE]
+    for slot in store.get_available_slots(DATE, 2):
+        covered = [minutes_to_slot(minutes) for minutes in covered_slots(slot["minutes"], 2)]
+        assert row[covered].min() == slot["available_seats"]
+
+def test_empty_availability_range(store):
+    assert store.get_availability_range("2030-06-02", "2030-06-01").empty
+
+@pytest.mark.parametrize("time, party_size, covered", [
+    ("7:00 PM", 2, ["7:00 PM", "7:30 PM", "8:00 PM"]),
+    ("7:00 PM", 4, ["7:00 PM", "7:30 PM", "8:00 PM", "8:30 PM"]),
+    ("7:00 PM", 12, ["7:00 PM", "7:30 PM", "8:00 PM", "8:30 PM", "9:00 PM"]),
+    ("1:30 PM", 6, ["1:30 PM", "2:00 PM", "2:30 PM"]),
+    ("10:00 PM", 12, ["10:00 PM"]),
+])
+def test_booking_holds_every_slot_of_its_stay(store, time, party_size, covered):
+    booking_id = book(store, time=time, party_size=party_size)["booking_id"]
+
+    row = store.get_availability_range(DATE, DATE).loc[DATE]
+    assert list(row[row < CAPACITY].index) == covered
+    assert row[covered].eq(CAPACITY - party_size).all()
+
+    store.cancel_booking(booking_id)
+    assert store.get_availability_range(DATE, DATE).loc[DATE].eq(CAPACITY).all()
+
+def test_overlapping_stays_share_capacity(store):
+    fill_slot(store, 12, time="7:00 PM")
+
+    # Stays that run into a full slot are refused; ones that end before it are not
+    assert store.check_availability(DATE, "5:00 PM", 12) is False
+    assert store.check_availability(DATE, "6:00 PM", 12) is False
+    assert store.check_availability(DATE, "8:30 PM", 12) is False
+    assert book(store, 50, time="6:30 PM", party_size=12)["success"] is False
+    assert store.check_availability(DATE, "2:30 PM", 12) is True
+    assert store.check_availability(DATE, "9:30 PM", 12) is True
+    assert book(store, 51, time="9:30 PM", party_size=12)["success"]
+
+def test_available_seats_cover_the_whole_stay(store):
+    book(store, 1, time="8:00 PM", party_size=12)
+
+    slots = {slot["time"]: slot["available_seats"] for slot in store.get_available_slots(DATE, 2)}
+    # A 7:00 PM pair stays until 8:30 PM, so it competes with the 8:00 PM party
+    assert slots["7:00 PM"] == CAPACITY - 12
+    assert slots["6:00 PM"] == CAPACITY
+    assert store.next_available_slot(DATE, "6:00 PM", 2)["time"] == "6:30 PM"
+
+def assert_tables_consistent(store, booking_ids):
+    """Every confirmed booking sits at enough seats and no table is double-booked"""
+    seated = []
+    for booking_id in booking_ids:
+        booking = store.get_booking(booking_id)
+        if booking.status != "confirmed":
+            continue
+        tables = store.get_booking_tables(booking_id)
+        assert sum(TABLE_INVENTORY[table_id].seats for table_id in tables) >= booking.party_size
+        start = booking.time
+        seated.append((booking.date, tables, start, start + dining_duration(booking.party_size)))
+    for i, (date, tables, start, end) in enumerate(seated):
+        for other_date, other_tables, other_start, other_end in seated[i + 1:]:
+            if date == other_date and set(tables) & set(other_tables):
+                assert end <= other_start or other_end <= start
+
+def test_bookings_get_the_tightest_table(store):
+    pair = book(store, 1, party_size=2)
+    four = book(store, 2, party_size=3)
+    large = book(store, 3, party_size=12)
+
+    assert pair["tables"] == store.get_booking_tables(pair["booking_id"]) == ["T1"]
+    assert four["tables"] == ["T11"]
+    assert len(large["tables"]) > 1
+    assert sum(TABLE_INVENTORY[table_id].seats for table_id in large["tables"]) == 12
+    assert store.get_booking_tables(12345) == []
+
+def test_table_is_reused_once_the_stay_ends(store):
+    first = book(store, 1, time="11:00 AM", party_size=2)
+    overlapping = book(store, 2, time="12:00 PM", party_size=2)
+    later = book(store, 3, time="12:30 PM", party_size=2)
+
+    assert first["tables"] == later["tables"] == ["T1"]
+    assert overlapping["tables"] != first["tables"]
+
+def test_tables_limit_bookings_before_seats_do(store):
+    confirmed = fill_slot(store, 12)
+    # Only a few table combinations seat twelve, long before 100 seats are taken
+    assert len(confirmed) * 12 < CAPACITY
+    assert store.get_availability_range(DATE, DATE).loc[DATE, "7:00 PM"] > 12
+    assert "7:00 PM" not in [slot["time"] for slot in store.get_available_slots(DATE, 12)]
+
+    store.cancel_booking(confirmed[0]["booking_id"])
+    retry = book(store, 99, party_size=12)
+    assert retry["success"]
+    assert sorted(retry["tables"]) == sorted(confirmed[0]["tables"])
+
+def test_repack_keeps_everyone_seated(store):
+    booking_ids = []
+    for i, (time, party_size) in enumerate([
+        ("6:00 PM", 2), ("6:30 PM", 5), ("7:00 PM", 4), ("7:00 PM", 12), ("7:30 PM", 3),
+        ("8:00 PM", 6), ("6:00 PM", 8), ("7:00 PM", 2),
+    ]):
+        result = book(store, i, time=time, party_size=party_size)
+        assert result["success"]
+        booking_ids.append(result["booking_id"])
+    store.cancel_booking(booking_ids[1])
+
+    result = store.repack_tables(DATE)
+    assert result["success"]
+    assert result["unseated"] == []
+    for booking_id in booking_ids:
+        if booking_id != booking_ids[1]:
+            assert store.get_booking_tables(booking_id)
+    assert store.get_booking_tables(booking_ids[1]) == []
+    assert_tables_consistent(store, booking_ids)
+
+def test_concurrent_bookings_never_share_a_table(store):
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(
+            lambda i: book(store, i, time=["7:00 PM", "7:30 PM"][i % 2], party_size=i % 6 + 1), range(60)
+        ))
+    assert_tables_consistent(store, [result["booking_id"] for result in results if result["success"]])
+
+def join(store, i, party_size=12, time="7:00 PM"):
+    return store.join_waitlist(f"Guest {i}", f"guest{i}@example.com", "+1 555 0100", DATE, time, party_size)
+
+def test_waitlist_only_for_full_slots(store):
+    assert join(store, 1) == {"success": False, "message": SLOT_OPEN_MESSAGE}
+    assert store.get_waitlist(DATE) == []
+
+def test_waitlist_promotes_on_cancel(store):
+    confirmed = fill_slot(store, 12)
+    first, second = join(store, 100), join(store, 101)
+    assert first["success"] and second["success"]
+    assert [entry.id for entry in store.get_waitlist(DATE, "7:00 PM")] == [
+        first["waitlist_id"], second["waitlist_id"]
+    ]
+
+    result = store.cancel_booking(confirmed[0]["booking_id"])
+    assert len(result["promoted"]) == 1
+    promoted = store.get_booking(result["promoted"][0])
+    assert (promoted.email, promoted.status, promoted.party_size) == ("guest100@example.com", "confirmed", 12)
+    assert store.get_booking_tables(promoted.id)
+    assert [entry.id for entry in store.get_waitlist(DATE)] == [second["waitlist_id"]]
+
+def test_leaving_the_waitlist(store):
+    confirmed = fill_slot(store, 12)
+    entry = join(store, 100)
+
+    assert store.leave_waitlist(entry["waitlist_id"])["success"]
+    assert store.leave_waitlist(entry["waitlist_id"])["success"] is False
+    assert store.get_waitlist(DATE) == []
+    assert "promoted" not in store.cancel_booking(confirmed[0]["booking_id"])
+
+def test_waitlist_is_joined_once_per_guest_and_slot(store):
+    fill_slot(store, 12)
+    fill_slot(store, 12, time="8:00 PM")
+
+    first = join(store, 100)
+    again = join(store, 100, party_size=10)
+    assert again["waitlist_id"] == first["waitlist_id"]
+    assert again["already_waiting"] is True
+    assert len(store.get_waitlist(DATE)) == 1
+
+    # Other slots and other guests queue as usual, and leaving frees the guest to rejoin
+    assert join(store, 100, time="8:00 PM")["waitlist_id"] != first["waitlist_id"]
+    assert join(store, 101)["waitlist_id"] != first["waitlist_id"]
+    store.leave_waitlist(first["waitlist_id"])
+    rejoined = join(store, 100)
+    assert rejoined["waitlist_id"] != first["waitlist_id"]
+    assert "already_waiting" not in rejoined
+
+def test_concurrent_waitlist_joins_queue_one_entry(store):
+    confirmed = fill_slot(store, 12)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: join(store, 100), range(16)))
+    assert len({result["waitlist_id"] for result in results}) == 1
+
+    # Cancelling every booking promotes the guest once
+    promoted = []
+    for booking in confirmed:
+        promoted += store.cancel_booking(booking["booking_id"]).get("promoted", [])
+    assert len(promoted) == 1
+    assert len(store.get_bookings_by_email("guest100@example.com")) == 1
+
+def seed_rollups(store):
+    """Two days of bookings, one of them cancelled"""
+    ids = []
+    for i, (date, time, party_size) in enumerate([
+        ("2030-06-01", "12:00 PM", 2), ("2030-06-01", "12:00 PM", 4), ("2030-06-01", "7:00 PM", 4),
+        ("2030-06-02", "7:00 PM", 6), ("2030-06-02", "7:00 PM", 2),
+    ]):
+        ids.append(book(store, i, date=date, time=time, party_size=party_size)["booking_id"])
+    store.cancel_booking(ids[1])
+    return ids
+
+def test_slot_covers_count_confirmed_parties_at_their_start(store):
+    seed_rollups(store)
+
+    covers = store.get_slot_covers("2030-06-01", "2030-06-03")
+    assert list(covers.columns) == BOOKING_SLOTS
+    assert covers.loc["2030-06-01", "12:00 PM"] == 2
+    assert covers.loc["2030-06-01", "7:00 PM"] == 4
+    assert covers.loc["2030-06-02", "7:00 PM"] == 8
+    # A stay is counted once, at the slot it starts in
+    assert covers.loc["2030-06-01", "12:30 PM"] == 0
+    assert covers.values.sum() == 14
+    assert covers.loc["2030-06-03"].eq(0).all()
+
+def test_daily_trends(store):
+    seed_rollups(store)
+
+    trends = store.get_daily_trends("2030-05-31", "2030-06-02")
+    assert list(trends.index) == ["2030-05-31", "2030-06-01", "2030-06-02"]
+    assert trends.loc["2030-06-01", ["covers", "bookings", "cancellations"]].tolist() == [6, 2, 1]
+    assert trends.loc["2030-06-02", ["covers", "bookings", "cancellations"]].tolist() == [8, 2, 0]
+    assert trends.loc["2030-06-01", "cancellation_rate"] == pytest.approx(1 / 3)
+    assert trends.loc["2030-05-31"].eq(0).all()
+
+def test_party_size_histogram(store):
+    seed_rollups(store)
+
+    histogram = store.get_party_size_histogram("2030-06-01", "2030-06-02")
+    assert list(histogram.index) == list(range(1, 13))
+    assert histogram[2] == 2 and histogram[4] == 1 and histogram[6] == 1
+    assert histogram.sum() == 4
+    assert store.get_party_size_histogram("2030-06-02", "2030-06-02").sum() == 2
+
+def test_rollups_follow_waitlist_promotion(store):
+    confirmed = fill_slot(store, 12)
+    join(store, 100)
+    store.cancel_booking(confirmed[0]["booking_id"])
+
+    trends = store.get_daily_trends(DATE, DATE)
+    assert trends.loc[DATE, ["covers", "bookings", "cancellations"]].tolist() == [
+        12 * len(confirmed), len(confirmed), 1
+    ]
+    assert store.get_party_size_histogram(DATE, DATE)[12] == len(confirmed)
+
+def test_rollups_match_a_rebuild(tmp_path):
+    store = create_booking_store("sqlite", db_name=str(tmp_path / "bookings.db"))
+    seed_rollups(store)
+    trends = store.get_daily_trends("2030-06-01", "2030-06-02")
+    covers = store.get_slot_covers("2030-06-01", "2030-06-02")
+
+    store.rebuild_rollups()
+    assert store.get_daily_trends("2030-06-01", "2030-06-02").equals(trends)
+    assert store.get_slot_covers("2030-06-01", "2030-06-02").equals(covers)
+    store.pool.close_all()
+
+def test_event_log_records_every_change(store):
+    confirmed = fill_slot(store, 12)
+    waiting = join(store, 100)
+    book(store, 99, party_size=12)  # rejected: no event
+    store.cancel_booking(confirmed[0]["booking_id"])
+    store.cancel_booking(confirmed[0]["booking_id"])  # already cancelled: no event
+
+    events = store.read_events()
+    assert [event.id for event in events] == list(range(1, len(confirmed) + 3))
+    assert [event.event_type for event in events] == (
+        [BOOKING_CREATED] * len(confirmed) + [BOOKING_CANCELLED, BOOKING_CREATED]
+    )
+    created, cancelled, promoted = events[0], events[-2], events[-1]
+    assert (created.booking_id, created.date, created.time, created.party_size) == (
+        confirmed[0]["booking_id"], DATE, slot_to_minutes("7:00 PM"), 12
+    )
+    assert created.payload["email"] == "guest0@example.com"
+    assert created.payload["tables"] == confirmed[0]["tables"]
+    assert cancelled.booking_id == confirmed[0]["booking_id"]
+    assert promoted.payload["waitlist_id"] == waiting["waitlist_id"]
+
+def test_read_events_pages_by_id(store):
+    for i in range(5):
+        book(store, i)
+
+    assert [event.id for event in store.read_events(after_id=2)] == [3, 4, 5]
+    assert [event.id for event in store.read_events(after_id=1, limit=2)] == [2, 3]
+    assert store.read_events(after_id=5) == []
+
+def test_consumer_offsets(store):
+    assert store.get_consumer_offset("mailer") == 0
+    store.commit_consumer_offset("mailer", 4)
+    store.commit_consumer_offset("mailer", 2)  # offsets never move backwards
+    store.commit_consumer_offset("reports", 1)
+    assert store.get_consumer_offset("mailer") == 4
+    assert store.get_consumer_offset("reports") == 1
+
+def test_event_consumer_resumes_where_it_left_off(store):
+    for i in range(5):
+        book(store, i)
+
+    seen = []
+    assert EventConsumer(store, "mailer", batch_size=2).process(seen.append) == 5
+    book(store, 5)
+    # A fresh consumer with the same name only sees what arrived since
+    assert EventConsumer(store, "mailer").process(seen.append) == 1
+    assert [event.id for event in seen] == [1, 2, 3, 4, 5, 6]
+    assert EventConsumer(store, "reports").offset == 0
+
+def test_event_consumer_redelivers_a_failed_batch(store):
+    for i in range(3):
+        book(store, i)
+
+    def fail_on_second(event):
+        if event.id == 2:
+            raise RuntimeError("handler failed")
+
+    consumer = EventConsumer(store, "mailer")
+    with pytest.raises(RuntimeError):
+        consumer.process(fail_on_second)
+    assert consumer.offset == 0
+    assert [event.id for event in consumer.poll()] == [1, 2, 3]
+
+def test_consumer_offset_survives_a_restart(tmp_path):
+    db_name = str(tmp_path / "bookings.db")
+    store = create_booking_store("sqlite", db_name=db_name)
+    book(store, 1)
+    EventConsumer(store, "mailer").process(lambda event: None)
+    store.pool.close_all()
+
+    store = create_booking_store("sqlite", db_name=db_name)
+    assert EventConsumer(store, "mailer").offset == 1
+    assert EventConsumer(store, "mailer").poll() == []
+    store.pool.close_all()
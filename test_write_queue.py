@@ -0,0 +1,40 @@
+"""
+Write Queue Tests - Group Commit of Booking Bursts
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from booking_system import BookingSystem, make_idempotency_key
+
+@pytest.fixture
+def system(tmp_path):
+    system = BookingSystem(str(tmp_path / "bookings.db"), write_behind=True)
+    yield system
+    system.write_queue.close()
+    system.pool.close_all()
+
+def booking(i, **extra):
+    return dict(
+        customer_name=f"Guest {i}", email=f"guest{i}@example.com", phone="555",
+        date="2030-01-01", time="7:00 PM", party_size=2, **extra
+    )
+
+def test_group_commit_respects_capacity(system):
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(lambda i: system.create_booking(**booking(i)), range(80)))
+
+    confirmed = [result for result in results if result["success"]]
+    assert 0 < len(confirmed) < 80
+    assert system.write_queue.batches_committed >= 1
+    assert len({result["booking_id"] for result in confirmed}) == len(confirmed)
+    assert system.verify_occupancy() == []
+
+def test_group_commit_caches_idempotency_key_after_commit(system):
+    key = make_idempotency_key("session", "Guest 1")
+    first = system.create_booking(**booking(1, idempotency_key=key))
+    assert first["success"]
+    assert system.idempotency_cache.get(key, None) == first
+
+    retry = system.create_booking(**booking(1, idempotency_key=key))
+    assert retry == first
+    assert len(system.get_bookings_by_email("guest1@example.com")) == 1
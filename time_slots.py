@@ -0,0 +1,59 @@
+"""
+Time Slots - Minutes-since-midnight Encoding for Booking Times
+"""
+
+from bisect import bisect_right
+from datetime import datetime
+from config import BOOKING_SLOTS
+
+def slot_to_minutes(value):
+    """
+    Convert a slot to minutes since midnight
+
+    Args:
+        value: Minutes (int), display label like '7:00 PM', or 24h '19:00'
+
+    Returns:
+        int minutes since midnight
+
+    Raises:
+        ValueError: If the value cannot be parsed
+    """
+    if isinstance(value, int):
+        minutes = value
+    else:
+        text = str(value).strip()
+        if text.isdigit():
+            minutes = int(text)
+        else:
+            for fmt in ("%I:%M %p", "%H:%M"):
+                try:
+                    parsed = datetime.strptime(text.upper(), fmt)
+                    break
+                except ValueError:
+                    continue
+            else:
+                raise ValueError(f"Unrecognised time slot: {value!r}")
+            minutes = parsed.hour * 60 + parsed.minute
+
+    if not 0 <= minutes < 24 * 60:
+        raise ValueError(f"Time slot out of range: {value!r}")
+    return minutes
+
+def minutes_to_slot(minutes):
+    """Convert minutes since midnight to a display label like '7:00 PM'"""
+    hour, minute = divmod(int(minutes), 60)
+    suffix = "AM" if hour < 12 else "PM"
+    return f"{(hour % 12) or 12}:{minute:02d} {suffix}"
+
+# BOOKING_SLOTS is listed in chronological order, so this list is sorted
+SLOT_MINUTES = [slot_to_minutes(slot) for slot in BOOKING_SLOTS]
+_SLOT_SET = frozenset(SLOT_MINUTES)
+
+def is_booking_slot(minutes):
+    """True if minutes is one of the configured booking slots"""
+    return minutes in _SLOT_SET
+
+def slots_after(minutes):
+    """Configured slots strictly later than minutes, in order"""
+    return SLOT_MINUTES[bisect_right(SLOT_MINUTES, minutes):]